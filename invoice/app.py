@@ -1,20 +1,46 @@
 """Flask web app for Every Angle invoice generation."""
 
+import hashlib
 import os
 import re
 import logging
 import threading
 import time
+import unicodedata
+from typing import Optional
+from urllib.parse import quote
 from urllib.request import urlopen
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, url_for
 from src.invoice_ev import generate_ev_invoice, generate_receipt, generate_credit_note, EVInvoiceOptions
-from src.generic_invoice import create_generic_invoice, create_generic_receipt
+from src.batch import RenderTask, render_task, build_batch_archive, BATCH_MAX_ITEMS
+from src.bundle import BundleTask, BUNDLE_MAX_ITEMS
+from src.jobs import job_store, submit_job
+from src.set_list import SetListTask, fragment_cache
 from src.invoice import Invoice, Line_item, Section
 from src.config import BusinessConfig, Address
 from src.ev_config import EV_CONFIG
-from src.services import get_service_by_id, get_all_services_flat
-from io import BytesIO
+from src.services import get_catalog, get_service_by_id
+from src.schema import EMAIL_RE, Field, Rule, Schema, ValidationError, decode_json_object, error_body
+from src.admission import (
+    Rejected,
+    admission,
+    finish_admission,
+    render_slot,
+    request_start_time,
+    start_admission,
+)
+from src.assets import asset_digest, asset_version, warm_logo
+from src.metrics import (
+    CONTENT_TYPE as METRICS_CONTENT_TYPE, record_pdf_size, record_request, render_metrics, track_in_flight,
+)
+from src.pdf import stylesheet_cache_stats
+from src.pdf_cache import pdf_cache
+from src.pdf_profiles import DEFAULT_PDF_PROFILE, PDF_PROFILES
+from src.pdf_store import pdf_store
+from src.templates import warm_templates
+from src.timing import finish_timing, server_timing_header, stage, start_timing
+from src.warmup import is_warm, warm_worker
 
 # Load environment variables from .env file
 load_dotenv()
@@ -37,6 +63,87 @@ app.config['INVOICE_API_KEY'] = os.getenv('INVOICE_API_KEY', '')
 
 logger.info(f"Flask app initialized in {app.config['ENV']} mode")
 
+# Compile PDF templates, prepare the logo and load the service catalog at
+# import time so a preloading gunicorn master does it once for every worker
+# it forks
+warm_templates()
+warm_logo(EV_CONFIG.logo_path)
+get_catalog()
+
+
+def _route_label() -> str:
+    """The matched URL rule (bounded cardinality), not the raw path."""
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+
+@app.before_request
+def _start_request_instrumentation():
+    g.request_arrived_at = time.time()
+    g.request_start = time.perf_counter()
+    track_in_flight(1)
+    start_timing()
+
+
+@app.after_request
+def _record_request_metrics(response):
+    record_request(_route_label(), request.method, response.status_code,
+                   time.perf_counter() - g.request_start)
+    return response
+
+
+@app.after_request
+def _add_server_timing(response):
+    """Report where a render spent its time, for the proxy and browser dev tools."""
+    timings = finish_timing()
+    if timings:
+        timings["total"] = time.perf_counter() - g.request_start
+        header = server_timing_header(timings)
+        response.headers["Server-Timing"] = header
+        logger.debug(f"Render stages for {request.path}: {header}")
+    return response
+
+
+@app.teardown_request
+def _finish_request_metrics(exc):
+    # Runs even when a view raised, so the in-flight gauge never leaks
+    track_in_flight(-1)
+
+
+# Endpoints that render PDFs while the client waits, and so need a render slot
+RENDER_ENDPOINTS = frozenset({
+    "generate_invoice",
+    "generate_receipt_route",
+    "generate_credit_note_route",
+    "generate_generic_invoice",
+    "generate_set_list",
+    "generate_bundle",
+    "generate_batch",
+})
+
+
+@app.before_request
+def _start_admission():
+    """Make this request's renders wait for the worker's render slot (see src/admission.py)."""
+    if request.endpoint not in RENDER_ENDPOINTS:
+        return
+    # Count from when the proxy saw the request if it says, else from its arrival here
+    started_at = request_start_time(request.headers.get("X-Request-Start"), time.time())
+    start_admission(_route_label(), started_at or g.request_arrived_at)
+
+
+@app.teardown_request
+def _finish_admission(exc):
+    finish_admission()
+
+
+def _busy_response(e: Rejected):
+    """503 + Retry-After for a render that could not get a slot in time."""
+    logger.warning(f"Rejected {request.path} ({e.reason}), retry after {e.retry_after}s")
+    response = jsonify({"error": str(e)})
+    response.status_code = 503
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response
+
 
 def _verify_api_key():
     """Verify the request has a valid API key in the Authorization header.
@@ -63,166 +170,271 @@ def _verify_api_key():
         raise ValueError('Invalid API key')
 
 
-def _parse_item_list(raw_items: list, desc_error: str = "Each line item must have a description") -> list:
-    """Parse raw dicts into Line_item instances.
+def pdf_response(pdf_bytes: bytes, filename: str, profile: Optional[str] = None):
+    """Wrap PDF bytes in a Flask file download response.
 
-    Raises ValueError with a user-facing message on invalid input.
+    The bytes object is handed to the WSGI server as the response body
+    as-is (no BytesIO wrapper or chunked re-reads), and Content-Length is
+    set from its size. The output profile, if known, is reported in the
+    X-PDF-Profile header and logged with the size.
     """
-    items = []
-    for item in raw_items:
-        if not item.get("description"):
-            raise ValueError(desc_error)
-        try:
-            price = float(item["price"])
-        except (ValueError, TypeError, KeyError):
-            raise ValueError("Line item price must be a valid number")
-        if price < 0:
-            raise ValueError("Line item price cannot be negative")
-        items.append(Line_item(description=item["description"], price=price))
-    return items
-
-
-def pdf_response(pdf_bytes: bytes, filename: str):
-    """Wrap PDF bytes in a Flask file download response."""
-    return send_file(
-        BytesIO(pdf_bytes),
-        mimetype="application/pdf",
-        as_attachment=True,
-        download_name=filename,
+    record_pdf_size(_route_label(), len(pdf_bytes), profile or "unknown")
+    response = Response(pdf_bytes, mimetype="application/pdf")
+    if profile:
+        response.headers["X-PDF-Profile"] = profile
+        logger.info(f"Returning {filename} ({profile} profile): {len(pdf_bytes)} bytes")
+    try:
+        filename.encode("ascii")
+        names = {"filename": filename}
+    except UnicodeEncodeError:
+        # Same fallback as send_file: ASCII filename plus RFC 5987 filename*
+        simple = unicodedata.normalize("NFKD", filename).encode("ascii", "ignore").decode("ascii")
+        names = {"filename": simple, "filename*": f"UTF-8''{quote(filename, safe='!#$&+^`|~')}"}
+    response.headers.set("Content-Disposition", "attachment", **names)
+    return response
+
+
+# Versioned static URLs never change content, so browsers may keep them for a year
+STATIC_MAX_AGE = 365 * 24 * 60 * 60
+
+
+def _static_digests() -> dict[str, str]:
+    """Content hashes of the files in static/ (they only change with a deploy, i.e. a restart)."""
+    with os.scandir(app.static_folder) as entries:
+        return {e.name: asset_digest(e.path) for e in entries if e.is_file()}
+
+
+# Hashed once at startup rather than on every page render
+STATIC_DIGESTS = _static_digests()
+
+
+def static_url(filename: str) -> str:
+    """URL for a file in static/ with a content hash, so it can be cached forever."""
+    return url_for("static", filename=filename, v=STATIC_DIGESTS.get(filename))
+
+
+app.jinja_env.globals["static_url"] = static_url
+
+
+@app.after_request
+def _cache_static_files(response):
+    if request.endpoint == "static" and response.status_code in (200, 304):
+        if request.args.get("v"):
+            response.headers["Cache-Control"] = f"public, max-age={STATIC_MAX_AGE}, immutable"
+        else:
+            # Unversioned URLs must be revalidated (Flask sends an ETag for them)
+            response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# template name -> (version key, encoded HTML, ETag)
+_page_cache: dict[str, tuple[tuple, bytes, str]] = {}
+
+
+def cached_page(template_name: str, version: str = "", **context):
+    """
+    Render a page that only depends on its template and version.
+
+    The HTML is rendered once per (version, template mtime) and served with a
+    strong ETag; browsers revalidate with If-None-Match and get a 304 without
+    a body. Static URLs in it are fixed for the life of the process.
+    """
+    key = (
+        version,
+        asset_version(os.path.join(app.root_path, app.template_folder, template_name)),
     )
+    cached = _page_cache.get(template_name)
+    if cached is None or cached[0] != key:
+        html = render_template(template_name, **context).encode("utf-8")
+        cached = (key, html, hashlib.sha256(html).hexdigest()[:32])
+        _page_cache[template_name] = cached
+    response = Response(cached[1], mimetype="text/html")
+    response.set_etag(cached[2])
+    response.headers["Cache-Control"] = "no-cache"
+    return response.make_conditional(request)
 
 
 @app.route("/", methods=["GET"])
 def form():
-    """Render the invoice form."""
+    """Render the invoice form (cached per service catalog version)."""
     logger.info("Form page requested")
-    services = get_all_services_flat()
-    return render_template("form.html", services=services)
+    # One catalog snapshot, so the version and the services always match
+    catalog = get_catalog()
+    return cached_page("form.html", catalog.version, services=catalog.flat)
 
 
-@app.route("/generate", methods=["POST"])
-def generate_invoice():
-    """Generate an invoice from form data."""
-    try:
-        data = request.get_json()
-        logger.info(
-            f"Invoice generation requested for {data.get('customer_name', 'unknown')}")
-
-        # Validate required fields
-        if not data.get("customer_name"):
-            return jsonify({"error": "Customer name is required"}), 400
-        if not data.get("event_date"):
-            return jsonify({"error": "Event date is required"}), 400
-        if not data.get("venue"):
-            return jsonify({"error": "Venue is required"}), 400
-        if not data.get("invoice_number"):
-            return jsonify({"error": "Invoice number is required"}), 400
-
-        # Build line items from presets and custom items
-        line_items = []
-
-        # Add preset items
-        if data.get("preset_ids"):
-            for preset_id in data["preset_ids"]:
-                try:
-                    line_items.append(get_service_by_id(preset_id))
-                except ValueError as e:
-                    return jsonify({"error": str(e)}), 400
-
-        # Add custom items
-        if data.get("custom_items"):
-            try:
-                line_items.extend(_parse_item_list(
-                    data["custom_items"],
-                    desc_error="Custom item description is required",
-                ))
-            except ValueError as e:
-                return jsonify({"error": str(e)}), 400
+def _line_item(values: dict) -> Line_item:
+    """Build a Line_item from a validated {"description", "price"} object."""
+    return Line_item(description=values["description"], price=values["price"])
 
-        # Must have at least one line item
-        if not line_items:
-            return jsonify({"error": "At least one service or custom item is required"}), 400
 
-        # Parse optional fields
-        discount_percent = None
-        if data.get("discount_percent"):
-            try:
-                discount_percent = float(data["discount_percent"])
-            except (ValueError, TypeError):
-                return jsonify({"error": "Discount percent must be a number"}), 400
+def _item_list(field: str, item_name: str, description_required: str, price: Field) -> Field:
+    """A list of {"description", "price"} objects, validated into Line_items."""
+    return Field(
+        field, kind="list", invalid=f"{item_name} must be a list",
+        each=Schema(Field("description", required=description_required), price, factory=_line_item),
+    )
 
-        travel_cost = None
-        if data.get("travel_cost"):
-            try:
-                travel_cost = float(data["travel_cost"])
-            except (ValueError, TypeError):
-                return jsonify({"error": "Travel cost must be a number"}), 400
-
-        # Parse additional charges
-        additional_charges = None
-        if data.get("additional_charges"):
-            additional_charges = []
-            for charge in data["additional_charges"]:
-                if not charge.get("description"):
-                    return jsonify({"error": "Charge description is required"}), 400
-                try:
-                    price = float(charge.get("price", 0))
-                except (ValueError, TypeError):
-                    return jsonify({"error": "Charge amount must be a number"}), 400
-                additional_charges.append(Line_item(
-                    description=charge["description"],
-                    price=price
-                ))
-
-        # Parse payments made
-        payment_made = None
-        if data.get("payment_made"):
-            payment_made = []
-            for payment in data["payment_made"]:
-                if not payment.get("description"):
-                    return jsonify({"error": "Payment description is required"}), 400
-                try:
-                    price = float(payment.get("price", 0))
-                except (ValueError, TypeError):
-                    return jsonify({"error": "Payment amount must be a number"}), 400
-                payment_made.append(Line_item(
-                    description=payment["description"],
-                    price=price
-                ))
-
-        # Create invoice options
-        options = EVInvoiceOptions(
-            customer_name=data["customer_name"],
-            event_date=data["event_date"],
-            venue=data["venue"],
-            invoice_number=data["invoice_number"],
-            line_items=line_items,
-            discount_percent=discount_percent,
-            travel_cost=travel_cost,
-            payment_made=payment_made,
-            additional_charges=additional_charges,
-        )
 
-        # Generate invoice
-        show_deposit = data.get("show_deposit", True)
-        deposit_only = data.get("deposit_only", False)
-        amount_due_override = data.get("amount_due_override")
+# Line item prices may be 0 but must be present and not negative
+_ITEM_PRICE = Field(
+    "price", kind="number", blank_is_missing=False,
+    required="Line item price must be a valid number",
+    invalid="Line item price must be a valid number",
+    check=lambda price: price >= 0, check_message="Line item price cannot be negative",
+)
+
+
+# Output profile for the PDF (see src/pdf_profiles.py)
+_PROFILE = Field(
+    "profile", default=DEFAULT_PDF_PROFILE,
+    check=lambda name: isinstance(name, str) and name in PDF_PROFILES,
+    check_message="profile must be one of: " + ", ".join(PDF_PROFILES),
+)
+
+
+def _amount_field(invalid: str) -> Field:
+    # Charges and payments default to 0 when no price is given
+    return Field("price", kind="number", default=0.0, blank_is_missing=False, invalid=invalid)
+
+
+INVOICE_SCHEMA = Schema(
+    Field("customer_name", required="Customer name is required"),
+    Field("event_date", required="Event date is required"),
+    Field("venue", required="Venue is required"),
+    Field("invoice_number", required="Invoice number is required"),
+    Field("preset_ids", kind="list", default=[], invalid="preset_ids must be a list",
+          each=Field(required="Service ID is required",
+                     check=lambda service_id: isinstance(service_id, str),
+                     check_message="Service ID must be a string",
+                     convert=get_service_by_id)),
+    _item_list("custom_items", "custom_items", "Custom item description is required", _ITEM_PRICE),
+    Field("discount_percent", kind="number", invalid="Discount percent must be a number"),
+    Field("travel_cost", kind="number", invalid="Travel cost must be a number"),
+    _item_list("additional_charges", "additional_charges", "Charge description is required",
+               _amount_field("Charge amount must be a number")),
+    _item_list("payment_made", "payment_made", "Payment description is required",
+               _amount_field("Payment amount must be a number")),
+    Field("show_deposit", default=True, blank_is_missing=False),
+    Field("deposit_only", default=False, blank_is_missing=False),
+    Field("amount_due_override", kind="number", blank_is_missing=False,
+          invalid="Amount due override must be a number"),
+    _PROFILE,
+    rules=(
+        Rule(("preset_ids", "custom_items"),
+             lambda v: v["preset_ids"] or v["custom_items"],
+             "At least one service or custom item is required"),
+    ),
+)
+
+CREDIT_NOTE_SCHEMA = Schema(
+    Field("customer_name", required="customer_name is required"),
+    Field("date", required="date is required"),
+    Field("amount", kind="number", blank_is_missing=False,
+          required="amount is required", invalid="amount must be a number",
+          check=lambda amount: amount > 0, check_message="amount must be positive"),
+    Field("description", default="Refund"),
+    Field("reference"),
+    Field("event_date", default=""),
+    Field("venue", default=""),
+    _PROFILE,
+)
+
+
+def _build_invoice_options(values: dict) -> EVInvoiceOptions:
+    """Build EVInvoiceOptions from validated INVOICE_SCHEMA values."""
+    return EVInvoiceOptions(
+        customer_name=values["customer_name"],
+        event_date=values["event_date"],
+        venue=values["venue"],
+        invoice_number=values["invoice_number"],
+        line_items=[*values["preset_ids"], *(values["custom_items"] or ())],
+        discount_percent=values["discount_percent"],
+        travel_cost=values["travel_cost"],
+        payment_made=values["payment_made"],
+        additional_charges=values["additional_charges"],
+    )
+
 
+def _build_invoice_task(data: dict) -> RenderTask:
+    """Validate an invoice payload and return the render task for it."""
+    with stage("validate"):
+        values = INVOICE_SCHEMA.validate(data)
+    with stage("build"):
         invoice = generate_ev_invoice(
-            options,
-            show_deposit=show_deposit,
-            deposit_only=deposit_only,
-            amount_due_override=amount_due_override
+            _build_invoice_options(values),
+            show_deposit=values["show_deposit"],
+            deposit_only=values["deposit_only"],
+            amount_due_override=values["amount_due_override"],
         )
+    return RenderTask(invoice, EV_CONFIG, f"invoice-{values['invoice_number']}.pdf",
+                      profile=values["profile"])
+
+
+def _build_receipt_task(data: dict) -> RenderTask:
+    """Validate a receipt payload and return the render task for it."""
+    with stage("validate"):
+        values = INVOICE_SCHEMA.validate(data)
+    with stage("build"):
+        receipt = generate_receipt(
+            _build_invoice_options(values),
+            show_deposit=values["show_deposit"],
+        )
+    return RenderTask(receipt, EV_CONFIG, f"receipt-{values['invoice_number']}.pdf",
+                      profile=values["profile"])
+
+
+def _build_credit_note_task(data: dict) -> RenderTask:
+    """Validate a credit note payload and return the render task for it."""
+    with stage("validate"):
+        values = CREDIT_NOTE_SCHEMA.validate(data)
+
+    with stage("build"):
+        credit_note = generate_credit_note(
+            customer_name=values["customer_name"],
+            date=values["date"],
+            amount=values["amount"],
+            description=values["description"],
+            reference=values["reference"],
+            event_date=values["event_date"],
+            venue=values["venue"],
+        )
+
+    raw_ref = str(values["reference"] or "credit-note")
+    safe_ref = re.sub(r"[^\w\-]", "-", raw_ref)
+    return RenderTask(credit_note, EV_CONFIG, f"{safe_ref}.pdf", profile=values["profile"])
+
+
+# Document types accepted by /generate-batch, keyed by the item's "type"
+TASK_BUILDERS = {
+    "invoice": _build_invoice_task,
+    "receipt": _build_receipt_task,
+    "credit_note": _build_credit_note_task,
+}
+
+
+@app.route("/generate", methods=["POST"])
+def generate_invoice():
+    """Generate an invoice from form data."""
+    try:
+        try:
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            logger.info(
+                f"Invoice generation requested for {data.get('customer_name', 'unknown')}")
+            task = _build_invoice_task(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
 
         # Generate PDF bytes
-        pdf_bytes = create_generic_invoice(
-            invoice, EV_CONFIG, return_bytes=True)
+        pdf_bytes = render_task(task)
         if pdf_bytes is None:
             return jsonify({"error": "Failed to generate invoice PDF"}), 500
 
-        return pdf_response(pdf_bytes, f"invoice-{data['invoice_number']}.pdf")
+        return pdf_response(pdf_bytes, task.filename, task.profile)
 
+    except Rejected as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error(f"Error generating invoice: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error generating invoice: {str(e)}"}), 500
@@ -232,121 +444,24 @@ def generate_invoice():
 def generate_receipt_route():
     """Generate a receipt from form data."""
     try:
-        data = request.get_json()
-        logger.info(
-            f"Receipt generation requested for {data.get('customer_name', 'unknown')}")
-
-        # Validate required fields
-        if not data.get("customer_name"):
-            return jsonify({"error": "Customer name is required"}), 400
-        if not data.get("event_date"):
-            return jsonify({"error": "Event date is required"}), 400
-        if not data.get("venue"):
-            return jsonify({"error": "Venue is required"}), 400
-        if not data.get("invoice_number"):
-            return jsonify({"error": "Invoice number is required"}), 400
-
-        # Build line items from presets and custom items
-        line_items = []
-
-        # Add preset items
-        if data.get("preset_ids"):
-            for preset_id in data["preset_ids"]:
-                try:
-                    line_items.append(get_service_by_id(preset_id))
-                except ValueError as e:
-                    return jsonify({"error": str(e)}), 400
-
-        # Add custom items
-        if data.get("custom_items"):
-            try:
-                line_items.extend(_parse_item_list(
-                    data["custom_items"],
-                    desc_error="Custom item description is required",
-                ))
-            except ValueError as e:
-                return jsonify({"error": str(e)}), 400
-
-        # Must have at least one line item
-        if not line_items:
-            return jsonify({"error": "At least one service or custom item is required"}), 400
-
-        # Parse optional fields
-        discount_percent = None
-        if data.get("discount_percent"):
-            try:
-                discount_percent = float(data["discount_percent"])
-            except (ValueError, TypeError):
-                return jsonify({"error": "Discount percent must be a number"}), 400
-
-        travel_cost = None
-        if data.get("travel_cost"):
-            try:
-                travel_cost = float(data["travel_cost"])
-            except (ValueError, TypeError):
-                return jsonify({"error": "Travel cost must be a number"}), 400
-
-        # Parse additional charges
-        additional_charges = None
-        if data.get("additional_charges"):
-            additional_charges = []
-            for charge in data["additional_charges"]:
-                if not charge.get("description"):
-                    return jsonify({"error": "Charge description is required"}), 400
-                try:
-                    price = float(charge.get("price", 0))
-                except (ValueError, TypeError):
-                    return jsonify({"error": "Charge amount must be a number"}), 400
-                additional_charges.append(Line_item(
-                    description=charge["description"],
-                    price=price
-                ))
-
-        # Parse payments made
-        payment_made = None
-        if data.get("payment_made"):
-            payment_made = []
-            for payment in data["payment_made"]:
-                if not payment.get("description"):
-                    return jsonify({"error": "Payment description is required"}), 400
-                try:
-                    price = float(payment.get("price", 0))
-                except (ValueError, TypeError):
-                    return jsonify({"error": "Payment amount must be a number"}), 400
-                payment_made.append(Line_item(
-                    description=payment["description"],
-                    price=price
-                ))
-
-        # Create invoice options
-        options = EVInvoiceOptions(
-            customer_name=data["customer_name"],
-            event_date=data["event_date"],
-            venue=data["venue"],
-            invoice_number=data["invoice_number"],
-            line_items=line_items,
-            discount_percent=discount_percent,
-            travel_cost=travel_cost,
-            payment_made=payment_made,
-            additional_charges=additional_charges,
-        )
-
-        # Generate receipt
-        show_deposit = data.get("show_deposit", True)
-
-        receipt = generate_receipt(
-            options,
-            show_deposit=show_deposit
-        )
+        try:
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            logger.info(
+                f"Receipt generation requested for {data.get('customer_name', 'unknown')}")
+            task = _build_receipt_task(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
 
         # Generate PDF bytes
-        pdf_bytes = create_generic_receipt(
-            receipt, EV_CONFIG, return_bytes=True)
+        pdf_bytes = render_task(task)
         if pdf_bytes is None:
             return jsonify({"error": "Failed to generate receipt PDF"}), 500
 
-        return pdf_response(pdf_bytes, f"receipt-{data['invoice_number']}.pdf")
+        return pdf_response(pdf_bytes, task.filename, task.profile)
 
+    except Rejected as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error(f"Error generating receipt: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error generating receipt: {str(e)}"}), 500
@@ -356,180 +471,320 @@ def generate_receipt_route():
 def generic_form():
     """Render the generic invoice form."""
     logger.info("Generic invoice form page requested")
-    return render_template("generic_form.html")
+    return cached_page("generic_form.html")
 
 
 @app.route("/generate-credit-note", methods=["POST"])
 def generate_credit_note_route():
     """Generate a credit note PDF for a refund."""
     try:
-        data = request.get_json()
-        logger.info(
-            f"Credit note generation requested for {data.get('customer_name', 'unknown')}")
-
-        if not data.get("customer_name"):
-            return jsonify({"error": "customer_name is required"}), 400
-        if not data.get("date"):
-            return jsonify({"error": "date is required"}), 400
-        if data.get("amount") is None:
-            return jsonify({"error": "amount is required"}), 400
-
         try:
-            amount = float(data["amount"])
-        except (ValueError, TypeError):
-            return jsonify({"error": "amount must be a number"}), 400
-        if amount <= 0:
-            return jsonify({"error": "amount must be positive"}), 400
-
-        credit_note = generate_credit_note(
-            customer_name=data["customer_name"],
-            date=data["date"],
-            amount=amount,
-            description=data.get("description") or "Refund",
-            reference=data.get("reference"),
-            event_date=data.get("event_date", ""),
-            venue=data.get("venue", ""),
-        )
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            logger.info(
+                f"Credit note generation requested for {data.get('customer_name', 'unknown')}")
+            task = _build_credit_note_task(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
 
-        pdf_bytes = create_generic_invoice(credit_note, EV_CONFIG, return_bytes=True)
+        pdf_bytes = render_task(task)
         if pdf_bytes is None:
             return jsonify({"error": "Failed to generate credit note PDF"}), 500
 
-        raw_ref = data.get("reference") or "credit-note"
-        safe_ref = re.sub(r"[^\w\-]", "-", raw_ref)
-        return pdf_response(pdf_bytes, f"{safe_ref}.pdf")
+        return pdf_response(pdf_bytes, task.filename, task.profile)
 
+    except Rejected as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error(f"Error generating credit note: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error generating credit note: {str(e)}"}), 500
 
 
-@app.route("/generate-generic", methods=["POST"])
-def generate_generic_invoice():
-    """Generate a generic invoice from user-supplied business details and line items."""
+@app.route("/generate-batch", methods=["POST"])
+def generate_batch():
+    """Render many invoices, receipts and credit notes into one ZIP.
+
+    Accepts {"items": [{"type": "invoice" | "receipt" | "credit_note", ...}]}
+    where each item carries the same fields as the matching single-document
+    route. Items are validated individually and rendered in parallel; the ZIP
+    contains a manifest.json with the status of every item, so one bad item
+    does not fail the batch.
+    """
     try:
-        # Verify API key
         try:
-            _verify_api_key()
+            data = decode_json_object(request.get_data())
         except ValueError as e:
-            return jsonify({"error": str(e)}), 401
-        
-        data = request.get_json()
-        logger.info(
-            f"Generic invoice generation requested for {data.get('customer_name', 'unknown')}")
-
-        # Validate required business fields
-        if not data.get("business_name"):
-            return jsonify({"error": "Business name is required"}), 400
-        if not data.get("address_line_1"):
-            return jsonify({"error": "Address line 1 is required"}), 400
-        if not data.get("phone_number"):
-            return jsonify({"error": "Phone number is required"}), 400
-        if not data.get("email_address"):
-            return jsonify({"error": "Email address is required"}), 400
-        if not re.match(r'^[^@\s]+@[^@\s]+\.[^@\s]+$', data["email_address"]):
-            return jsonify({"error": "Email address must be a valid email"}), 400
-        if not data.get("account_number"):
-            return jsonify({"error": "Account number is required"}), 400
-        if not data.get("sort_code"):
-            return jsonify({"error": "Sort code is required"}), 400
-
-        # Validate required invoice fields
-        if not data.get("customer_name"):
-            return jsonify({"error": "Customer name is required"}), 400
-        if not data.get("invoice_number"):
-            return jsonify({"error": "Invoice number is required"}), 400
-        if not data.get("title"):
-            return jsonify({"error": "Invoice title is required"}), 400
-
-        # Validate line items
-        raw_items = data.get("line_items")
-        if not raw_items:
-            return jsonify({"error": "At least one line item is required"}), 400
+            return jsonify(error_body(e)), 400
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            return jsonify({"error": "items must be a non-empty list"}), 400
+        if len(items) > BATCH_MAX_ITEMS:
+            return jsonify({"error": f"A batch can contain at most {BATCH_MAX_ITEMS} items"}), 400
+        logger.info(f"Batch generation requested for {len(items)} documents")
+
+        tasks: dict[int, RenderTask] = {}
+        manifest = []
+        for index, item in enumerate(items):
+            entry = {"index": index, "type": item.get("type") if isinstance(item, dict) else None}
+            manifest.append(entry)
+            builder = TASK_BUILDERS.get(entry["type"])
+            if builder is None:
+                entry.update(status="error", error="type must be one of: " + ", ".join(TASK_BUILDERS))
+                continue
+            try:
+                tasks[index] = builder(item)
+            except ValueError as e:
+                entry.update(status="error", **error_body(e))
+            except Exception as e:
+                entry.update(status="error", error=f"Invalid document: {str(e)}")
+
+        # The pool renders in other processes, but the batch still takes this
+        # worker's slot so it is counted against its render capacity
+        with render_slot():
+            archive = build_batch_archive(tasks, manifest)
+        return send_file(
+            archive,
+            mimetype="application/zip",
+            as_attachment=True,
+            download_name="documents.zip",
+        )
+
+    except Rejected as e:
+        return _busy_response(e)
+    except Exception as e:
+        logger.error(f"Error generating batch: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error generating batch: {str(e)}"}), 500
+
 
+# Bundle-level fields; the items are validated by their own type's schema
+BUNDLE_SCHEMA = Schema(
+    Field("filename", default="documents"),
+    _PROFILE,
+)
+
+
+def _build_bundle_task(data: dict) -> BundleTask:
+    """Validate a bundle payload ({"items": [...], "filename"?, "profile"?}) and return its render task.
+
+    Every item must be valid; errors from all items are reported together.
+    """
+    with stage("validate"):
+        items = data.get("items")
+        if not isinstance(items, list) or not items:
+            raise ValueError("items must be a non-empty list")
+        if len(items) > BUNDLE_MAX_ITEMS:
+            raise ValueError(f"A bundle can contain at most {BUNDLE_MAX_ITEMS} documents")
+
+        errors = []
+        values = BUNDLE_SCHEMA.validate_into(data, "", errors)
+        tasks = []
+        for index, item in enumerate(items):
+            path = f"items[{index}]"
+            builder = TASK_BUILDERS.get(item.get("type") if isinstance(item, dict) else None)
+            if builder is None:
+                errors.append({"field": f"{path}.type",
+                               "message": "type must be one of: " + ", ".join(TASK_BUILDERS)})
+                continue
+            try:
+                tasks.append(builder(item))
+            except ValidationError as e:
+                errors.extend({**error, "field": f"{path}.{error['field']}"} for error in e.errors)
+            except ValueError as e:
+                errors.append({"field": path, "message": str(e)})
+        if errors:
+            raise ValidationError(errors)
+
+    raw_name = str(values["filename"])
+    safe_name = re.sub(r"[^\w\-]", "-", raw_name.removesuffix(".pdf"))
+    return BundleTask(tasks, f"{safe_name}.pdf", profile=values["profile"])
+
+
+@app.route("/generate-bundle", methods=["POST"])
+def generate_bundle():
+    """Render several invoices, receipts and credit notes into one PDF.
+
+    Accepts {"items": [{"type": "invoice" | "receipt" | "credit_note", ...}],
+    "filename": optional, "profile": optional} with the same item fields as
+    /generate-batch. The documents are laid out together in one WeasyPrint
+    run; each starts on a new page and gets a bookmark in the merged PDF.
+    """
+    try:
         try:
-            line_items = _parse_item_list(raw_items)
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            task = _build_bundle_task(data)
         except ValueError as e:
-            return jsonify({"error": str(e)}), 400
-
-        # Build business config from submitted details
-        address = Address(
-            line_1=data["address_line_1"],
-            # empty strings from the form are normalised to None for optional lines
-            line_2=data.get("address_line_2") or None,
-            line_3=data.get("address_line_3") or None,
-            line_4=data.get("address_line_4") or None,
-            line_5=data.get("address_line_5") or None,
-        )
-        business_config = BusinessConfig(
-            business_name=data["business_name"],
-            address=address,
-            phone_number=data["phone_number"],
-            email_address=data["email_address"],
-            account_number=data["account_number"],
-            sort_code=data["sort_code"],
-            logo_path=None,
-        )
+            return jsonify(error_body(e)), 400
+        logger.info(f"Bundle generation requested for {len(task.tasks)} documents")
+
+        return pdf_response(render_task(task), task.filename, task.profile)
+
+    except Rejected as e:
+        return _busy_response(e)
+    except Exception as e:
+        logger.error(f"Error generating bundle: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error generating bundle: {str(e)}"}), 500
+
+
+GENERIC_SCHEMA = Schema(
+    Field("business_name", required="Business name is required"),
+    Field("address_line_1", required="Address line 1 is required"),
+    Field("phone_number", required="Phone number is required"),
+    Field("email_address", required="Email address is required",
+          check=lambda email: isinstance(email, str) and EMAIL_RE.match(email),
+          check_message="Email address must be a valid email"),
+    Field("account_number", required="Account number is required"),
+    Field("sort_code", required="Sort code is required"),
+    Field("customer_name", required="Customer name is required"),
+    Field("invoice_number", required="Invoice number is required"),
+    Field("title", required="Invoice title is required"),
+    Field("line_items", kind="list", required="At least one line item is required",
+          invalid="line_items must be a list",
+          each=Schema(Field("description", required="Each line item must have a description"),
+                      _ITEM_PRICE, factory=_line_item)),
+    # empty strings from the form are normalised to None for optional lines
+    Field("address_line_2"),
+    Field("address_line_3"),
+    Field("address_line_4"),
+    Field("address_line_5"),
+    Field("date"),
+    Field("customer_address_lines", kind="list", invalid="customer_address_lines must be a list"),
+    Field("show_contact_line", default=True, blank_is_missing=False),
+    Field("gig_name", default=""),
+    Field("gig_date", default=""),
+    Field("gig_venue", default=""),
+    _PROFILE,
+)
 
+SET_LIST_SCHEMA = Schema(
+    Field("client_name", required="client_name is required",
+          check=lambda name: isinstance(name, str), check_message="client_name must be a string"),
+    Field("event_date", required="event_date is required"),
+    Field("sections", kind="list", required="sections is required", invalid="sections must be a list"),
+    Field("venue", default=""),
+    _PROFILE,
+)
+
+
+def _build_generic_task(data: dict) -> RenderTask:
+    """Validate a generic invoice payload and return the render task for it."""
+    with stage("validate"):
+        values = GENERIC_SCHEMA.validate(data)
+    line_items = values["line_items"]
+
+    # Build business config from submitted details
+    address = Address(
+        line_1=values["address_line_1"],
+        line_2=values["address_line_2"],
+        line_3=values["address_line_3"],
+        line_4=values["address_line_4"],
+        line_5=values["address_line_5"],
+    )
+    business_config = BusinessConfig(
+        business_name=values["business_name"],
+        address=address,
+        phone_number=values["phone_number"],
+        email_address=values["email_address"],
+        account_number=values["account_number"],
+        sort_code=values["sort_code"],
+        logo_path=None,
+    )
+
+    with stage("build"):
         # Build invoice sections
         grand_total = sum(item.price for item in line_items)
         invoice = Invoice(
-            customer_name=data["customer_name"],
-            invoice_number=data["invoice_number"],
-            title=data["title"],
+            customer_name=values["customer_name"],
+            invoice_number=values["invoice_number"],
+            title=values["title"],
             sections=[
-                Section(heading="Items", rows=[
-                    {"description": item.description, "price": item.price, "bold": item.bold}
-                    for item in line_items
-                ]),
-                Section(heading="Total", rows=[
-                    {"description": "Total", "price": grand_total, "bold": True}
-                ]),
+                Section(heading="Items", rows=tuple(line_items)),
+                Section(heading="Total", rows=(
+                    Line_item(description="Total", price=grand_total, bold=True),
+                )),
             ],
         )
 
-        # Extract optional customer address for the invoice (if provided)
-        customer_address = None
-        if data.get("customer_address_lines"):
-            # Build an Address from the provided customer address lines
-            lines = data["customer_address_lines"]
-            if lines:
-                customer_address = Address(
-                    line_1=lines[0] if len(lines) > 0 else "",
-                    line_2=lines[1] if len(lines) > 1 else None,
-                     line_3=lines[2] if len(lines) > 2 else None,
-                     line_4=lines[3] if len(lines) > 3 else None,
-                     line_5=lines[4] if len(lines) > 4 else None,
-                 )
-
-        # Extract optional invoice date and contact line flag
-        invoice_date = data.get("date") or None
-        show_contact_line = data.get("show_contact_line", True)
-
-        # Extract optional gig details
-        gig_details = None
-        if data.get("gig_name") or data.get("gig_date") or data.get("gig_venue"):
-            gig_details = {
-                "name": data.get("gig_name") or "",
-                "date": data.get("gig_date") or "",
-                "venue": data.get("gig_venue") or "",
-            }
+    # Extract optional customer address for the invoice (if provided)
+    customer_address = None
+    lines = values["customer_address_lines"]
+    if lines:
+        # Build an Address from the provided customer address lines
+        customer_address = Address(
+            line_1=lines[0] if len(lines) > 0 else "",
+            line_2=lines[1] if len(lines) > 1 else None,
+            line_3=lines[2] if len(lines) > 2 else None,
+            line_4=lines[3] if len(lines) > 3 else None,
+            line_5=lines[4] if len(lines) > 4 else None,
+        )
+
+    # Extract optional gig details
+    gig_details = None
+    if values["gig_name"] or values["gig_date"] or values["gig_venue"]:
+        gig_details = {
+            "name": values["gig_name"],
+            "date": values["gig_date"],
+            "venue": values["gig_venue"],
+        }
+
+    return RenderTask(
+        invoice,
+        business_config,
+        f"invoice-{values['invoice_number']}.pdf",
+        options={
+            "invoice_date": values["date"],
+            "customer_address": customer_address,
+            "show_contact_line": values["show_contact_line"],
+            "gig_details": gig_details,
+        },
+        profile=values["profile"],
+    )
+
+
+def _build_set_list_task(data: dict) -> SetListTask:
+    """Validate a set list payload and return the render task for it."""
+    with stage("validate"):
+        values = SET_LIST_SCHEMA.validate(data)
+
+    safe_name = values["client_name"].replace(" ", "-").lower()
+    return SetListTask(
+        client_name=values["client_name"],
+        event_date=values["event_date"],
+        venue=values["venue"],
+        sections=values["sections"],
+        filename=f"set-list-{safe_name}.pdf",
+        profile=values["profile"],
+    )
+
+
+@app.route("/generate-generic", methods=["POST"])
+def generate_generic_invoice():
+    """Generate a generic invoice from user-supplied business details and line items."""
+    try:
+        # Verify API key
+        try:
+            _verify_api_key()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 401
+        
+        try:
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            logger.info(
+                f"Generic invoice generation requested for {data.get('customer_name', 'unknown')}")
+            task = _build_generic_task(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
 
         # Generate PDF bytes
-        pdf_bytes = create_generic_invoice(
-            invoice,
-            business_config,
-            return_bytes=True,
-            invoice_date=invoice_date,
-            customer_address=customer_address,
-            show_contact_line=show_contact_line,
-            gig_details=gig_details,
-        )
+        pdf_bytes = render_task(task)
         if pdf_bytes is None:
             return jsonify({"error": "Failed to generate invoice PDF"}), 500
 
-        return pdf_response(pdf_bytes, f"invoice-{data['invoice_number']}.pdf")
+        return pdf_response(pdf_bytes, task.filename, task.profile)
 
+    except Rejected as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error(f"Error generating generic invoice: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error generating invoice: {str(e)}"}), 500
@@ -539,55 +794,118 @@ def generate_generic_invoice():
 def generate_set_list():
     """Generate a set list PDF."""
     try:
-        data = request.get_json()
-        logger.info(f"Set list PDF requested for {data.get('client_name', 'unknown')}")
-
-        if not data.get("client_name"):
-            return jsonify({"error": "client_name is required"}), 400
-        if not data.get("event_date"):
-            return jsonify({"error": "event_date is required"}), 400
-        if not data.get("sections"):
-            return jsonify({"error": "sections is required"}), 400
-
-        app_root = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(app_root, "templates", "set_list_template.html")
-        stylesheet_path = os.path.join(app_root, "dejavu_sans.css")
-
-        with open(template_path, "r") as f:
-            template_content = f.read()
-
-        from jinja2 import Template
-        html = Template(template_content).render(
-            client_name=data["client_name"],
-            event_date=data["event_date"],
-            venue=data.get("venue", ""),
-            sections=data["sections"],
-        )
-
-        from weasyprint import HTML, CSS
-        pdf_bytes = BytesIO()
-        HTML(string=html).write_pdf(
-            pdf_bytes,
-            stylesheets=[CSS(stylesheet_path)] if os.path.exists(stylesheet_path) else None,
-        )
-        pdf_bytes.seek(0)
+        try:
+            with stage("parse"):
+                data = decode_json_object(request.get_data())
+            logger.info(f"Set list PDF requested for {data.get('client_name', 'unknown')}")
+            task = _build_set_list_task(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
 
-        safe_name = data["client_name"].replace(" ", "-").lower()
-        return send_file(
-            pdf_bytes,
-            mimetype="application/pdf",
-            as_attachment=True,
-            download_name=f"set-list-{safe_name}.pdf",
-        )
+        return pdf_response(render_task(task), task.filename, task.profile)
 
+    except Rejected as e:
+        return _busy_response(e)
     except Exception as e:
         logger.error(f"Error generating set list PDF: {str(e)}", exc_info=True)
         return jsonify({"error": f"Error generating set list PDF: {str(e)}"}), 500
 
 
+# Document types accepted by /jobs: everything the synchronous routes render
+JOB_BUILDERS = {
+    **TASK_BUILDERS,
+    "generic": _build_generic_task,
+    "set_list": _build_set_list_task,
+    "bundle": _build_bundle_task,
+}
+
+
+@app.route("/jobs", methods=["POST"])
+def create_job():
+    """Queue a document for background rendering and return its job ID.
+
+    Accepts {"type": <document type>, ...} with the same fields as the
+    matching synchronous route. Poll GET /jobs/<job_id> for the result.
+    """
+    try:
+        try:
+            data = decode_json_object(request.get_data())
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
+        job_type = data.get("type")
+        builder = JOB_BUILDERS.get(job_type)
+        if builder is None:
+            return jsonify({"error": "type must be one of: " + ", ".join(JOB_BUILDERS)}), 400
+
+        # Generic invoices carry third-party business details, so keep them behind the API key
+        if job_type == "generic":
+            try:
+                _verify_api_key()
+            except ValueError as e:
+                return jsonify({"error": str(e)}), 401
+
+        try:
+            task = builder(data)
+        except ValueError as e:
+            return jsonify(error_body(e)), 400
+
+        job_id = submit_job(job_type, task)
+        logger.info(f"Queued {job_type} render job {job_id}")
+        return jsonify({
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/jobs/{job_id}",
+        }), 202
+
+    except Exception as e:
+        logger.error(f"Error queueing render job: {str(e)}", exc_info=True)
+        return jsonify({"error": f"Error queueing render job: {str(e)}"}), 500
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def get_job(job_id):
+    """Return a job's status, or the finished PDF once it has rendered."""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found or expired"}), 404
+    if job["status"] == "done":
+        return pdf_response(job["result"], job["filename"], job["profile"])
+
+    body = {"job_id": job_id, "status": job["status"]}
+    if job["status"] == "failed":
+        body["error"] = job["error"]
+        return jsonify(body), 200
+    return jsonify(body), 202
+
+
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok"})
+    return jsonify({
+        "status": "ok",
+        "stylesheet_cache": stylesheet_cache_stats(),
+        "pdf_cache": pdf_cache.stats(),
+        "pdf_store": pdf_store.stats(),
+        "set_list_fragments": fragment_cache.stats(),
+        "admission": admission.stats(),
+    })
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Request, error, latency and PDF size metrics for all workers (Prometheus format)."""
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Report whether this worker has finished its warm-up render.
+
+    Workers warm up before they accept connections, so under gunicorn this
+    only answers once warm; 503 means the process skipped warm_worker().
+    """
+    if not is_warm():
+        return jsonify({"status": "warming"}), 503
+    return jsonify({"status": "ready"})
 
 
 def _keep_alive():
@@ -604,11 +922,15 @@ def _keep_alive():
         time.sleep(14 * 60)
 
 
-threading.Thread(target=_keep_alive, daemon=True).start()
+def start_keep_alive():
+    """Start the keep-alive pinger (once per process that serves requests)."""
+    threading.Thread(target=_keep_alive, daemon=True).start()
 
 
 if __name__ == "__main__":
     # Only run in debug mode if explicitly set, otherwise gunicorn starts it
     debug_mode = os.getenv('DEBUG', 'False').lower() == 'true'
     port = int(os.getenv('PORT', 5000))
+    warm_worker()
+    start_keep_alive()
     app.run(debug=debug_mode, host='0.0.0.0', port=port)
@@ -5,10 +5,31 @@ import os
 # Server configuration
 bind = f"0.0.0.0:{os.getenv('PORT', 8000)}"
 workers = 3
-worker_class = "sync"
-worker_connections = 1000
+# Threaded workers, so renders waiting for a slot wait inside the worker where
+# admission control (src/admission.py) can see and bound them; a sync worker
+# only ever holds the request it is running. One thread for the worker's
+# single render slot and one per queue place, plus one to turn requests away
+# with 503 and answer /health. Defaults must match src/admission.py.
+worker_class = "gthread"
+threads = 1 + int(os.getenv('ADMISSION_MAX_QUEUE', 4)) + 1
+# Accept one connection more than there are threads: gthread only reads new
+# requests while under this limit, so the spare thread can take the last one
+# and turn it away. Any more wait in the backlog (or go to a less busy
+# worker) rather than unseen in the thread pool's own queue.
+worker_connections = threads + 1
+# In a threaded worker this only restarts a worker whose main loop stops
+# responding; unlike a sync worker, one stuck in a render is not killed.
+# Admission control's deadline keeps new renders from starting too late.
 timeout = 30
-keepalive = 2
+# Every open connection holds a thread, so idle ones are closed (sync workers
+# never kept connections alive either)
+keepalive = 0
+# Connections waiting for a free worker. Kept short so a burst is refused at
+# the socket instead of queueing past the timeout; admission control in the
+# app rejects anything that has already waited too long (X-Request-Start).
+backlog = int(os.getenv('GUNICORN_BACKLOG', 32))
+# max_requests is left unset: src/lifecycle.py recycles workers by request
+# count and RSS (with jitter) and logs why
 
 # Logging
 accesslog = "-"  # stdout
@@ -34,4 +55,57 @@ tmp_upload_dir = None
 # Application settings
 reload = os.getenv('FLASK_ENV') == 'development'
 reload_extra_files = []
-preload_app = False
+# Import Flask, WeasyPrint and compile templates once in the master, then fork.
+# Never with reload: workers would keep forking the master's stale code.
+preload_app = not reload and os.getenv('GUNICORN_PRELOAD', 'true').lower() == 'true'
+
+
+def on_starting(server):
+    """Start each server run with empty request metrics."""
+    from src.metrics import metrics
+    metrics.reset()
+
+
+def post_fork(server, worker):
+    """Start the keep-alive pinger in each worker (a thread started in the master isn't forked)."""
+    from app import start_keep_alive
+    start_keep_alive()
+
+
+def post_request(worker, req, environ, resp):
+    """Recycle the worker once its RSS or request count crosses its limit."""
+    from src.lifecycle import after_request
+    after_request(worker)
+
+
+def worker_exit(server, worker):
+    """Stop the worker's batch render pool with it, so recycling frees the pool's memory too."""
+    from src.batch import shutdown_executor
+    from src.metrics import metrics
+    shutdown_executor()
+    # Write the last buffered metrics (e.g. this worker's recycle)
+    metrics.flush()
+
+
+def _start_request_threads(worker):
+    """
+    Start all of a gthread worker's request threads up front. The thread pool
+    only adds a thread when it counts no idle ones, and it over-counts them
+    once requests have finished, so it can stop growing below `threads` and
+    leave connections queued where admission control can't see them.
+    """
+    tpool = getattr(worker, "tpool", None)
+    if tpool is None:
+        return
+    import threading
+    started = threading.Barrier(threads)
+    for _ in range(threads):
+        # Each task blocks until all have started, so each gets its own thread
+        tpool.submit(started.wait, 10)
+
+
+def post_worker_init(worker):
+    """Render a throwaway invoice in each worker before it accepts traffic."""
+    _start_request_threads(worker)
+    from src.warmup import warm_worker
+    warm_worker()
@@ -0,0 +1,229 @@
+"""
+Rendering benchmark suite for the invoice service.
+
+Drives the renderers directly with synthetic documents of increasing size:
+
+  - create_generic_invoice / create_generic_receipt with 1, 10, 100 and 1,000 line items
+  - generate_credit_note rendered through create_generic_invoice
+  - the /set-list renderer with 10, 50, 100 and 500 songs
+
+For every case it records p50/p95/p99 latency, CPU time per render, peak RSS
+and PDF size. Each case runs in its own fresh process so peak RSS is
+attributable to that case, and invoice tasks bypass the PDF cache so every
+iteration is a real render.
+
+Usage (from the invoice/ directory):
+    python scripts/benchmark.py --save-baseline benchmark_baseline.json
+    python scripts/benchmark.py --compare benchmark_baseline.json [--threshold 0.10]
+
+--compare exits with status 1 if any case regressed by more than the
+threshold on p50/p95 latency, CPU time, peak RSS or PDF size.
+"""
+
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LINE_ITEM_SIZES = [1, 10, 100, 1000]
+SET_LIST_SIZES = [10, 50, 100, 500]
+
+# Metrics compared against the baseline (all lower-is-better)
+COMPARED_METRICS = ["p50_seconds", "p95_seconds", "cpu_seconds_mean", "peak_rss_bytes", "pdf_bytes"]
+
+
+def _cases() -> list[tuple[str, str, int]]:
+    """Return (case name, kind, size) for every benchmark case."""
+    cases = []
+    for size in LINE_ITEM_SIZES:
+        cases.append((f"invoice-{size}-items", "invoice", size))
+        cases.append((f"receipt-{size}-items", "receipt", size))
+    cases.append(("credit-note", "credit_note", 1))
+    for size in SET_LIST_SIZES:
+        cases.append((f"set-list-{size}-songs", "set_list", size))
+    return cases
+
+
+def _build_task(kind: str, size: int):
+    """Build a synthetic render task (imports happen inside the case process)."""
+    from src.batch import RenderTask
+    from src.ev_config import EV_CONFIG
+    from src.invoice import Line_item
+    from src.invoice_ev import EVInvoiceOptions, generate_credit_note, generate_ev_invoice, generate_receipt
+    from src.set_list import SetListTask
+
+    if kind == "set_list":
+        per_section = max(1, size // 5)
+        sections = [
+            {
+                "name": f"Set {s + 1}",
+                "songs": [
+                    {
+                        "title": f"Song {s * per_section + n + 1}",
+                        "artist": "Benchmark Artist",
+                        "key": "Am",
+                        "key_change": "C" if n % 7 == 0 else None,
+                        "vocal_type": "Lead",
+                        "is_must_play": n % 5 == 0,
+                    }
+                    for n in range(min(per_section, size - s * per_section))
+                ],
+            }
+            for s in range(math.ceil(size / per_section))
+        ]
+        return SetListTask("Benchmark Client", "2026-06-15", "Grand Hotel", sections, "set-list.pdf", use_cache=False)
+
+    if kind == "credit_note":
+        note = generate_credit_note(
+            customer_name="Benchmark Client", date="2026-06-15", amount=250.0,
+            description="Refund", reference="CN-BENCH", event_date="2026-06-15", venue="Grand Hotel",
+        )
+        return RenderTask(note, EV_CONFIG, "credit-note.pdf", {"use_cache": False})
+
+    options = EVInvoiceOptions(
+        customer_name="Benchmark Client",
+        event_date="2026-06-15",
+        venue="Grand Hotel",
+        invoice_number="BENCH-1",
+        line_items=[Line_item(description=f"Service {n + 1}", price=100.0 + n) for n in range(size)],
+        discount_percent=10.0,
+        travel_cost=50.0,
+        payment_made=[Line_item(description="Deposit paid", price=200.0)],
+        additional_charges=[Line_item(description="Late finish", price=125.0)],
+    )
+    if kind == "receipt":
+        return RenderTask(generate_receipt(options), EV_CONFIG, "receipt.pdf", {"use_cache": False})
+    return RenderTask(generate_ev_invoice(options), EV_CONFIG, "invoice.pdf", {"use_cache": False})
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def _run_case(kind: str, size: int, iterations: int, warmup: int) -> dict:
+    """Run one case in the current (fresh) process and return its measurements."""
+    os.chdir(APP_ROOT)
+    sys.path.insert(0, APP_ROOT)
+    task = _build_task(kind, size)
+
+    for _ in range(warmup):
+        task.render()
+
+    latencies = []
+    cpu_times = []
+    pdf_size = 0
+    for _ in range(iterations):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        pdf_bytes = task.render()
+        cpu_times.append(time.process_time() - cpu_start)
+        latencies.append(time.perf_counter() - wall_start)
+        pdf_size = len(pdf_bytes)
+
+    latencies.sort()
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        peak_rss *= 1024
+    return {
+        "kind": kind,
+        "size": size,
+        "iterations": iterations,
+        "p50_seconds": round(_percentile(latencies, 50), 5),
+        "p95_seconds": round(_percentile(latencies, 95), 5),
+        "p99_seconds": round(_percentile(latencies, 99), 5),
+        "cpu_seconds_mean": round(sum(cpu_times) / len(cpu_times), 5),
+        "peak_rss_bytes": peak_rss,
+        "pdf_bytes": pdf_size,
+    }
+
+
+def run_benchmarks(iterations: int, warmup: int, only: str = None) -> dict:
+    """Run every case, each in a fresh spawned process."""
+    results = {}
+    context = multiprocessing.get_context("spawn")
+    for name, kind, size in _cases():
+        if only and only not in name:
+            continue
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+            results[name] = pool.submit(_run_case, kind, size, iterations, warmup).result()
+        print(f"{name}: p50 {results[name]['p50_seconds']}s, "
+              f"p95 {results[name]['p95_seconds']}s, {results[name]['pdf_bytes']} bytes",
+              file=sys.stderr)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list[dict]:
+    """Return one entry per metric that regressed by more than threshold."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get("cases", {}).get(name)
+        if previous is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if change > threshold:
+                regressions.append({
+                    "case": name,
+                    "metric": metric,
+                    "baseline": old,
+                    "current": new,
+                    "change": round(change, 4),
+                })
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark invoice and set list rendering.")
+    parser.add_argument("--iterations", type=int, default=10, help="Measured renders per case")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured renders per case")
+    parser.add_argument("--only", help="Only run cases whose name contains this string")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write results as a baseline JSON file")
+    parser.add_argument("--compare", metavar="FILE", help="Compare results against a baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative increase treated as a regression (default 0.10)")
+    parser.add_argument("--profile", help="PDF output profile to render with (default: PDF_PROFILE or standard)")
+    args = parser.parse_args()
+    if args.profile:
+        # Read by src.pdf_profiles when each (spawned) case process imports it
+        os.environ["PDF_PROFILE"] = args.profile
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "profile": os.getenv("PDF_PROFILE", "standard"),
+        "cases": run_benchmarks(max(1, args.iterations), max(0, args.warmup), args.only),
+    }
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        report["regressions"] = compare(report["cases"], baseline, args.threshold)
+        if report["regressions"]:
+            exit_code = 1
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            f.write(output + "\n")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
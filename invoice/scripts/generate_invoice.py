@@ -1,78 +1,106 @@
 """
-Generic invoice generation example script.
-Demonstrates how to use the generic invoice library with custom business data.
+Render invoices in bulk from a CSV or JSONL file.
+
 Business details are loaded from environment variables (see .env.example).
-Update the INVOICE DETAILS section below for each invoice you generate.
+Each invoice is rendered in a process pool and written to output/ as
+invoice-<invoice_number>.pdf, next to an invoice-<invoice_number>.pdf.sha256
+file holding a hash of everything that went into it (the invoice, business
+details, profile, template, stylesheet and logo). Invoices whose hash matches
+are skipped, and files are written atomically, so an interrupted run can
+simply be started again.
+
+Usage (from the invoice/ directory):
+    python scripts/generate_invoice.py invoices.jsonl
+    python scripts/generate_invoice.py invoices-2025.csv --workers 8 --profile email
+    python scripts/generate_invoice.py invoices.jsonl --force   # re-render everything
+
+JSONL: one invoice per line:
+    {"customer_name": "TMD Music Ltd", "invoice_number": "TMD-26-1",
+     "title": "Consulting", "invoice_date": "31/03/2025",
+     "line_items": [{"description": "16/12/24 - 1h", "price": 35.0}],
+     "discount_percent": 10, "custom_charge": 100,
+     "payment_made": [{"description": "Deposit paid", "price": 50}],
+     "deposit_percentage": 20, "show_deposit": true, "deposit_only": false,
+     "amount_due_override": null, "profile": "print"}
+
+CSV: one line item per row; rows with the same invoice_number make up one
+invoice. Columns: invoice_number, customer_name, title, description, price
+and optionally invoice_date, discount_percent, custom_charge, payment_made
+(an amount received), deposit_percentage, show_deposit, deposit_only,
+amount_due_override and profile, taken from the invoice's first row.
+
+Invoices without an invoice_date are dated the day they are first rendered;
+later runs keep that PDF rather than re-dating it. Ctrl-C stops after the
+invoices in progress; run again to carry on. Exits with status 1 if any
+invoice failed and 130 if interrupted.
 """
 
-from src.config import BusinessConfig, Address
-from src.generic_invoice import create_generic_invoice, create_generic_receipt
-from src.invoice import Line_item, Invoice, Receipt, Section
-from src.utils import calculate_amount_due
+import argparse
+import csv
+import hashlib
+import json
+import multiprocessing
 import os
-import sys
+import re
+import signal
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Iterator, Optional
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Before the src imports; pool processes re-import this module too
+sys.path.insert(0, APP_ROOT)
+
 from dotenv import load_dotenv
 
+from src.assets import STYLESHEET_PATH, asset_digest
+from src.config import Address, BusinessConfig
+from src.generic_invoice import create_generic_invoice
+from src.invoice import Invoice, Line_item, Section
+from src.pdf_profiles import DEFAULT_PDF_PROFILE, PDF_PROFILES
+from src.schema import Field, Schema, ValidationError
+from src.templates import INVOICE_TEMPLATE, get_template
+from src.totals import generic_invoice_totals
+
 # Load .env file if present
 load_dotenv()
 
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+OUTPUT_DIR = os.path.join(APP_ROOT, "output")
 
+# Bump when the way records become PDFs changes, to invalidate earlier outputs
+HASH_VERSION = 1
 
-# ============================================================================
-# BUSINESS CONFIGURATION - loaded from environment variables
-# Set these in your .env file (copy from .env.example)
-# ============================================================================
-
-BUSINESS_NAME = os.getenv("BUSINESS_NAME", "")
-ADDRESS_LINE_1 = os.getenv("BUSINESS_ADDRESS_LINE1", "")
-ADDRESS_LINE_2 = os.getenv("BUSINESS_ADDRESS_LINE2", "")
-ADDRESS_LINE_3 = os.getenv("BUSINESS_ADDRESS_LINE3", "")
-PHONE_NUMBER = os.getenv("BUSINESS_PHONE", "")
-EMAIL_ADDRESS = os.getenv("BUSINESS_EMAIL", "")
-ACCOUNT_NUMBER = os.getenv("BUSINESS_ACCOUNT_NUMBER", "")
-SORT_CODE = os.getenv("BUSINESS_SORT_CODE", "")
-LOGO_PATH = os.getenv("BUSINESS_LOGO_PATH", None)
-DEPOSIT_PERCENTAGE = None
-
+# Read once: os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
 
-# ============================================================================
-# INVOICE DETAILS - Update these for each invoice
-# ============================================================================
+_TRUE = {"1", "true", "yes", "y"}
+_FALSE = {"0", "false", "no", "n"}
 
-CUSTOMER_NAME = "TMD Music Ltd"
-INVOICE_NUMBER = "TMD-26-1"
-INVOICE_TITLE = "Airtable Automation Consulting Services"
-
-# Line items - add/remove as needed
-LINE_ITEMS = [
-    Line_item(description="16/12/24 - 1h", price=35.0),
-    Line_item(description="3/03/25 - 2h", price=70.0),
-    Line_item(description="11/03/25 - 2h20", price=81.67),
-    Line_item(description="17/03/25 - 2h", price=70.0),
-    Line_item(description="18/03/25 - 3h", price=105.0),
-    Line_item(description="19/03/25 - 2h", price=70.0),
-    Line_item(description="25/03/25 - 4h", price=140.0),
-    Line_item(description="10/04/25 - 1h", price=35.0),
-    Line_item(description="12/04/25 - 1h", price=35.0),
-    Line_item(description="24/04/25 - 1h 30m", price=52.50),
-    Line_item(description="27/10/25 - 1h", price=35.0),
-]
-
-DISCOUNT_PERCENT = None  # e.g., 10.0 for 10% discount, or None for no discount
-CUSTOM_CHARGE = None     # e.g., 100.0 for additional charge, or None
-# e.g., [Line_item(description="Deposit paid", price=500.0)]
-PAYMENT_MADE = None
-
-DEPOSIT_ONLY = False        # If True, amount due is only the deposit
-AMOUNT_DUE_OVERRIDE = None  # e.g., 1000.0 to override calculated amount, or None
-SHOW_DEPOSIT = False        # Whether to show deposit line in invoice
 
+def business_config_from_env() -> BusinessConfig:
+    """Build the issuer's BusinessConfig from BUSINESS_* environment variables."""
+    return BusinessConfig(
+        business_name=os.getenv("BUSINESS_NAME", ""),
+        address=Address(
+            line_1=os.getenv("BUSINESS_ADDRESS_LINE1", ""),
+            line_2=os.getenv("BUSINESS_ADDRESS_LINE2", ""),
+            line_3=os.getenv("BUSINESS_ADDRESS_LINE3", ""),
+        ),
+        phone_number=os.getenv("BUSINESS_PHONE", ""),
+        email_address=os.getenv("BUSINESS_EMAIL", ""),
+        account_number=os.getenv("BUSINESS_ACCOUNT_NUMBER", ""),
+        sort_code=os.getenv("BUSINESS_SORT_CODE", ""),
+        logo_path=os.getenv("BUSINESS_LOGO_PATH", None),
+        deposit_percentage=None,
+    )
 
-# ============================================================================
-# MAIN SCRIPT - No changes needed below
-# ============================================================================
 
 def build_invoice(
     customer_name: str,
@@ -88,121 +116,427 @@ def build_invoice(
     show_deposit=True
 ) -> Invoice:
     """Build an invoice object."""
-    subtotal = sum(item.price for item in line_items)
-    summary_items = [{"description": "Subtotal", "price": subtotal}]
+    if not show_deposit:
+        # A hidden deposit is not asked for either
+        deposit_percentage = None
+    totals = generic_invoice_totals(
+        line_items,
+        discount_percent=discount_percent,
+        custom_charge=custom_charge,
+        payment_made=payment_made,
+        deposit_percentage=deposit_percentage,
+        deposit_only=deposit_only,
+        amount_due_override=amount_due_override,
+    )
+    summary_items = [Line_item(description="Subtotal", price=totals.subtotal)]
 
     # Discount
-    discount_amount = 0.0
     if discount_percent is not None and discount_percent > 0:
-        discount_amount = round(subtotal * (discount_percent / 100), 2)
-        summary_items.append({
-            "description": f"Discount ({discount_percent}%)",
-            "price": -discount_amount
-        })
+        summary_items.append(Line_item(
+            description=f"Discount ({discount_percent}%)",
+            price=-totals.discount,
+        ))
 
     # Custom charge
-    custom_charge_total = 0.0
-    if custom_charge is not None and custom_charge > 0:
-        summary_items.append({
-            "description": "Additional Charge",
-            "price": custom_charge
-        })
-        custom_charge_total = custom_charge
+    if totals.charges:
+        summary_items.append(Line_item(
+            description="Additional Charge",
+            price=totals.charges,
+        ))
 
     # Total
-    total = subtotal - discount_amount + custom_charge_total
-    summary_items.append({
-        "description": "Total",
-        "price": total,
-        "bold": True
-    })
+    summary_items.append(Line_item(
+        description="Total",
+        price=totals.total,
+        bold=True,
+    ))
 
     # Deposit
-    if show_deposit and deposit_percentage is not None:
-        deposit = round(total * (deposit_percentage / 100), 2)
-        summary_items.append({
-            "description": f"Deposit ({deposit_percentage}%)",
-            "price": deposit
-        })
-    else:
-        deposit = 0.0
+    if deposit_percentage is not None:
+        summary_items.append(Line_item(
+            description=f"Deposit ({deposit_percentage}%)",
+            price=totals.deposit,
+        ))
 
     # Payment made
     if payment_made:
         for payment in payment_made:
-            summary_items.append({
-                "description": payment.description,
-                "price": -abs(payment.price),
-                "bold": getattr(payment, 'bold', False)
-            })
-
-    # Amount due
-    # additional charges to add to deposit if in deposit_only mode
-    custom_charge_total_for_calc = custom_charge_total
-    payment_total = sum(
-        item.price for item in payment_made) if payment_made else 0.0
-    amount_due = calculate_amount_due(
-        deposit=deposit,
-        charges_total=custom_charge_total_for_calc,
-        payment_total=payment_total,
-        full_balance_total=total,
-        deposit_only=deposit_only,
-        amount_due_override=amount_due_override,
-    )
+            summary_items.append(Line_item(
+                description=payment.description,
+                price=-abs(payment.price),
+                bold=payment.bold,
+            ))
 
-    amount_due_section = [{
-        "description": "Amount Due",
-        "price": amount_due,
-        "bold": True
-    }]
+    amount_due_section = [Line_item(
+        description="Amount Due",
+        price=totals.amount_due,
+        bold=True,
+    )]
 
     return Invoice(
         customer_name=customer_name,
         invoice_number=invoice_number,
         title=title,
         sections=[
-            Section(heading="Items", rows=[vars(item) for item in line_items]),
+            Section(heading="Items", rows=tuple(line_items)),
             Section(heading="Summary", rows=summary_items),
             Section(heading="Totals", rows=amount_due_section)
         ]
     )
 
 
-# Create business config
-business_config = BusinessConfig(
-    business_name=BUSINESS_NAME,
-    address=Address(
-        line_1=ADDRESS_LINE_1,
-        line_2=ADDRESS_LINE_2,
-        line_3=ADDRESS_LINE_3,
-    ),
-    phone_number=PHONE_NUMBER,
-    email_address=EMAIL_ADDRESS,
-    account_number=ACCOUNT_NUMBER,
-    sort_code=SORT_CODE,
-    logo_path=LOGO_PATH,
-    deposit_percentage=DEPOSIT_PERCENTAGE
+# ============================================================================
+# Input records
+# ============================================================================
+
+def _line_item_schema(required: str, invalid: str) -> Schema:
+    return Schema(
+        Field("description", required=required),
+        Field("price", kind="number", blank_is_missing=False, required="price is required", invalid=invalid),
+        Field("bold", default=False, blank_is_missing=False),
+    )
+
+
+RECORD_SCHEMA = Schema(
+    Field("customer_name", required="customer_name is required"),
+    Field("invoice_number", required="invoice_number is required", convert=str),
+    Field("title", default=""),
+    Field("invoice_date"),
+    Field("line_items", kind="list", required="At least one line item is required",
+          invalid="line_items must be a list",
+          each=_line_item_schema("Line item description is required", "Line item price must be a number")),
+    Field("discount_percent", kind="number", invalid="discount_percent must be a number"),
+    Field("custom_charge", kind="number", invalid="custom_charge must be a number"),
+    Field("payment_made", kind="list", default=[], invalid="payment_made must be a list",
+          each=_line_item_schema("Payment description is required", "Payment amount must be a number")),
+    Field("deposit_percentage", kind="number", invalid="deposit_percentage must be a number"),
+    Field("show_deposit", default=False, blank_is_missing=False),
+    Field("deposit_only", default=False, blank_is_missing=False),
+    Field("amount_due_override", kind="number", blank_is_missing=False,
+          invalid="amount_due_override must be a number"),
+    # isinstance first: a list or object is unhashable and can't be looked up
+    Field("profile", check=lambda name: isinstance(name, str) and name in PDF_PROFILES,
+          check_message="profile must be one of: " + ", ".join(PDF_PROFILES)),
 )
 
-# Generate invoice
-invoice = build_invoice(
-    customer_name=CUSTOMER_NAME,
-    invoice_number=INVOICE_NUMBER,
-    title=INVOICE_TITLE,
-    line_items=LINE_ITEMS,
-    discount_percent=DISCOUNT_PERCENT,
-    custom_charge=CUSTOM_CHARGE,
-    payment_made=PAYMENT_MADE,
-    deposit_percentage=DEPOSIT_PERCENTAGE,
-    deposit_only=DEPOSIT_ONLY,
-    amount_due_override=AMOUNT_DUE_OVERRIDE,
-    show_deposit=SHOW_DEPOSIT
+# Invoice-level CSV columns (everything but the line item's own columns)
+_CSV_BOOLEANS = ("show_deposit", "deposit_only")
+_CSV_INVOICE_COLUMNS = (
+    "customer_name", "title", "invoice_date", "discount_percent", "custom_charge",
+    "deposit_percentage", "amount_due_override", "profile", *_CSV_BOOLEANS,
 )
 
-# Create PDF
-create_generic_invoice(invoice, business_config)
-print(f"✓ Invoice {INVOICE_NUMBER} generated successfully!")
 
-# Open output folder (macOS only)
-if sys.platform == "darwin":
-    subprocess.run(["open", "output"])
+def _csv_bool(value: str, column: str):
+    """Parse a CSV true/false column; raises ValueError for anything else."""
+    lowered = value.strip().lower()
+    if lowered in _TRUE:
+        return True
+    if lowered in _FALSE:
+        return False
+    raise ValueError(f"{column} must be true or false")
+
+
+def read_jsonl(path: str) -> Iterator[tuple[str, object]]:
+    """Yield (location, record) for each non-blank line of a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            location = f"{path}:{line_number}"
+            try:
+                yield location, json.loads(line)
+            except ValueError as e:
+                yield location, ValueError(f"invalid JSON: {str(e)}")
+
+
+def read_csv(path: str) -> Iterator[tuple[str, object]]:
+    """Yield (location, record) for each invoice in a CSV file, grouping rows by invoice_number."""
+    records: dict[str, tuple[str, dict]] = {}
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        # Row 1 is the header
+        for line_number, row in enumerate(csv.DictReader(f), start=2):
+            number = (row.get("invoice_number") or "").strip()
+            location = f"{path}:{line_number}"
+            if not number:
+                yield location, ValueError("invoice_number is required")
+                continue
+            if number not in records:
+                record = {"invoice_number": number, "line_items": [], "payment_made": []}
+                try:
+                    for column in _CSV_INVOICE_COLUMNS:
+                        value = (row.get(column) or "").strip()
+                        # Blank cells fall back to the schema defaults
+                        if value:
+                            record[column] = _csv_bool(value, column) if column in _CSV_BOOLEANS else value
+                except ValueError as e:
+                    yield location, e
+                    continue
+                records[number] = (location, record)
+            record = records[number][1]
+            if (row.get("description") or "").strip() or (row.get("price") or "").strip():
+                record["line_items"].append({"description": row.get("description"), "price": row.get("price")})
+            payment = (row.get("payment_made") or "").strip()
+            if payment:
+                record["payment_made"].append({"description": "Payment received", "price": payment})
+    yield from records.values()
+
+
+@dataclass
+class Job:
+    """One validated invoice to render, and where to write it."""
+    location: str
+    values: dict
+    path: str
+    input_hash: str
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+
+def _input_hash(values: dict, business_config: BusinessConfig, profile: str, assets: list) -> str:
+    """Hash everything that affects the rendered PDF."""
+    payload = [HASH_VERSION, values, asdict(business_config), profile, assets]
+    return hashlib.sha256(
+        json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str).encode()
+    ).hexdigest()
+
+
+def _output_path(output_dir: str, invoice_number: str) -> str:
+    safe_number = re.sub(r"[^\w\-]", "-", invoice_number)
+    return os.path.join(output_dir, f"invoice-{safe_number}.pdf")
+
+
+def _read_hash(path: str) -> Optional[str]:
+    try:
+        with open(f"{path}.sha256", encoding="ascii") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file so an interrupted run never leaves it half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".", suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; give it the mode open() would
+        os.fchmod(fd, 0o666 & ~_UMASK)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+# ============================================================================
+# Rendering (runs in the pool processes)
+# ============================================================================
+
+_business_config: Optional[BusinessConfig] = None
+
+
+def _init_worker(business_config: BusinessConfig) -> None:
+    global _business_config
+    _business_config = business_config
+    # Ctrl-C goes to the whole process group; the parent decides when to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def render_job(job: Job) -> tuple[int, float]:
+    """Render one invoice and write it and its hash. Returns (PDF bytes, seconds)."""
+    start = time.perf_counter()
+    values = job.values
+    invoice = build_invoice(
+        customer_name=values["customer_name"],
+        invoice_number=values["invoice_number"],
+        title=values["title"],
+        line_items=[Line_item(**item) for item in values["line_items"]],
+        discount_percent=values["discount_percent"],
+        custom_charge=values["custom_charge"],
+        payment_made=[Line_item(**item) for item in values["payment_made"]],
+        deposit_percentage=values["deposit_percentage"],
+        deposit_only=values["deposit_only"],
+        amount_due_override=values["amount_due_override"],
+        show_deposit=values["show_deposit"],
+    )
+    pdf_bytes = create_generic_invoice(
+        invoice,
+        _business_config,
+        return_bytes=True,
+        invoice_date=values["invoice_date"],
+        use_cache=False,
+        profile=values["profile"],
+    )
+    # PDF first: if interrupted in between, the stale hash forces a re-render
+    _write_atomic(job.path, pdf_bytes)
+    _write_atomic(f"{job.path}.sha256", f"{job.input_hash}\n".encode("ascii"))
+    return len(pdf_bytes), time.perf_counter() - start
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def plan_jobs(
+    inputs: list[str],
+    input_format: Optional[str],
+    output_dir: str,
+    business_config: BusinessConfig,
+    profile: str,
+    force: bool,
+) -> tuple[list[Job], int, list[str]]:
+    """
+    Validate every input record. Returns (jobs to render, unchanged count,
+    one error per invalid record).
+    """
+    assets = [
+        asset_digest(get_template(INVOICE_TEMPLATE).filename),
+        asset_digest(STYLESHEET_PATH),
+        asset_digest(business_config.logo_path) if business_config.logo_path else None,
+    ]
+    today = datetime.today().strftime('%d/%m/%Y')
+
+    jobs, unchanged, errors = [], 0, []
+    seen: dict[str, str] = {}
+    for path in inputs:
+        kind = input_format or ("csv" if path.lower().endswith(".csv") else "jsonl")
+        reader = read_csv if kind == "csv" else read_jsonl
+        for location, record in reader(path):
+            if isinstance(record, Exception):
+                errors.append(f"{location}: {str(record)}")
+                continue
+            try:
+                values = RECORD_SCHEMA.validate(record)
+            except ValidationError as e:
+                errors.append(f"{location}: " + "; ".join(
+                    f"{error['field']}: {error['message']}" for error in e.errors))
+                continue
+            values["profile"] = values["profile"] or profile
+
+            output_path = _output_path(output_dir, values["invoice_number"])
+            if output_path in seen:
+                errors.append(f"{location}: {os.path.basename(output_path)} is also produced by {seen[output_path]}")
+                continue
+            seen[output_path] = location
+
+            # Hashed before the date is defaulted, so a rerun on a later day
+            # doesn't re-render (and re-date) invoices that didn't give one
+            input_hash = _input_hash(values, business_config, values["profile"], assets)
+            if not force and os.path.exists(output_path) and _read_hash(output_path) == input_hash:
+                unchanged += 1
+                continue
+            values["invoice_date"] = values["invoice_date"] or today
+            jobs.append(Job(location, values, output_path, input_hash))
+    return jobs, unchanged, errors
+
+
+def render_jobs(
+    jobs: list[Job], business_config: BusinessConfig, workers: int,
+) -> tuple[int, int, list[str], bool]:
+    """
+    Render jobs across a process pool, keeping at most two per worker in
+    flight. The first Ctrl-C stops submitting and lets those finish; a second
+    one kills the run (finished files are intact either way).
+    Returns (rendered, bytes written, errors, interrupted).
+    """
+    rendered, written, errors = 0, 0, []
+    stop = threading.Event()
+
+    def request_stop(signum, frame):
+        stop.set()
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        print("Stopping after the invoices in progress (Ctrl-C again to abort)", file=sys.stderr)
+
+    previous_handler = signal.signal(signal.SIGINT, request_stop)
+    pending = iter(jobs)
+    try:
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(business_config,),
+        ) as executor:
+            in_flight = {}
+            while True:
+                while not stop.is_set() and len(in_flight) < workers * 2:
+                    job = next(pending, None)
+                    if job is None:
+                        break
+                    in_flight[executor.submit(render_job, job)] = job
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    job = in_flight.pop(future)
+                    try:
+                        size, seconds = future.result()
+                    except Exception as e:
+                        errors.append(f"{job.location}: {job.filename}: {str(e)}")
+                        print(f"✗ {job.filename}: {str(e)}", file=sys.stderr)
+                        continue
+                    rendered += 1
+                    written += size
+                    print(f"✓ {job.filename} ({size / 1024:.0f} KB, {seconds:.2f}s)")
+    finally:
+        signal.signal(signal.SIGINT, previous_handler)
+    return rendered, written, errors, stop.is_set()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("inputs", nargs="+", metavar="FILE", help="CSV or JSONL files of invoices")
+    parser.add_argument("--format", choices=["csv", "jsonl"],
+                        help="Input format (default: from each file's extension)")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR, help="Where to write PDFs (default: output/)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Render processes")
+    parser.add_argument("--profile", choices=sorted(PDF_PROFILES), default=DEFAULT_PDF_PROFILE,
+                        help="PDF output profile for invoices that don't name one")
+    parser.add_argument("--force", action="store_true", help="Re-render invoices even if unchanged")
+    parser.add_argument("--open", action="store_true", help="Open the output folder when done (macOS)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    business_config = business_config_from_env()
+    output_dir = os.path.abspath(args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs, unchanged, errors = plan_jobs(
+        args.inputs, args.format, output_dir, business_config, args.profile, args.force)
+    for error in errors:
+        print(f"✗ {error}", file=sys.stderr)
+
+    rendered, written, interrupted = 0, 0, False
+    if jobs:
+        workers = max(1, min(args.workers, len(jobs)))
+        print(f"Rendering {len(jobs)} invoices with {workers} workers ({unchanged} unchanged)")
+        render_start = time.perf_counter()
+        rendered, written, render_errors, interrupted = render_jobs(jobs, business_config, workers)
+        errors.extend(render_errors)
+        render_seconds = time.perf_counter() - render_start
+    else:
+        render_seconds = 0.0
+
+    elapsed = time.perf_counter() - start
+    rate = rendered / render_seconds if render_seconds else 0.0
+    print(
+        f"{'Interrupted: ' if interrupted else ''}"
+        f"{rendered} rendered, {unchanged} unchanged, {len(errors)} failed in {elapsed:.1f}s "
+        f"({rate:.1f} invoices/s, {written / (1024 * 1024):.1f} MB written to {output_dir})"
+    )
+
+    if args.open and sys.platform == "darwin":
+        subprocess.run(["open", output_dir])
+    if interrupted:
+        return 130
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""
+Startup and cold-path timing harness for the invoice service.
+
+Measures how long the service takes to become useful and prints the results
+as JSON so they can be compared across changes:
+
+  - per-module import time for app.py and its dependencies (python -X importtime)
+  - time from process start to the first /health and /ready responses
+  - first versus steady-state latency for each PDF route
+
+Usage (from the invoice/ directory):
+    python scripts/startup_timing.py [--server gunicorn|flask] [--requests N] [--output FILE]
+
+Each run uses a fresh, temporary cache directory so the PDF cache and
+template bytecode cache start cold, and every request uses a unique invoice
+number so steady-state numbers measure real renders rather than cache hits.
+"""
+
+import argparse
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose cumulative import time is always reported
+TRACKED_MODULES = [
+    "app", "flask", "werkzeug", "jinja2", "weasyprint", "yaml", "dotenv",
+    "src.invoice", "src.generic_invoice", "src.invoice_ev", "src.services",
+]
+
+STARTUP_TIMEOUT_SECONDS = 60
+
+
+def _invoice_payload(i: int) -> dict:
+    return {
+        "customer_name": "Timing Harness",
+        "event_date": "2026-06-15",
+        "venue": "Grand Hotel",
+        "invoice_number": f"TIMING-{i}",
+        "preset_ids": ["band_5pc", "dj_only"],
+        "custom_items": [{"description": "Custom service", "price": 150.0}],
+        "discount_percent": 10,
+        "travel_cost": 50.0,
+    }
+
+
+def _credit_note_payload(i: int) -> dict:
+    return {
+        "customer_name": "Timing Harness",
+        "date": "2026-06-15",
+        "amount": 100.0,
+        "reference": f"CN-TIMING-{i}",
+    }
+
+
+def _generic_payload(i: int) -> dict:
+    return {
+        "business_name": "Timing Harness Ltd",
+        "address_line_1": "1 Example Street",
+        "phone_number": "07700000000",
+        "email_address": "timing@example.com",
+        "account_number": "12345678",
+        "sort_code": "00-00-00",
+        "customer_name": "Timing Harness",
+        "invoice_number": f"GEN-TIMING-{i}",
+        "title": "Timing run",
+        "line_items": [{"description": "Item", "price": 10.0}],
+    }
+
+
+def _set_list_payload(i: int) -> dict:
+    return {
+        "client_name": f"Timing Harness {i}",
+        "event_date": "2026-06-15",
+        "venue": "Grand Hotel",
+        "sections": [{
+            "name": "First Dance",
+            "songs": [{"title": f"Song {n}", "artist": "Artist", "key": "C"} for n in range(20)],
+        }],
+    }
+
+
+ROUTE_PAYLOADS = {
+    "/generate": _invoice_payload,
+    "/generate-receipt": _invoice_payload,
+    "/generate-credit-note": _credit_note_payload,
+    "/generate-generic": _generic_payload,
+    "/set-list": _set_list_payload,
+}
+
+
+def measure_imports() -> dict:
+    """Import app.py in a fresh interpreter with -X importtime and parse the report."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        cwd=APP_ROOT,
+        env=_server_env(tempfile.mkdtemp(prefix="invoice-timing-")),
+        capture_output=True,
+        text=True,
+    )
+    wall_seconds = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing app failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like: "import time:       123 |       4567 |   weasyprint"
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        fields = line[len("import time:"):].split("|")
+        if len(fields) != 3:
+            continue
+        # Leading spaces on the name only indicate nesting depth
+        name = fields[2].strip()
+        cumulative[name] = max(cumulative.get(name, 0), int(fields[1]))
+
+    top_level = {
+        name: us for name, us in cumulative.items() if "." not in name
+    }
+    return {
+        "interpreter_wall_seconds": round(wall_seconds, 4),
+        "tracked_modules_seconds": {
+            name: round(cumulative[name] / 1e6, 4)
+            for name in TRACKED_MODULES if name in cumulative
+        },
+        "slowest_top_level_modules_seconds": {
+            name: round(us / 1e6, 4)
+            for name, us in sorted(top_level.items(), key=lambda kv: kv[1], reverse=True)[:15]
+        },
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _server_env(cache_dir: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        # Every cache and database the app writes, so runs start cold and
+        # never touch (or read warm state from) the real cache/ directory
+        "TEMPLATE_CACHE_DIR": os.path.join(cache_dir, "jinja"),
+        "LOGO_CACHE_DIR": os.path.join(cache_dir, "logos"),
+        "PDF_STORE_PATH": os.path.join(cache_dir, "pdf_store.sqlite3"),
+        "JOBS_DB_PATH": os.path.join(cache_dir, "jobs.sqlite3"),
+        "METRICS_DB_PATH": os.path.join(cache_dir, "metrics.sqlite3"),
+        # Allow /generate-generic without a key and keep the keep-alive thread idle
+        "INVOICE_API_KEY": "",
+        "RENDER_EXTERNAL_URL": "",
+    })
+    return env
+
+
+def _request(url: str, payload: dict = None) -> tuple[int, int]:
+    """Send a GET (or POST with a JSON payload) and return (status, body size)."""
+    data = json.dumps(payload).encode("utf-8") if payload is not None else None
+    req = Request(url, data=data, headers={"Content-Type": "application/json"})
+    try:
+        with urlopen(req, timeout=STARTUP_TIMEOUT_SECONDS) as resp:
+            return resp.status, len(resp.read())
+    except HTTPError as e:
+        return e.code, len(e.read())
+
+
+def _wait_for(url: str, deadline: float) -> float:
+    """Poll url until it returns 200 and return the time that happened."""
+    while time.perf_counter() < deadline:
+        try:
+            if _request(url)[0] == 200:
+                return time.perf_counter()
+        except (URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    raise TimeoutError(f"{url} did not become available")
+
+
+def _server_command(server: str, port: int) -> list[str]:
+    if server == "gunicorn":
+        return [
+            sys.executable, "-m", "gunicorn", "app:app",
+            "-c", "gunicorn_config.py",
+            "--workers", "1",
+            "--bind", f"127.0.0.1:{port}",
+            "--access-logfile", "/dev/null",
+        ]
+    return [sys.executable, "app.py"]
+
+
+def measure_server(server: str, requests_per_route: int) -> dict:
+    """Start the service and time /health, /ready and each PDF route."""
+    port = _free_port()
+    cache_dir = tempfile.mkdtemp(prefix="invoice-timing-")
+    env = _server_env(cache_dir)
+    env["PORT"] = str(port)
+    base_url = f"http://127.0.0.1:{port}"
+
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        _server_command(server, port),
+        cwd=APP_ROOT,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        deadline = start + STARTUP_TIMEOUT_SECONDS
+        health_at = _wait_for(f"{base_url}/health", deadline)
+        ready_at = _wait_for(f"{base_url}/ready", deadline)
+
+        routes = {}
+        counter = 0
+        for route, make_payload in ROUTE_PAYLOADS.items():
+            latencies = []
+            sizes = []
+            for _ in range(requests_per_route):
+                counter += 1
+                t0 = time.perf_counter()
+                status, size = _request(f"{base_url}{route}", make_payload(counter))
+                latencies.append(time.perf_counter() - t0)
+                if status != 200:
+                    raise RuntimeError(f"{route} returned {status}")
+                sizes.append(size)
+            steady = latencies[1:] or latencies
+            routes[route] = {
+                "first_seconds": round(latencies[0], 4),
+                "steady_median_seconds": round(statistics.median(steady), 4),
+                "steady_max_seconds": round(max(steady), 4),
+                "pdf_bytes": sizes[-1],
+            }
+    finally:
+        proc.terminate()
+        try:
+            proc.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+    return {
+        "server": server,
+        "time_to_health_seconds": round(health_at - start, 4),
+        "time_to_ready_seconds": round(ready_at - start, 4),
+        "requests_per_route": requests_per_route,
+        "routes": routes,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn")
+    parser.add_argument("--requests", type=int, default=5,
+                        help="Requests per route (the first one is the cold request)")
+    parser.add_argument("--output", help="Write the JSON report to this file as well")
+    args = parser.parse_args()
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "imports": measure_imports(),
+        "startup": measure_server(args.server, max(1, args.requests)),
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
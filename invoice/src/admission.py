@@ -0,0 +1,214 @@
+"""Admission control for the PDF render routes.
+
+Each worker runs one render at a time and lets at most ADMISSION_MAX_QUEUE
+more wait for the slot. Beyond that, requests are turned away straight away
+with 503 and Retry-After instead of piling up until they time out.
+
+The slot is held only for the WeasyPrint work itself (render_slot() in
+pdf.py), once a request has passed authentication and validation and missed
+the PDF cache; only those renders feed the cost estimates. app.py marks which
+requests need a slot with start_admission().
+
+This relies on threaded gunicorn workers (gunicorn_config.py): each worker has
+a thread for the slot and each queue place plus a spare to send the 503, and
+stops accepting connections beyond that, so every request a worker holds is
+rendering, visible here as waiting, or being validated or turned away.
+
+A request is also rejected early when it cannot finish in time: its deadline
+is ADMISSION_DEADLINE_SECONDS after it reached the proxy (X-Request-Start,
+when the proxy sets it) or this worker, and its cost is estimated from recent
+renders of the same route plus the work queued ahead of it.
+"""
+
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Iterator, Optional
+
+from .metrics import record_rejection, track_admission_queue
+
+# Not configurable: renders share the worker's WeasyPrint FontConfiguration
+# (pdf.py), which is not thread-safe. Scale with gunicorn workers instead.
+ADMISSION_MAX_CONCURRENT = 1
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", 4))
+# Leave headroom under a 30s client timeout (gunicorn's timeout does not
+# bound requests in threaded workers)
+ADMISSION_DEADLINE_SECONDS = float(os.getenv("ADMISSION_DEADLINE_SECONDS", 25))
+
+# Weight of the newest render in each route's cost estimate
+_COST_SMOOTHING = 0.2
+
+
+class Rejected(Exception):
+    """A request was not admitted. reason is "queue_full" or "deadline"."""
+
+    def __init__(self, reason: str, message: str, retry_after: int):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """An admitted render; pass it back to release() when the request ends."""
+    route: str
+    admitted_at: float
+
+
+def request_start_time(header: Optional[str], now: float) -> Optional[float]:
+    """
+    Parse an X-Request-Start header ("t=<time>" or "<time>") into epoch seconds.
+    The time may be in seconds, milliseconds or microseconds; returns None if
+    the header is missing, malformed or in the future.
+    """
+    if not header:
+        return None
+    try:
+        value = float(header.strip().removeprefix("t="))
+    except ValueError:
+        return None
+    # Pick the unit that puts the timestamp nearest to now
+    for scale in (1, 1e3, 1e6):
+        start = value / scale
+        if abs(now - start) < 24 * 3600:
+            return start if start <= now else None
+    return None
+
+
+class AdmissionController:
+    """Per-worker render slots, a bounded wait queue and per-route cost estimates."""
+
+    def __init__(self, max_concurrent: int, max_queue: int, deadline_seconds: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.deadline_seconds = deadline_seconds
+        self._condition = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self._costs: dict[str, float] = {}
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "deadline": 0}
+
+    def estimated_cost(self, route: str) -> float:
+        """Recent render time for route in seconds (0 until one has been measured)."""
+        return self._costs.get(route, 0.0)
+
+    def _drain_seconds(self, route: str, renders: int) -> float:
+        # Time for the slots to work through this many renders
+        return math.ceil(max(0, renders) / self.max_concurrent) * self.estimated_cost(route)
+
+    def _reject(self, route: str, reason: str, message: str, retry_after: float) -> Rejected:
+        self.rejected[reason] += 1
+        record_rejection(route, reason)
+        return Rejected(reason, message, max(1, math.ceil(retry_after)))
+
+    def admit(self, route: str, started_at: Optional[float] = None) -> Ticket:
+        """
+        Wait for a render slot for route. started_at is when the request
+        entered the system (epoch seconds), if known. Raises Rejected if the
+        queue is full or the render cannot finish before the deadline.
+        """
+        now = time.time()
+        deadline = (started_at or now) + self.deadline_seconds
+        cost = self.estimated_cost(route)
+
+        with self._condition:
+            ahead = self._running + self._waiting
+            if ahead >= self.max_concurrent and self._waiting >= self.max_queue:
+                raise self._reject(
+                    route, "queue_full", "Server is busy, please retry shortly",
+                    self._drain_seconds(route, ahead))
+            # Renders that must finish before this one gets a slot
+            wait = self._drain_seconds(route, ahead - self.max_concurrent + 1)
+            # A route slower than the whole deadline still runs when a slot is
+            # free (rejecting it could not help, and its estimate must update)
+            if now + wait + cost > deadline and (wait > 0 or cost < self.deadline_seconds):
+                raise self._reject(
+                    route, "deadline", "Server is too busy to finish this request in time",
+                    self._drain_seconds(route, ahead))
+
+            if self._running >= self.max_concurrent:
+                self._waiting += 1
+                track_admission_queue(1)
+                try:
+                    # Give up once waiting any longer would leave too little time to render
+                    while self._running >= self.max_concurrent:
+                        remaining = deadline - cost - time.time()
+                        if remaining <= 0 or not self._condition.wait(remaining):
+                            if self._running >= self.max_concurrent:
+                                raise self._reject(
+                                    route, "deadline",
+                                    "Server is too busy to finish this request in time",
+                                    self._drain_seconds(route, self._running + self._waiting))
+                finally:
+                    self._waiting -= 1
+                    track_admission_queue(-1)
+
+            self._running += 1
+            self.admitted += 1
+        return Ticket(route, time.perf_counter())
+
+    def release(self, ticket: Ticket) -> None:
+        """Free the ticket's slot and fold its render time into the route's estimate."""
+        elapsed = time.perf_counter() - ticket.admitted_at
+        with self._condition:
+            previous = self._costs.get(ticket.route)
+            self._costs[ticket.route] = (
+                elapsed if previous is None
+                else previous + _COST_SMOOTHING * (elapsed - previous)
+            )
+            self._running -= 1
+            self._condition.notify()
+
+    def stats(self) -> dict:
+        """Return this worker's slot usage, queue depth, rejections and cost estimates."""
+        with self._condition:
+            return {
+                "running": self._running,
+                "queued": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "admitted": self.admitted,
+                "rejected": dict(self.rejected),
+                "estimated_cost_seconds": {route: round(cost, 3) for route, cost in self._costs.items()},
+            }
+
+
+admission = AdmissionController(ADMISSION_MAX_CONCURRENT, ADMISSION_MAX_QUEUE, ADMISSION_DEADLINE_SECONDS)
+
+# (route, started_at) of the current request, if its renders need a slot
+_pending: ContextVar[Optional[tuple[str, Optional[float]]]] = ContextVar("admission_request", default=None)
+
+
+def start_admission(route: str, started_at: Optional[float]) -> None:
+    """Make renders in the current request wait for a slot (see render_slot)."""
+    _pending.set((route, started_at))
+
+
+def finish_admission() -> None:
+    """Stop admitting renders for the current request."""
+    _pending.set(None)
+
+
+@contextmanager
+def render_slot() -> Iterator[None]:
+    """
+    Hold a render slot for the wrapped block, raising Rejected if it can't be
+    had in time. Outside a request that needs one (warm-up, pool processes,
+    scripts), or while the slot is already held, only runs the block.
+    """
+    pending = _pending.get()
+    if pending is None:
+        yield
+        return
+    ticket = admission.admit(*pending)
+    token = _pending.set(None)
+    try:
+        yield
+    finally:
+        _pending.reset(token)
+        admission.release(ticket)
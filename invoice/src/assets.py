@@ -0,0 +1,309 @@
+"""In-memory asset layer for PDF rendering.
+
+The logo, stylesheet and any fonts it references are read from disk once per
+worker and kept in memory, keyed by path and mtime. Templates reference them
+by plain ``file://`` URLs and WeasyPrint fetches them through ``fetch_asset``,
+so nothing is base64-encoded into the HTML and the files are only re-read
+when they change on disk.
+
+Rendered HTML can contain user-supplied text, so ``fetch_asset`` only reads
+local files that were registered through ``asset_url``/``stylesheet_url``
+(configured logos, the stylesheet and its fonts) and refuses every other
+``file://`` URL. The in-memory copies are bounded by ASSET_CACHE_MAX_BYTES.
+
+Logos are normalized once per source image: downscaled to the size they are
+displayed at for the target DPI, re-encoded (optimized PNG, or JPEG when the
+logo has no transparency) and stripped of metadata. The result is written to
+LOGO_CACHE_DIR keyed by the source's content hash, so every worker and later
+restarts reuse it and renders never embed a full-size upload. A logo that is
+already no larger than its displayed size, or that would not get smaller,
+is used as-is.
+"""
+
+import hashlib
+import io
+import logging
+import mimetypes
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from urllib.parse import unquote, urlsplit
+
+from PIL import Image, ImageOps
+
+from .config import BusinessConfig
+from .pdf_profiles import PDF_PROFILES
+
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STYLESHEET_PATH = os.path.join(APP_ROOT, "dejavu_sans.css")
+
+# Width of .logo in invoice_template.html, in CSS pixels (96 per inch)
+LOGO_CSS_WIDTH = 300
+LOGO_CACHE_DIR = os.getenv("LOGO_CACHE_DIR", os.path.join(APP_ROOT, "cache", "logos"))
+LOGO_JPEG_QUALITY = 90
+
+# Bytes of asset data kept in memory per worker (least recently used dropped first)
+ASSET_CACHE_MAX_BYTES = int(os.getenv("ASSET_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+# url(...) references in a stylesheet, e.g. @font-face sources
+_CSS_URL_RE = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+
+# Read once: os.umask() can only be queried by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+# path -> (mtime_ns, data, mime_type), least recently used first
+_assets: OrderedDict[str, tuple[int, bytes, str]] = OrderedDict()
+_asset_bytes = 0
+# path -> (mtime_ns, content digest)
+_digests: dict[str, tuple[int, str]] = {}
+# (source digest, width in px) -> path of the optimized logo
+_logos: dict[tuple[str, int], str] = {}
+# The only local files fetch_asset will serve
+_allowed_paths: set[str] = set()
+_lock = threading.Lock()
+
+
+def _cache_asset(path: str, entry: tuple[int, bytes, str]) -> None:
+    """Store an asset, evicting least recently used ones to stay under the byte cap (holds _lock)."""
+    global _asset_bytes
+    old = _assets.pop(path, None)
+    if old is not None:
+        _asset_bytes -= len(old[1])
+    if len(entry[1]) > ASSET_CACHE_MAX_BYTES:
+        return
+    _assets[path] = entry
+    _asset_bytes += len(entry[1])
+    while _asset_bytes > ASSET_CACHE_MAX_BYTES:
+        _, evicted = _assets.popitem(last=False)
+        _asset_bytes -= len(evicted[1])
+
+
+def load_asset(path: str) -> Optional[tuple[bytes, str]]:
+    """
+    Return (data, mime_type) for a file, reading it only if its mtime changed.
+    Returns None if the file does not exist.
+    """
+    path = os.path.abspath(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+    with _lock:
+        cached = _assets.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            _assets.move_to_end(path)
+            return cached[1], cached[2]
+
+    with open(path, "rb") as f:
+        data = f.read()
+    mime_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+    with _lock:
+        _cache_asset(path, (mtime_ns, data, mime_type))
+    logger.debug(f"Loaded asset {path} ({len(data)} bytes)")
+    return data, mime_type
+
+
+def asset_url(path: str) -> Optional[str]:
+    """
+    Register a file that fetch_asset may serve and return its file:// URL,
+    or None if the file does not exist. Only call this for trusted paths.
+    """
+    path = os.path.abspath(path)
+    if not os.path.exists(path):
+        return None
+    with _lock:
+        _allowed_paths.add(path)
+    return Path(path).as_uri()
+
+
+def stylesheet_url(path: str) -> Optional[str]:
+    """Like asset_url, and also register the local files the stylesheet references (fonts)."""
+    url = asset_url(path)
+    if url is None:
+        return None
+    asset = load_asset(path)
+    css = asset[0].decode("utf-8", errors="replace") if asset else ""
+    for _, reference in _CSS_URL_RE.findall(css):
+        parts = urlsplit(reference.strip())
+        if parts.scheme == "file":
+            asset_url(unquote(parts.path))
+        elif not parts.scheme:
+            asset_url(os.path.join(os.path.dirname(os.path.abspath(path)), unquote(parts.path)))
+    return url
+
+
+def asset_version(path: Optional[str]) -> Optional[int]:
+    """Return an asset's mtime, so caches can be keyed on asset changes."""
+    if not path:
+        return None
+    try:
+        return os.stat(os.path.abspath(path)).st_mtime_ns
+    except OSError:
+        return None
+
+
+def asset_digest(path: str) -> Optional[str]:
+    """Return a short hash of an asset's contents, for cache-busting URLs."""
+    path = os.path.abspath(path)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    cached = _digests.get(path)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    asset = load_asset(path)
+    if asset is None:
+        return None
+    digest = hashlib.sha256(asset[0]).hexdigest()[:12]
+    with _lock:
+        _digests[path] = (mtime_ns, digest)
+    return digest
+
+
+def _optimize_logo(data: bytes, width: int) -> Optional[tuple[bytes, str]]:
+    """
+    Downscale an image to width pixels wide, drop its metadata and re-encode
+    it. Returns (data, file extension), or None if the source should be used
+    as-is: it is already no wider than width, or the result is not smaller.
+    """
+    with Image.open(io.BytesIO(data)) as source:
+        if source.width <= width and source.height <= width:
+            return None
+        # Apply any EXIF rotation before the EXIF data is dropped
+        image = ImageOps.exif_transpose(source)
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+        # Drop EXIF, ICC, text chunks and DPI; nothing below passes them on
+        image.info = {}
+        if image.width > width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+
+        output = io.BytesIO()
+        if has_alpha:
+            image.save(output, "PNG", optimize=True)
+            ext = "png"
+        else:
+            image.save(output, "JPEG", quality=LOGO_JPEG_QUALITY, optimize=True)
+            ext = "jpg"
+    # Small, already-optimized logos (e.g. few-colour PNGs) can grow when resampled
+    if output.tell() >= len(data):
+        return None
+    return output.getvalue(), ext
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    """Write a file so other workers never see it half-written."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        # mkstemp creates the file 0600; give it the mode open() would
+        os.fchmod(fd, 0o666 & ~_UMASK)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def optimized_logo_path(path: str, dpi: int) -> Optional[str]:
+    """
+    Return the path of a logo prepared for its displayed size at dpi,
+    creating it on first use. Falls back to the original file if it cannot
+    be processed, and returns None if it does not exist.
+    """
+    path = os.path.abspath(path)
+    digest = asset_digest(path)
+    if digest is None:
+        return None
+    width = round(LOGO_CSS_WIDTH / 96 * dpi)
+
+    cached = _logos.get((digest, width))
+    if cached is not None and os.path.exists(cached):
+        return cached
+
+    base = os.path.join(LOGO_CACHE_DIR, f"{digest}-{width}")
+    # Another worker (or an earlier run) may already have prepared it
+    optimized = next((f"{base}.{ext}" for ext in ("png", "jpg") if os.path.exists(f"{base}.{ext}")), None)
+    if optimized is None:
+        source = load_asset(path)
+        if source is None:
+            return None
+        try:
+            result = _optimize_logo(source[0], width)
+            if result is not None:
+                data, ext = result
+                os.makedirs(LOGO_CACHE_DIR, exist_ok=True)
+                optimized = f"{base}.{ext}"
+                _write_atomic(optimized, data)
+        except (OSError, ValueError, Image.DecompressionBombError) as e:
+            # e.g. SVG logos, or an unwritable cache directory
+            logger.warning(f"Using logo {path} as-is; could not optimize it: {str(e)}")
+            return path
+        if result is None:
+            logger.info(f"Using logo {path} as-is for {width}px: downscaling would not make it smaller")
+            optimized = path
+        else:
+            logger.info(f"Optimized logo {path} for {width}px: {len(source[0])} -> {len(data)} bytes")
+
+    with _lock:
+        _logos[(digest, width)] = optimized
+    return optimized
+
+
+def logo_url(business_config: BusinessConfig, dpi: Optional[int] = None) -> Optional[str]:
+    """
+    Return the logo URL for a business, prepared for dpi if given (otherwise
+    the logo as supplied), or None if no logo is configured.
+    """
+    if not business_config.logo_path:
+        return None
+    if dpi is None:
+        return asset_url(business_config.logo_path)
+    path = optimized_logo_path(business_config.logo_path, dpi)
+    return asset_url(path) if path else None
+
+
+def fetch_asset(url: str, *args, **kwargs) -> dict:
+    """
+    WeasyPrint url_fetcher that serves registered local assets from memory.
+    Other file:// URLs are refused (WeasyPrint logs and skips them); any
+    other scheme falls through to WeasyPrint's default fetcher.
+    """
+    parts = urlsplit(url)
+    if parts.scheme == "file":
+        path = os.path.abspath(unquote(parts.path))
+        if path not in _allowed_paths:
+            raise ValueError(f"Refusing to fetch unregistered local file {path}")
+        asset = load_asset(path)
+        if asset is not None:
+            data, mime_type = asset
+            return {
+                "string": data,
+                "mime_type": mime_type,
+                "redirected_url": url,
+            }
+    # Imported here so the asset layer loads without WeasyPrint's native libraries
+    from weasyprint import default_url_fetcher
+    return default_url_fetcher(url, *args, **kwargs)
+
+
+def warm_logo(path: Optional[str]) -> None:
+    """Prepare a logo for every output profile's DPI (e.g. in the gunicorn master)."""
+    if not path:
+        return
+    for dpi in sorted({profile.dpi for profile in PDF_PROFILES.values() if profile.dpi}):
+        optimized_logo_path(path, dpi)
@@ -0,0 +1,147 @@
+"""Parallel rendering of many documents in a process pool."""
+
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+import zipfile
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from typing import Optional
+
+from .config import BusinessConfig
+from .generic_invoice import create_generic_invoice, create_generic_receipt, render_document_html
+from .invoice import Document
+from .pdf_profiles import DEFAULT_PDF_PROFILE
+
+logger = logging.getLogger(__name__)
+
+# Per gunicorn worker, so keep it small: the total is workers x BATCH_WORKERS
+BATCH_WORKERS = max(1, int(os.getenv("BATCH_WORKERS", min(2, os.cpu_count() or 1))))
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 500))
+# Archives larger than this spill from memory to a temporary file
+BATCH_SPOOL_BYTES = 32 * 1024 * 1024
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+@dataclass
+class RenderTask:
+    """A validated document ready to render, plus the name to give the PDF."""
+    document: Document
+    business_config: BusinessConfig
+    filename: str
+    # Extra keyword arguments for create_generic_invoice/create_generic_receipt
+    options: dict = field(default_factory=dict)
+    # Output profile name (see pdf_profiles.py)
+    profile: str = DEFAULT_PDF_PROFILE
+
+    @property
+    def label(self) -> str:
+        """Bookmark label for this document in a bundle (its filename without .pdf)."""
+        return os.path.splitext(self.filename)[0]
+
+    def render_html(self, logo_dpi: Optional[int] = None) -> str:
+        """Render just the document's HTML, for laying out several documents together."""
+        options = {name: value for name, value in self.options.items() if name != "use_cache"}
+        return render_document_html(self.document, self.business_config, logo_dpi=logo_dpi, **options)
+
+    def render(self) -> Optional[bytes]:
+        if self.document.document_type == "receipt":
+            create = create_generic_receipt
+        else:
+            create = create_generic_invoice
+        return create(self.document, self.business_config, return_bytes=True,
+                      profile=self.profile, **self.options)
+
+
+def render_task(task) -> Optional[bytes]:
+    """Render a task (anything with a render() method) to PDF bytes.
+
+    This is also the entry point in pool processes, so it must stay picklable
+    by reference (module-level).
+    """
+    return task.render()
+
+
+def get_executor() -> ProcessPoolExecutor:
+    """Return this worker's render pool, creating it on first use.
+
+    Pool processes are spawned rather than forked so they never inherit the
+    web worker's threads, locks or SQLite connections.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=BATCH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Stop this worker's render pool, if started; the next submit starts a fresh one."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait, cancel_futures=True)
+            _executor = None
+
+
+def submit_task(task, *args, fn=render_task) -> Future:
+    """Submit fn(task, *args) to the render pool, restarting the pool if it has died."""
+    try:
+        return get_executor().submit(fn, task, *args)
+    except BrokenProcessPool:
+        logger.warning("Render pool was broken; starting a new one")
+        shutdown_executor(wait=False)
+        return get_executor().submit(fn, task, *args)
+
+
+def build_batch_archive(tasks: dict[int, RenderTask], manifest: list[dict]):
+    """
+    Render tasks in parallel and return a ZIP file object (positioned at 0).
+
+    tasks maps item index to its RenderTask; manifest holds one entry per
+    item and is updated in place with each item's status before being
+    written into the archive as manifest.json.
+    """
+    futures = {index: submit_task(task) for index, task in tasks.items()}
+
+    archive = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_BYTES)
+    # PDFs are already compressed, so store them as-is
+    with zipfile.ZipFile(archive, "w", compression=zipfile.ZIP_STORED) as zf:
+        for index, future in futures.items():
+            entry = manifest[index]
+            try:
+                pdf_bytes = future.result()
+            except BrokenProcessPool:
+                shutdown_executor(wait=False)
+                entry.update(status="error", error="Render worker crashed")
+                continue
+            except Exception as e:
+                logger.error(f"Error rendering batch item {index}: {str(e)}", exc_info=True)
+                entry.update(status="error", error=f"Error rendering document: {str(e)}")
+                continue
+            if pdf_bytes is None:
+                entry.update(status="error", error="Failed to generate PDF")
+                continue
+            # Prefix with the index so repeated invoice numbers don't collide
+            name = f"{index + 1:04d}-{tasks[index].filename}"
+            zf.writestr(name, pdf_bytes)
+            entry.update(status="ok", filename=name, bytes=len(pdf_bytes))
+
+        zf.writestr("manifest.json", json.dumps({
+            "total": len(manifest),
+            "succeeded": sum(1 for e in manifest if e.get("status") == "ok"),
+            "failed": sum(1 for e in manifest if e.get("status") != "ok"),
+            "items": manifest,
+        }, indent=2))
+
+    archive.seek(0)
+    return archive
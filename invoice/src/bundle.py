@@ -0,0 +1,62 @@
+"""Several documents rendered into one PDF in a single WeasyPrint pass.
+
+Issuing a booking's invoice, receipt and credit note together, or printing a
+day's invoices, then pays the per-render setup (stylesheet, fonts, PDF
+serialization) once for the whole bundle instead of once per document.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Optional
+
+from .batch import RenderTask
+from .generic_invoice import document_cache_key
+from .pdf import write_bundle
+from .pdf_cache import cache_key, get_cached_pdf, store_pdf
+from .pdf_profiles import DEFAULT_PDF_PROFILE, get_profile
+from .timing import stage
+
+BUNDLE_MAX_ITEMS = int(os.getenv("BUNDLE_MAX_ITEMS", 100))
+
+
+def render_bundle(tasks: list[RenderTask], use_cache: bool = True, profile: Optional[str] = None) -> bytes:
+    """
+    Render tasks into one merged PDF, each document starting on a new page
+    and bookmarked by its label. The bundle uses one output profile (the
+    tasks' own profiles are ignored).
+
+    use_cache: If False, render without reading or populating the PDF cache
+    """
+    pdf_profile = get_profile(profile)
+    parts = [(task.label, task.render_html(pdf_profile.dpi)) for task in tasks]
+
+    key = None
+    if use_cache:
+        key = cache_key(
+            "bundle",
+            *(label for label, _ in parts),
+            *(document_cache_key(html, task.business_config, pdf_profile)
+              for task, (_, html) in zip(tasks, parts)),
+        )
+        with stage("cache"):
+            cached_pdf = get_cached_pdf(key)
+        if cached_pdf is not None:
+            return cached_pdf
+
+    pdf_bytes = write_bundle(parts, profile=pdf_profile)
+    if use_cache:
+        with stage("cache"):
+            store_pdf(key, pdf_bytes)
+    return pdf_bytes
+
+
+@dataclass
+class BundleTask:
+    """Validated documents to render together as one PDF, plus the name to give it."""
+    tasks: list[RenderTask]
+    filename: str
+    use_cache: bool = True
+    profile: str = DEFAULT_PDF_PROFILE
+
+    def render(self) -> bytes:
+        return render_bundle(self.tasks, use_cache=self.use_cache, profile=self.profile)
@@ -1,79 +1,41 @@
 """Generic invoice generation with configurable business details."""
 
 from typing import List, Optional
-import base64
 from datetime import datetime
 import os
-from io import BytesIO
-from weasyprint import HTML, CSS
-from jinja2 import Template
 from dataclasses import dataclass
 
 from .invoice import Invoice, Receipt, Line_item, Section, Document
 from .config import BusinessConfig, Address
+from .templates import get_template, INVOICE_TEMPLATE
+from .assets import STYLESHEET_PATH, asset_url, asset_version, logo_url
+from .pdf_cache import cache_key, get_cached_pdf, store_pdf
+from .pdf import write_pdf
+from .pdf_profiles import PdfProfile, get_profile
+from .timing import stage
 
 
-def _get_logo_data_uri(business_config: BusinessConfig) -> Optional[str]:
-    """
-    Get logo as a data URI, or return None if no logo is configured.
-    """
-    if not business_config.logo_path or not os.path.exists(business_config.logo_path):
-        return None
-    
-    with open(business_config.logo_path, "rb") as image_file:
-        encoded_logo = base64.b64encode(image_file.read()).decode('utf-8')
-    
-    # Determine file extension for MIME type
-    ext = os.path.splitext(business_config.logo_path)[1].lower()
-    mime_types = {
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg',
-        '.gif': 'image/gif',
-        '.svg': 'image/svg+xml'
-    }
-    mime_type = mime_types.get(ext, 'image/png')
-    
-    return f"data:{mime_type};base64,{encoded_logo}"
-
-
-def _render_document_with_config(
+def render_document_html(
     document: Document,
     business_config: BusinessConfig,
-    return_bytes: bool = False,
     invoice_date: Optional[str] = None,
     customer_address: Optional["Address"] = None,
     show_contact_line: bool = True,
     gig_details: Optional[dict] = None,
-) -> Optional[bytes]:
+    logo_dpi: Optional[int] = None,
+) -> str:
     """
-    Generic function to render and generate invoices and receipts with custom business config.
-    If return_bytes is True, returns PDF as bytes. Otherwise, writes to disk.
-    
-    Args:
-        document: The document to render
-        business_config: Business configuration (issuer details)
-        return_bytes: If True, return PDF bytes; otherwise write to disk
-        invoice_date: Optional invoice date (YYYY-MM-DD format); falls back to today
-        customer_address: Optional Address for the customer (Every Angle for person invoices)
-        show_contact_line: Whether to show the "Got a question..." contact line (default True)
+    Render a document's HTML with custom business config (no PDF step).
+    See _render_document_with_config for the other arguments.
+
+    logo_dpi: Resolution to prepare the logo for (the logo as supplied if None)
     """
-    # Get the app root directory (parent of src/)
-    app_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    
-    output_directory = os.path.join(app_root, "output")
-    stylesheet_path = os.path.join(app_root, 'dejavu_sans.css')
-    template_path = os.path.join(app_root, 'invoice_template.html')
-    
-    logo_data_uri = _get_logo_data_uri(business_config)
+    logo = logo_url(business_config, logo_dpi)
     address_lines = business_config.address.to_lines()
     
-    # Load and render the template
-    with open(template_path, 'r') as file:
-        template_content = file.read()
-    
-    template = Template(template_content)
-    
+    # Compiled once per worker; recompiled only when the file changes
+    template = get_template(INVOICE_TEMPLATE)
+
     # Use provided invoice date or fall back to today
     if invoice_date:
         formatted_date = invoice_date
@@ -102,31 +64,89 @@ def _render_document_with_config(
         "title": document.title,
         "document_type": document.document_type,
         "linked_invoice_number": document.get_linked_invoice_number(),
-        "sections": [
-            {"heading": section.heading, "rows": section.rows}
-            for section in document.sections
-        ],
+        # The template iterates the immutable sections and rows directly
+        "sections": document.sections,
         "customer_address_lines": customer_address_lines,
         "show_contact_line": show_contact_line,
         "gig": gig_details,
     }
+
+    with stage("jinja"):
+        return template.render(
+            data=document_data,
+            business=business_details,
+            date_today=formatted_date,
+            logo_url=logo,
+        )
+
+
+def document_cache_key(document_html: str, business_config: BusinessConfig, profile: PdfProfile) -> str:
+    """Cache key for a rendered document: its HTML, output profile and the assets it references."""
+    return cache_key(
+        document_html,
+        business_config,
+        profile,
+        asset_version(business_config.logo_path),
+        asset_version(STYLESHEET_PATH),
+    )
+
+
+def _render_document_with_config(
+    document: Document,
+    business_config: BusinessConfig,
+    return_bytes: bool = False,
+    invoice_date: Optional[str] = None,
+    customer_address: Optional["Address"] = None,
+    show_contact_line: bool = True,
+    gig_details: Optional[dict] = None,
+    use_cache: bool = True,
+    profile: Optional[str] = None,
+) -> Optional[bytes]:
+    """
+    Generic function to render and generate invoices and receipts with custom business config.
+    If return_bytes is True, returns PDF as bytes. Otherwise, writes to disk.
     
-    document_html = template.render(
-        data=document_data,
-        business=business_details,
-        date_today=formatted_date,
-        logo_data_uri=logo_data_uri,
+    Args:
+        document: The document to render
+        business_config: Business configuration (issuer details)
+        return_bytes: If True, return PDF bytes; otherwise write to disk
+        invoice_date: Optional invoice date (YYYY-MM-DD format); falls back to today
+        customer_address: Optional Address for the customer (Every Angle for person invoices)
+        show_contact_line: Whether to show the "Got a question..." contact line (default True)
+        use_cache: If False, render without reading or populating the PDF cache
+        profile: Output profile name (see pdf_profiles.py); the default profile if None
+    """
+    pdf_profile = get_profile(profile)
+
+    # Get the app root directory (parent of src/)
+    app_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    output_directory = os.path.join(app_root, "output")
+    
+    document_html = render_document_html(
+        document,
+        business_config,
+        invoice_date=invoice_date,
+        customer_address=customer_address,
+        show_contact_line=show_contact_line,
+        gig_details=gig_details,
+        logo_dpi=pdf_profile.dpi,
     )
     
     if return_bytes:
+        # Identical documents render to identical PDFs, so serve repeats from cache
+        key = document_cache_key(document_html, business_config, pdf_profile)
+        with stage("cache"):
+            cached_pdf = get_cached_pdf(key) if use_cache else None
+        if cached_pdf is not None:
+            return cached_pdf
+
         # Generate PDF to bytes
-        pdf_bytes = BytesIO()
-        HTML(string=document_html).write_pdf(
-            pdf_bytes,
-            stylesheets=[CSS(stylesheet_path)] if os.path.exists(stylesheet_path) else None
-        )
-        pdf_bytes.seek(0)
-        return pdf_bytes.getvalue()
+        pdf_bytes = write_pdf(document_html, profile=pdf_profile)
+        if use_cache:
+            with stage("cache"):
+                store_pdf(key, pdf_bytes)
+        return pdf_bytes
     else:
         # Ensure output directory exists
         os.makedirs(output_directory, exist_ok=True)
@@ -140,10 +160,7 @@ def _render_document_with_config(
                 output_directory, f"invoice-{document.invoice_number}.pdf")
         
         # Generate PDF using WeasyPrint
-        HTML(string=document_html).write_pdf(
-            output_pdf_path,
-            stylesheets=[CSS(stylesheet_path)] if os.path.exists(stylesheet_path) else None
-        )
+        write_pdf(document_html, output_pdf_path, pdf_profile)
         return None
 
 
@@ -155,7 +172,8 @@ def create_generic_invoice(
     """
     Render and generate invoice with custom business configuration.
     See _render_document_with_config for the full set of supported kwargs
-    (return_bytes, invoice_date, customer_address, show_contact_line, gig_details).
+    (return_bytes, invoice_date, customer_address, show_contact_line, gig_details,
+    use_cache, profile).
     """
     return _render_document_with_config(invoice, business_config, **kwargs)
 
@@ -168,6 +186,66 @@ def create_generic_receipt(
     """
     Render and generate receipt with custom business configuration.
     See _render_document_with_config for the full set of supported kwargs
-    (return_bytes, invoice_date, customer_address, show_contact_line).
+    (return_bytes, invoice_date, customer_address, show_contact_line, use_cache,
+    profile).
     """
     return _render_document_with_config(receipt, business_config, **kwargs)
+
+
+def _render_document(document: Document, return_bytes: bool = False) -> None | bytes:
+    """
+    Base function to render and generate both invoices and receipts.
+    If return_bytes is True, returns PDF as bytes. Otherwise, writes to disk.
+    """
+    output_directory = "output"
+    logo = asset_url("static/logo.png")
+
+    template = get_template(INVOICE_TEMPLATE)
+
+    formatted_date = datetime.today().strftime('%d/%m/%Y')
+    document_html = template.render(
+        data={
+            "customer_name": document.customer_name,
+            "invoice_number": document.invoice_number,
+            "title": document.title,
+            "document_type": document.document_type,
+            "linked_invoice_number": document.get_linked_invoice_number(),
+            "sections": document.sections,
+        },
+        date_today=formatted_date,
+        logo_url=logo,
+    )
+
+    if return_bytes:
+        # Generate PDF to bytes
+        return write_pdf(document_html)
+    else:
+        # Ensure output directory exists
+        os.makedirs(output_directory, exist_ok=True)
+
+        # Output PDF path based on document type
+        if document.document_type == "receipt":
+            output_pdf_path = os.path.join(
+                output_directory, f"receipt-{document.invoice_number}.pdf")
+        else:
+            output_pdf_path = os.path.join(
+                output_directory, f"invoice-{document.invoice_number}.pdf")
+
+        # Generate PDF using WeasyPrint
+        write_pdf(document_html, output_pdf_path)
+
+
+def create_invoice(invoice: Invoice, return_bytes: bool = False) -> None | bytes:
+    """
+    Render and generate invoice from an Invoice dataclass with sections.
+    If return_bytes is True, returns PDF bytes instead of writing to disk.
+    """
+    return _render_document(invoice, return_bytes=return_bytes)
+
+
+def create_receipt(receipt: Receipt, return_bytes: bool = False) -> None | bytes:
+    """
+    Render and generate receipt from a Receipt dataclass with sections.
+    If return_bytes is True, returns PDF bytes instead of writing to disk.
+    """
+    return _render_document(receipt, return_bytes=return_bytes)
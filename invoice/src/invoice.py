@@ -1,35 +1,49 @@
-from typing import List, Any, Optional
-import base64
-from datetime import datetime
-import yaml
-from weasyprint import HTML, CSS
-from jinja2 import Template
-import os
+"""Document model: frozen dataclasses with no rendering dependencies.
+
+Rendering lives in generic_invoice.py, so the model (and anything built on it,
+such as totals or scripts) can be imported without WeasyPrint or Pillow.
+"""
+
+from typing import Optional
 from dataclasses import dataclass
-from typing import List
 from abc import ABC
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Line_item:
+    """One row of a document. Immutable, so catalog items can be shared safely."""
     description: str
     price: float
     bold: bool = False
 
 
-@dataclass
+def _as_line_item(row) -> Line_item:
+    # Accept the old {"description", "price", "bold"} dict rows
+    return row if isinstance(row, Line_item) else Line_item(**row)
+
+
+@dataclass(frozen=True, slots=True)
 class Section:
     heading: str
-    rows: list[dict]
+    rows: tuple[Line_item, ...]
 
+    def __post_init__(self):
+        rows = self.rows
+        if not isinstance(rows, tuple) or not all(isinstance(row, Line_item) for row in rows):
+            object.__setattr__(self, "rows", tuple(_as_line_item(row) for row in rows))
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class Document(ABC):
     """Base class for invoice and receipt documents."""
     customer_name: str
     invoice_number: str
     title: str
-    sections: list[Section]
+    sections: tuple[Section, ...]
+
+    def __post_init__(self):
+        if not isinstance(self.sections, tuple):
+            object.__setattr__(self, "sections", tuple(self.sections))
 
     @property
     def document_type(self) -> str:
@@ -41,7 +55,7 @@ class Document(ABC):
         return None
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Invoice(Document):
     """Represents an invoice document."""
 
@@ -50,7 +64,7 @@ class Invoice(Document):
         return "invoice"
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class Receipt(Document):
     """Represents a receipt document, linked to an invoice."""
     linked_invoice_number: str
@@ -61,88 +75,3 @@ class Receipt(Document):
 
     def get_linked_invoice_number(self) -> Optional[str]:
         return self.linked_invoice_number
-
-
-def _render_document(document: Document, return_bytes: bool = False) -> None | bytes:
-    """
-    Base function to render and generate both invoices and receipts.
-    If return_bytes is True, returns PDF as bytes (BytesIO). Otherwise, writes to disk.
-    """
-    from io import BytesIO
-
-    output_directory = "output"
-    logoPath = "static/logo.png"
-    stylesheet_path = './dejavu_sans.css'
-
-    with open(logoPath, "rb") as image_file:
-        encoded_logo = base64.b64encode(image_file.read()).decode('utf-8')
-
-    logo_data_uri = f"data:image/png;base64,{encoded_logo}"
-
-    # Load and render the template
-    with open('invoice_template.html', 'r') as file:
-        template_content = file.read()
-
-    template = Template(template_content)
-
-    formatted_date = datetime.today().strftime('%d/%m/%Y')
-    document_html = template.render(
-        data={
-            "customer_name": document.customer_name,
-            "invoice_number": document.invoice_number,
-            "title": document.title,
-            "document_type": document.document_type,
-            "linked_invoice_number": document.get_linked_invoice_number(),
-            "sections": [
-                {"heading": section.heading, "rows": section.rows}
-                for section in document.sections
-            ]
-        },
-        date_today=formatted_date,
-        logo_data_uri=logo_data_uri,
-    )
-
-    if return_bytes:
-        # Generate PDF to bytes
-        pdf_bytes = BytesIO()
-        HTML(string=document_html).write_pdf(
-            pdf_bytes,
-            stylesheets=[CSS(stylesheet_path)] if os.path.exists(
-                stylesheet_path) else None
-        )
-        pdf_bytes.seek(0)
-        return pdf_bytes.getvalue()
-    else:
-        # Ensure output directory exists
-        os.makedirs(output_directory, exist_ok=True)
-
-        # Output PDF path based on document type
-        if document.document_type == "receipt":
-            output_pdf_path = os.path.join(
-                output_directory, f"receipt-{document.invoice_number}.pdf")
-        else:
-            output_pdf_path = os.path.join(
-                output_directory, f"invoice-{document.invoice_number}.pdf")
-
-        # Generate PDF using WeasyPrint
-        HTML(string=document_html).write_pdf(
-            output_pdf_path,
-            stylesheets=[CSS(stylesheet_path)] if os.path.exists(
-                stylesheet_path) else None
-        )
-
-
-def create_invoice(invoice: Invoice, return_bytes: bool = False) -> None | bytes:
-    """
-    Render and generate invoice from an Invoice dataclass with sections.
-    If return_bytes is True, returns PDF bytes instead of writing to disk.
-    """
-    return _render_document(invoice, return_bytes=return_bytes)
-
-
-def create_receipt(receipt: Receipt, return_bytes: bool = False) -> None | bytes:
-    """
-    Render and generate receipt from a Receipt dataclass with sections.
-    If return_bytes is True, returns PDF bytes instead of writing to disk.
-    """
-    return _render_document(receipt, return_bytes=return_bytes)
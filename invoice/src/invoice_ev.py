@@ -1,7 +1,5 @@
 from .invoice import Invoice, Receipt, Line_item, Section
-from .generic_invoice import create_generic_invoice, create_generic_receipt
-from .config import BusinessConfig
-from .utils import calculate_amount_due
+from .totals import Totals, calculate_totals
 from dataclasses import dataclass
 from typing import Optional
 
@@ -21,56 +19,46 @@ class EVInvoiceOptions:
     additional_charges: Optional[list["Line_item"]] = None
 
 
-def _build_summary_items(options: EVInvoiceOptions, show_deposit: bool = True, show_payments: bool = True) -> tuple[list[dict], float, float]:
+def _build_summary_items(options: EVInvoiceOptions, totals: Totals, show_deposit: bool = True, show_payments: bool = True) -> list[Line_item]:
     """
-    Build summary items common to both invoices and receipts.
-    Returns (summary_items, total, deposit)
+    Build summary items common to both invoices and receipts from precomputed totals.
     """
-    subtotal = sum(item.price for item in options.line_items)
     summary_items = [
-        {"description": "Subtotal", "price": subtotal}
+        Line_item(description="Subtotal", price=totals.subtotal)
     ]
 
     # Discount
-    discount_amount = 0.0
     if options.discount_percent is not None and options.discount_percent > 0:
-        discount_amount = round(subtotal * (options.discount_percent / 100), 2)
         summary_items.append(
-            {"description": f"Discount ({options.discount_percent}%)", "price": -discount_amount})
+            Line_item(description=f"Discount ({options.discount_percent}%)", price=-totals.discount))
 
     # Travel cost
-    travel_cost = 0.0
     if options.travel_cost is not None and options.travel_cost > 0:
         summary_items.append(
-            {"description": "Travel Cost", "price": options.travel_cost})
-        travel_cost = options.travel_cost
+            Line_item(description="Travel Cost", price=totals.travel))
 
     # Total after discount and travel (before additional charges)
-    total = subtotal - discount_amount + travel_cost
     summary_items.append(
-        {"description": "Total", "price": total, "bold": True})
+        Line_item(description="Total", price=totals.total, bold=True))
 
     # Deposit (20% of total before additional charges)
-    deposit = round(total * 0.2, 2)
     if show_deposit:
         summary_items.append(
-            {"description": "Deposit (20%)", "price": deposit})
+            Line_item(description="Deposit (20%)", price=totals.deposit))
 
     # Additional charges (applied after deposit calculation)
     if options.additional_charges:
         for charge in options.additional_charges:
-            summary_items.append({
-                "description": charge.description,
-                "price": charge.price
-            })
+            summary_items.append(
+                Line_item(description=charge.description, price=charge.price))
 
     # Payment made (if showing)
     if show_payments and options.payment_made:
         for payment in options.payment_made:
-            summary_items.append({"description": payment.description, "price": -abs(
-                payment.price), "bold": getattr(payment, 'bold', False)})
+            summary_items.append(Line_item(
+                description=payment.description, price=-abs(payment.price), bold=payment.bold))
 
-    return summary_items, total, deposit
+    return summary_items
 
 
 def generate_ev_invoice(options: EVInvoiceOptions, deposit_only: bool = False, amount_due_override: Optional[float] = None, show_deposit: bool = True) -> "Invoice":
@@ -80,36 +68,15 @@ def generate_ev_invoice(options: EVInvoiceOptions, deposit_only: bool = False, a
     If amount_due_override is set, it will be used for Amount Due instead of any calculated value.
     If show_deposit is False, the deposit line will not be shown in the summary section.
     """
-    # Build common summary items
-    summary_items, total, deposit = _build_summary_items(
-        options, show_deposit=show_deposit, show_payments=True)
-
-    # Calculate additional charges total
-    additional_charges_total = 0.0
-    if options.additional_charges:
-        additional_charges_total = sum(
-            charge.price for charge in options.additional_charges)
-
-    # Calculate total including additional charges for amount due
-    total_with_charges = total + additional_charges_total
-
-    # Calculate payment total
-    payment_total = 0.0
-    if options.payment_made:
-        payment_total = sum(item.price for item in options.payment_made)
-
-    # Amount due (was Remaining Balance)
-    amount_due = calculate_amount_due(
-        deposit=deposit,
-        charges_total=additional_charges_total,
-        payment_total=payment_total,
-        full_balance_total=total_with_charges,
-        deposit_only=deposit_only,
-        amount_due_override=amount_due_override,
-    )
+    # Same calculation as ledger reconciliation (see totals.py)
+    totals = calculate_totals(
+        options, deposit_only=deposit_only, amount_due_override=amount_due_override)
+    summary_items = _build_summary_items(
+        options, totals, show_deposit=show_deposit, show_payments=True)
+    amount_due = totals.amount_due
 
     amount_due_section = [
-        {"description": "Amount Due", "price": amount_due, "bold": True}
+        Line_item(description="Amount Due", price=amount_due, bold=True)
     ]
 
     title = f"{options.event_date} - {options.venue}"
@@ -118,8 +85,8 @@ def generate_ev_invoice(options: EVInvoiceOptions, deposit_only: bool = False, a
         invoice_number=options.invoice_number,
         title=title,
         sections=[
-            Section(heading="Items", rows=[vars(item)
-                    for item in options.line_items]),
+            # Line items are immutable, so rows can share them with the options
+            Section(heading="Items", rows=tuple(options.line_items)),
             Section(heading="Summary", rows=summary_items),
             Section(heading="Totals", rows=amount_due_section)
         ]
@@ -132,14 +99,13 @@ def generate_receipt(options: EVInvoiceOptions, show_deposit: bool = True) -> Re
     Reuses common summary logic from generate_ev_invoice.
     If show_deposit is False, the deposit line will not be shown in the summary section.
     """
-    # Build common summary items
-    # We ignore total and deposit since balance is always zero for receipts
-    summary_items, _, _ = _build_summary_items(
-        options, show_deposit=show_deposit, show_payments=True)
+    # Build common summary items (balance is always zero for receipts)
+    summary_items = _build_summary_items(
+        options, calculate_totals(options), show_deposit=show_deposit, show_payments=True)
 
     # Balance is now zero for receipts
     balance_section = [
-        {"description": "Balance Due", "price": 0.0, "bold": True}]
+        Line_item(description="Balance Due", price=0.0, bold=True)]
 
     title = f"{options.event_date} - {options.venue}"
     return Receipt(
@@ -148,8 +114,8 @@ def generate_receipt(options: EVInvoiceOptions, show_deposit: bool = True) -> Re
         title=title,
         linked_invoice_number=options.invoice_number,
         sections=[
-            Section(heading="Items", rows=[vars(item)
-                    for item in options.line_items]),
+            # Line items are immutable, so rows can share them with the options
+            Section(heading="Items", rows=tuple(options.line_items)),
             Section(heading="Summary", rows=summary_items),
             Section(heading="Totals", rows=balance_section)
         ]
@@ -172,8 +138,8 @@ def generate_credit_note(
     ref_label = reference if reference else "Credit Note"
     title = f"{event_date} - {venue}" if (event_date or venue) else ref_label
 
-    line_items = [{"description": description, "price": amount}]
-    total_section = [{"description": "Total Credit", "price": amount, "bold": True}]
+    line_items = [Line_item(description=description, price=amount)]
+    total_section = [Line_item(description="Total Credit", price=amount, bold=True)]
 
     return Invoice(
         customer_name=customer_name,
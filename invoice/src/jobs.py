@@ -0,0 +1,150 @@
+"""Background render jobs.
+
+POST /jobs validates a document and hands it to the render pool; the pool
+process records progress and the finished PDF in a SQLite table, so any
+gunicorn worker can answer GET /jobs/<id>. Jobs are kept for
+JOB_RETENTION_SECONDS after they are created and then purged.
+"""
+
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Optional
+
+from .batch import submit_task
+
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", os.path.join(APP_ROOT, "cache", "jobs.sqlite3"))
+JOB_RETENTION_SECONDS = float(os.getenv("JOB_RETENTION_SECONDS", 60 * 60))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    profile TEXT,
+    error TEXT,
+    result BLOB,
+    created_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_created_at ON jobs (created_at);
+"""
+
+
+class JobStore:
+    """Job status and results shared across processes."""
+
+    def __init__(self, path: str, retention_seconds: float):
+        self.path = path
+        self.retention_seconds = retention_seconds
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return a connection for this process and thread (never shared across a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        try:
+            # Databases created before jobs recorded their profile
+            conn.execute("ALTER TABLE jobs ADD COLUMN profile TEXT")
+        except sqlite3.OperationalError:
+            pass  # already there
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def create(self, job_type: str, filename: str, profile: Optional[str] = None) -> str:
+        """Record a new queued job and return its ID."""
+        job_id = secrets.token_urlsafe(16)
+        now = time.time()
+        conn = self._connection()
+        conn.execute(
+            "DELETE FROM jobs WHERE created_at < ?", (now - self.retention_seconds,))
+        conn.execute(
+            "INSERT INTO jobs (id, type, status, filename, profile, created_at) "
+            "VALUES (?, ?, 'queued', ?, ?, ?)",
+            (job_id, job_type, filename, profile, now),
+        )
+        return job_id
+
+    def mark_running(self, job_id: str) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = 'running' WHERE id = ?", (job_id,))
+
+    def complete(self, job_id: str, result: bytes) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = ? WHERE id = ?",
+            (result, time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Return a job as a dict, or None if it is unknown or past retention."""
+        row = self._connection().execute(
+            "SELECT status, filename, profile, error, result, created_at FROM jobs WHERE id = ?",
+            (job_id,),
+        ).fetchone()
+        if row is None or row[5] < time.time() - self.retention_seconds:
+            return None
+        status, filename, profile, error, result, _ = row
+        return {"status": status, "filename": filename, "profile": profile, "error": error, "result": result}
+
+
+job_store = JobStore(JOBS_DB_PATH, JOB_RETENTION_SECONDS)
+
+
+def run_job(task, job_id: str) -> None:
+    """Render a task and record the outcome (runs in a pool process)."""
+    job_store.mark_running(job_id)
+    try:
+        pdf_bytes = task.render()
+    except Exception as e:
+        logger.error(f"Render job {job_id} failed: {str(e)}", exc_info=True)
+        job_store.fail(job_id, f"Error rendering document: {str(e)}")
+        return
+    if pdf_bytes is None:
+        job_store.fail(job_id, "Failed to generate PDF")
+        return
+    job_store.complete(job_id, pdf_bytes)
+
+
+def submit_job(job_type: str, task) -> str:
+    """Queue a task for background rendering and return its job ID."""
+    job_id = job_store.create(job_type, task.filename, task.profile)
+    try:
+        future = submit_task(task, job_id, fn=run_job)
+    except Exception as e:
+        # e.g. the pool is shutting down; don't leave a job that will never run
+        job_store.fail(job_id, f"Could not start render: {str(e)}")
+        raise
+    future.add_done_callback(lambda f: _record_crash(job_id, f))
+    return job_id
+
+
+def _record_crash(job_id: str, future: Future) -> None:
+    """Fail a job whose pool process never recorded an outcome itself."""
+    if future.cancelled():
+        # The pool was shut down (e.g. the worker was recycled) before the job started
+        job_store.fail(job_id, "Render was cancelled before it started; please resubmit")
+    elif future.exception() is not None:
+        # The pool process died mid-render
+        job_store.fail(job_id, f"Render worker crashed: {str(future.exception())}")
@@ -0,0 +1,92 @@
+"""Worker recycling before memory growth becomes an OOM kill.
+
+WeasyPrint's font and image caches make a worker's RSS creep up over
+thousands of renders. After every request gunicorn calls after_request()
+(gunicorn_config.post_request), which samples RSS and retires the worker
+gracefully, after the current request, once it crosses WORKER_MAX_RSS_MB or
+has served its request quota. gunicorn then forks a fresh worker.
+
+The RSS counted is the worker's plus its batch render pool's, since the pool
+processes render the same documents and grow the same way. The pool is shut
+down with the worker (gunicorn_config.worker_exit).
+
+Each worker draws its own limits with jitter, so workers started together
+are not all recycled together.
+"""
+
+import logging
+import os
+import random
+from typing import Optional
+
+from .metrics import children_rss_bytes, format_labels, metrics, rss_bytes
+
+logger = logging.getLogger(__name__)
+
+WORKER_MAX_REQUESTS = int(os.getenv("WORKER_MAX_REQUESTS", 2000))
+WORKER_MAX_REQUESTS_JITTER = int(os.getenv("WORKER_MAX_REQUESTS_JITTER", 200))
+WORKER_MAX_RSS_MB = int(os.getenv("WORKER_MAX_RSS_MB", 300))
+# Each worker's RSS ceiling is lowered by a random amount up to this fraction
+WORKER_RSS_JITTER = float(os.getenv("WORKER_RSS_JITTER", 0.1))
+
+_MB = 1024 * 1024
+
+
+class WorkerLifecycle:
+    """Counts this worker's requests and decides when it should be recycled."""
+
+    def __init__(self, max_requests: int, requests_jitter: int, max_rss_mb: int, rss_jitter: float):
+        self.max_requests = max_requests
+        self.requests_jitter = requests_jitter
+        self.max_rss_mb = max_rss_mb
+        self.rss_jitter = rss_jitter
+        self._pid = None
+
+    def _start(self) -> None:
+        """Draw this process's limits (per pid, so forked workers don't share a draw)."""
+        rng = random.SystemRandom()
+        self.requests = 0
+        self.request_limit = (
+            self.max_requests + rng.randint(0, self.requests_jitter)
+            if self.max_requests > 0 else 0
+        )
+        self.rss_limit = (
+            int(self.max_rss_mb * _MB * (1 - rng.uniform(0, self.rss_jitter)))
+            if self.max_rss_mb > 0 else 0
+        )
+        self._pid = os.getpid()
+
+    def recycle_reason(self) -> Optional[tuple[str, str]]:
+        """
+        Count one finished request and return (cause, description) if the
+        worker should now be recycled, otherwise None.
+        """
+        if self._pid != os.getpid():
+            self._start()
+        self.requests += 1
+
+        if self.rss_limit:
+            rss = rss_bytes() + children_rss_bytes()
+            if rss >= self.rss_limit:
+                return "rss", (
+                    f"RSS {rss / _MB:.0f} MB (with render pool) reached its "
+                    f"{self.rss_limit / _MB:.0f} MB ceiling after {self.requests} requests")
+        if self.request_limit and self.requests >= self.request_limit:
+            return "requests", f"served {self.requests} requests (limit {self.request_limit})"
+        return None
+
+
+lifecycle = WorkerLifecycle(
+    WORKER_MAX_REQUESTS, WORKER_MAX_REQUESTS_JITTER, WORKER_MAX_RSS_MB, WORKER_RSS_JITTER)
+
+
+def after_request(worker) -> None:
+    """Retire the gunicorn worker after this request if it has hit a limit."""
+    reason = lifecycle.recycle_reason()
+    if reason is None or not worker.alive:
+        return
+    cause, description = reason
+    logger.warning(f"Recycling worker {os.getpid()}: {description}")
+    metrics.inc("invoice_worker_recycles_total", format_labels(cause=cause))
+    # The worker finishes the current request and exits; the arbiter replaces it
+    worker.alive = False
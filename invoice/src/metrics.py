@@ -0,0 +1,335 @@
+"""Request metrics shared across gunicorn workers, exposed in Prometheus text format.
+
+Every worker writes into one SQLite database under the app root, so /metrics
+reports totals for the whole service whichever worker answers the scrape.
+Counters and histograms are summed across processes; gauges are kept per
+process and rows belonging to processes that have exited are dropped at
+scrape time.
+
+Updates are buffered in memory and each worker writes them in one
+transaction every METRICS_FLUSH_SECONDS (and when it serves a scrape or
+exits), so requests, probes included, never wait on a SQLite write lock.
+"""
+
+import atexit
+import logging
+import multiprocessing
+import os
+import resource
+import sqlite3
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+METRICS_DB_PATH = os.getenv(
+    "METRICS_DB_PATH", os.path.join(APP_ROOT, "cache", "metrics.sqlite3"))
+# 0 writes every update straight through
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_SECONDS", 1))
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+PDF_SIZE_BUCKETS = (10_000, 25_000, 50_000, 100_000, 250_000, 500_000, 1_000_000, 2_500_000, 5_000_000)
+
+# name -> (type, help, how gauges combine across processes)
+FAMILIES = {
+    "invoice_http_requests_total": ("counter", "HTTP requests by route, method and status.", None),
+    "invoice_http_errors_total": ("counter", "HTTP error responses (4xx/5xx) by route and status.", None),
+    "invoice_http_request_duration_seconds": ("histogram", "HTTP request latency by route.", None),
+    "invoice_http_requests_in_flight": ("gauge", "Requests currently being handled.", "sum"),
+    "invoice_pdf_size_bytes": ("histogram", "Size of PDFs returned, by route and output profile.", None),
+    "invoice_admission_queue_depth": ("gauge", "Render requests waiting for a slot.", "sum"),
+    "invoice_admission_rejections_total": ("counter", "Render requests turned away, by route and reason.", None),
+    "invoice_worker_recycles_total": ("counter", "Workers retired by the lifecycle manager, by cause.", None),
+    "process_resident_memory_bytes": ("gauge", "Resident memory of each worker process.", "pid"),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS samples (
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    value REAL NOT NULL,
+    PRIMARY KEY (name, labels, pid)
+);
+"""
+
+# Counters and histograms use pid 0 so every worker adds into the same row
+_ADD = (
+    "INSERT INTO samples (name, labels, pid, value) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (name, labels, pid) DO UPDATE SET value = value + excluded.value"
+)
+_SET = (
+    "INSERT INTO samples (name, labels, pid, value) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT (name, labels, pid) DO UPDATE SET value = excluded.value"
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(**labels) -> str:
+    """Render labels in exposition order, e.g. route="/generate",status="200"."""
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _statm_rss(pid: str) -> int:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def rss_bytes() -> int:
+    """Return this process's current resident set size in bytes."""
+    try:
+        return _statm_rss("self")
+    except (OSError, ValueError, IndexError):
+        # No /proc (macOS): fall back to the peak, in kilobytes on Linux and bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def children_rss_bytes() -> int:
+    """
+    Return the combined RSS of this process's live multiprocessing children
+    (e.g. the batch render pool) in bytes; 0 where there is no /proc.
+    """
+    total = 0
+    for child in multiprocessing.active_children():
+        try:
+            total += _statm_rss(str(child.pid))
+        except (OSError, ValueError, IndexError):
+            # Exited since it was listed
+            continue
+    return total
+
+
+class MetricsStore:
+    """Counters, gauges and histograms shared across processes."""
+
+    def __init__(self, path: str, flush_seconds: float):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._local = threading.local()
+        # Pending updates keyed by (name, labels, pid): summed adds, latest sets
+        self._lock = threading.Lock()
+        self._adds: dict[tuple, float] = {}
+        self._sets: dict[tuple, float] = {}
+        self._flusher_pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return a connection for this process and thread (never shared across a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # Losing the last few increments on power loss is acceptable for metrics
+        conn.execute("PRAGMA synchronous=OFF")
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def write(self, adds: list[tuple] = (), sets: list[tuple] = ()) -> None:
+        """Queue (name, labels, pid, value) rows for the next flush."""
+        if self.flush_seconds <= 0:
+            self._commit(adds, sets)
+            return
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                self._start_flusher()
+            for name, labels, pid, value in adds:
+                key = (name, labels, pid)
+                self._adds[key] = self._adds.get(key, 0) + value
+            for name, labels, pid, value in sets:
+                self._sets[(name, labels, pid)] = value
+
+    def _start_flusher(self) -> None:
+        """Start this process's flush thread (called with the lock held)."""
+        # Anything buffered before a fork belongs to the parent, which flushes it
+        self._adds.clear()
+        self._sets.clear()
+        self._flusher_pid = os.getpid()
+        threading.Thread(target=self._flush_periodically, name="metrics-flush", daemon=True).start()
+
+    def _flush_periodically(self) -> None:
+        pid = os.getpid()
+        while self._flusher_pid == pid:
+            time.sleep(self.flush_seconds)
+            self.flush()
+
+    def flush(self) -> None:
+        """Write this process's buffered updates in a single transaction."""
+        with self._lock:
+            if self._flusher_pid != os.getpid():
+                return
+            adds, self._adds = self._adds, {}
+            sets, self._sets = self._sets, {}
+        if adds or sets:
+            self._commit(
+                [(*key, value) for key, value in adds.items()],
+                [(*key, value) for key, value in sets.items()],
+            )
+
+    def _commit(self, adds: list[tuple], sets: list[tuple]) -> None:
+        """Apply (name, labels, pid, value) rows in a single transaction."""
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_ADD, adds)
+                conn.executemany(_SET, sets)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"Metrics write failed: {str(e)}")
+
+    @staticmethod
+    def counter_rows(name: str, labels: str, amount: float = 1) -> list[tuple]:
+        return [(name, labels, 0, amount)]
+
+    @staticmethod
+    def histogram_rows(name: str, labels: str, value: float, buckets: tuple) -> list[tuple]:
+        """Rows for one observation: cumulative buckets, +Inf, sum and count."""
+        prefix = f"{labels}," if labels else ""
+        rows = [
+            (f"{name}_bucket", f'{prefix}le="{_format_number(le)}"', 0, 1 if value <= le else 0)
+            for le in buckets
+        ]
+        rows.append((f"{name}_bucket", f'{prefix}le="+Inf"', 0, 1))
+        rows.append((f"{name}_sum", labels, 0, value))
+        rows.append((f"{name}_count", labels, 0, 1))
+        return rows
+
+    def inc(self, name: str, labels: str = "", amount: float = 1) -> None:
+        self.write(adds=self.counter_rows(name, labels, amount))
+
+    def observe(self, name: str, labels: str, value: float, buckets: tuple) -> None:
+        self.write(adds=self.histogram_rows(name, labels, value, buckets))
+
+    def add_gauge(self, name: str, labels: str, amount: float) -> None:
+        """Adjust this process's value of a gauge."""
+        self.write(adds=[(name, labels, os.getpid(), amount)])
+
+    def set_gauge(self, name: str, labels: str, value: float) -> None:
+        """Set this process's value of a gauge."""
+        self.write(sets=[(name, labels, os.getpid(), value)])
+
+    def _drop_dead_processes(self, conn: sqlite3.Connection) -> None:
+        pids = [row[0] for row in conn.execute("SELECT DISTINCT pid FROM samples WHERE pid != 0")]
+        dead = [(pid,) for pid in pids if not _pid_alive(pid)]
+        if dead:
+            conn.executemany("DELETE FROM samples WHERE pid = ?", dead)
+
+    def render(self) -> str:
+        """Return every metric in Prometheus text exposition format."""
+        self.flush()
+        try:
+            conn = self._connection()
+            self._drop_dead_processes(conn)
+            rows = conn.execute(
+                "SELECT name, labels, pid, value FROM samples ORDER BY rowid").fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"Metrics read failed: {str(e)}")
+            rows = []
+
+        lines = []
+        for family, (kind, help_text, gauge_mode) in FAMILIES.items():
+            lines.append(f"# HELP {family} {help_text}")
+            lines.append(f"# TYPE {family} {kind}")
+            if kind == "histogram":
+                names = (f"{family}_bucket", f"{family}_sum", f"{family}_count")
+            else:
+                names = (family,)
+            samples: dict[tuple[str, str], float] = {}
+            for name, labels, pid, value in rows:
+                if name not in names:
+                    continue
+                if gauge_mode == "pid":
+                    labels = ",".join(filter(None, [labels, format_labels(pid=pid)]))
+                samples[(name, labels)] = samples.get((name, labels), 0) + value
+            for (name, labels), value in samples.items():
+                series = f"{name}{{{labels}}}" if labels else name
+                lines.append(f"{series} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Delete the database (called once when the gunicorn master starts)."""
+        with self._lock:
+            self._adds.clear()
+            self._sets.clear()
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(self.path + suffix)
+            except FileNotFoundError:
+                pass
+        self._local = threading.local()
+
+
+metrics = MetricsStore(METRICS_DB_PATH, METRICS_FLUSH_SECONDS)
+# Workers also flush from gunicorn_config.worker_exit; this covers other exits
+atexit.register(metrics.flush)
+
+
+def track_in_flight(delta: int) -> None:
+    """Count a request as started (+1) or finished (-1) in this worker."""
+    metrics.add_gauge("invoice_http_requests_in_flight", "", delta)
+
+
+def record_request(route: str, method: str, status: int, seconds: float) -> None:
+    """Record one finished request and refresh this worker's RSS."""
+    adds = metrics.counter_rows(
+        "invoice_http_requests_total", format_labels(route=route, method=method, status=status))
+    if status >= 400:
+        adds += metrics.counter_rows(
+            "invoice_http_errors_total", format_labels(route=route, status=status))
+    adds += metrics.histogram_rows(
+        "invoice_http_request_duration_seconds", format_labels(route=route), seconds, LATENCY_BUCKETS)
+    metrics.write(
+        adds=adds,
+        sets=[("process_resident_memory_bytes", "", os.getpid(), rss_bytes())],
+    )
+
+
+def record_pdf_size(route: str, size: int, profile: str) -> None:
+    """Record the size of a PDF returned by route, rendered with an output profile."""
+    metrics.observe(
+        "invoice_pdf_size_bytes", format_labels(route=route, profile=profile), size, PDF_SIZE_BUCKETS)
+
+
+def track_admission_queue(delta: int) -> None:
+    """Count a render request as waiting for a slot (+1) or done waiting (-1)."""
+    metrics.add_gauge("invoice_admission_queue_depth", "", delta)
+
+
+def record_rejection(route: str, reason: str) -> None:
+    """Record a render request turned away by admission control."""
+    metrics.inc("invoice_admission_rejections_total", format_labels(route=route, reason=reason))
+
+
+def render_metrics() -> str:
+    """Refresh this worker's RSS and return the exposition text."""
+    metrics.set_gauge("process_resident_memory_bytes", "", rss_bytes())
+    return metrics.render()
@@ -0,0 +1,143 @@
+"""Shared WeasyPrint rendering state.
+
+Each worker keeps one parsed stylesheet and one FontConfiguration and reuses
+them across renders, so CSS parsing and @font-face resolution happen once
+rather than per PDF. Both are rebuilt only when the stylesheet changes on disk.
+
+The FontConfiguration is not thread-safe, so request renders hold the
+worker's single admission slot (admission.render_slot) while they lay out
+and write a PDF.
+"""
+
+import logging
+import os
+import threading
+from typing import BinaryIO, Optional, Union
+
+from weasyprint import CSS, HTML
+from weasyprint.text.fonts import FontConfiguration
+
+from .assets import STYLESHEET_PATH, fetch_asset, stylesheet_url
+from .admission import render_slot
+from .pdf_profiles import PdfProfile, get_profile
+from .timing import stage
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+_lock = threading.Lock()
+_stylesheet_mtime = _MISSING
+_stylesheets: Optional[list[CSS]] = None
+_font_config: Optional[FontConfiguration] = None
+_stats = {"hits": 0, "rebuilds": 0}
+
+
+def _current_stylesheet_mtime() -> Optional[int]:
+    try:
+        return os.stat(STYLESHEET_PATH).st_mtime_ns
+    except OSError:
+        return None
+
+
+def get_render_resources() -> tuple[Optional[list[CSS]], FontConfiguration]:
+    """
+    Return the shared (stylesheets, font_config) pair for this worker.
+    Rebuilt under a lock when the stylesheet's mtime changes; the returned
+    objects are only read during rendering, so they are safe to share.
+    """
+    global _stylesheet_mtime, _stylesheets, _font_config
+    mtime = _current_stylesheet_mtime()
+    with _lock:
+        if _font_config is not None and mtime == _stylesheet_mtime:
+            _stats["hits"] += 1
+            return _stylesheets, _font_config
+
+        font_config = FontConfiguration()
+        url = stylesheet_url(STYLESHEET_PATH) if mtime is not None else None
+        _stylesheets = (
+            [CSS(url=url, url_fetcher=fetch_asset, font_config=font_config)]
+            if url else None
+        )
+        _font_config = font_config
+        _stylesheet_mtime = mtime
+        _stats["rebuilds"] += 1
+        logger.info("Rebuilt shared stylesheet and font configuration")
+        return _stylesheets, _font_config
+
+
+def stylesheet_cache_stats() -> dict:
+    """Return how often the shared stylesheet was reused versus rebuilt."""
+    return dict(_stats)
+
+
+def render_document(html: str, profile: Optional[PdfProfile] = None):
+    """Lay out HTML with the shared stylesheet and font configuration.
+
+    Returns the WeasyPrint Document (pages not yet serialized). Images are
+    loaded, downsampled and recompressed here, per the profile.
+    """
+    stylesheets, font_config = get_render_resources()
+    with stage("layout"):
+        return HTML(string=html, url_fetcher=fetch_asset).render(
+            stylesheets=stylesheets,
+            font_config=font_config,
+            **(profile or get_profile()).options(),
+        )
+
+
+def write_pdf(
+    html: str,
+    target: Union[str, BinaryIO, None] = None,
+    profile: Optional[PdfProfile] = None,
+) -> Optional[bytes]:
+    """
+    Render HTML to PDF with the shared stylesheet and font configuration,
+    using the given output profile (the default profile if None).
+    Writes to target if given, otherwise returns the PDF bytes.
+
+    With no target, WeasyPrint returns its own output buffer's bytes
+    (BytesIO.getvalue() hands over the buffer without copying), so callers
+    should pass those bytes straight through rather than re-wrapping them.
+    """
+    # Same work as HTML.write_pdf, split so parsing/layout and serialization
+    # are timed separately
+    profile = profile or get_profile()
+    with render_slot():
+        document = render_document(html, profile)
+        with stage("serialize"):
+            return document.write_pdf(target, **profile.options())
+
+
+def write_bundle(
+    parts: list[tuple[str, str]],
+    target: Union[str, BinaryIO, None] = None,
+    profile: Optional[PdfProfile] = None,
+) -> Optional[bytes]:
+    """
+    Render several HTML documents into one PDF, each starting on a new page.
+
+    parts is a list of (bookmark label, html). Every document is laid out
+    with the same shared stylesheet and fonts, their pages are merged, and
+    the result is serialized once, with a top-level bookmark per document
+    (the document's own bookmarks nest beneath it).
+    """
+    if not parts:
+        raise ValueError("A bundle needs at least one document")
+    profile = profile or get_profile()
+    with render_slot():
+        documents = []
+        for label, html in parts:
+            document = render_document(html, profile)
+            for page in document.pages:
+                page.bookmarks = [
+                    (level + 1, text, position, state)
+                    for level, text, position, state in page.bookmarks
+                ]
+            if document.pages:
+                document.pages[0].bookmarks.insert(0, (1, label, (0, 0), "open"))
+            documents.append(document)
+
+        merged = documents[0].copy([page for document in documents for page in document.pages])
+        with stage("serialize"):
+            return merged.write_pdf(target, **profile.options())
@@ -0,0 +1,136 @@
+"""Content-addressed cache for rendered PDFs.
+
+Renders are keyed by a hash of everything that affects the output: the
+rendered HTML, the business configuration and the versions of the assets the
+HTML references. Identical requests (e.g. the inline preview followed by the
+attachment download of the same invoice) are then served without a second
+WeasyPrint run.
+
+Lookups check this worker's memory first, then the shared on-disk store in
+pdf_store.py, so a PDF rendered by any worker is reused by all of them. Both
+expire an entry PDF_CACHE_TTL_SECONDS after it was rendered, wherever it was
+found.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from .pdf_store import PDF_CACHE_TTL_SECONDS, pdf_store
+
+logger = logging.getLogger(__name__)
+
+PDF_CACHE_MAX_BYTES = int(os.getenv("PDF_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+
+
+def cache_key(*parts) -> str:
+    """Return a stable hash of the given parts (str, bytes or anything with a repr)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        elif not isinstance(part, bytes):
+            part = repr(part).encode("utf-8")
+        # Length-prefix each part so ("ab", "c") and ("a", "bc") differ
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class PDFCache:
+    """In-memory LRU cache bounded by total byte size, with per-entry TTL."""
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return cached bytes for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, data = entry
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes, created_at: Optional[float] = None) -> None:
+        """
+        Store bytes under key, evicting least recently used entries to fit.
+        created_at (a time.time() timestamp, default now) is when the PDF was
+        rendered; the entry expires ttl_seconds after it.
+        """
+        if len(data) > self.max_bytes:
+            return
+        ttl = self.ttl_seconds
+        if created_at is not None:
+            ttl -= max(0.0, time.time() - created_at)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + ttl, data)
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, data = self._entries.pop(key)
+        self._size -= len(data)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+            }
+
+
+pdf_cache = PDFCache(PDF_CACHE_MAX_BYTES, PDF_CACHE_TTL_SECONDS)
+
+
+def get_cached_pdf(key: str) -> Optional[bytes]:
+    """Return a cached PDF from memory or the shared store, or None."""
+    data = pdf_cache.get(key)
+    if data is None:
+        entry = pdf_store.get(key)
+        if entry is not None:
+            # Keep the original render time so the entry doesn't outlive the TTL
+            data, created_at = entry
+            pdf_cache.put(key, data, created_at)
+    return data
+
+
+def store_pdf(key: str, data: bytes) -> None:
+    """Cache a rendered PDF in memory and in the shared store."""
+    pdf_cache.put(key, data)
+    pdf_store.put(key, data)
@@ -0,0 +1,57 @@
+"""Named PDF output profiles.
+
+A profile is a set of WeasyPrint output options, chosen per request:
+
+- standard: WeasyPrint's defaults with the logo as supplied, the same output
+  as before profiles existed (the default)
+- email: images downsampled to 150 dpi and recompressed, for small attachments
+- print: images kept at print resolution (300 dpi) but losslessly optimized
+- archive: PDF/A-3b with fonts embedded in full, for long-term storage
+
+Fonts are subset and streams compressed unless a profile says otherwise.
+"""
+
+import os
+from dataclasses import asdict, dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class PdfProfile:
+    """WeasyPrint options for one profile (see weasyprint.DEFAULT_OPTIONS)."""
+    name: str
+    optimize_images: bool = False
+    jpeg_quality: Optional[int] = None
+    dpi: Optional[int] = None               # also the logo's prepared resolution; None keeps it as supplied
+    full_fonts: bool = False
+    uncompressed_pdf: bool = False
+    pdf_variant: Optional[str] = None
+
+    def options(self) -> dict:
+        """Keyword arguments for HTML.render() and Document.write_pdf()."""
+        options = asdict(self)
+        del options["name"]
+        return options
+
+
+PDF_PROFILES = {
+    profile.name: profile
+    for profile in (
+        PdfProfile("standard"),
+        PdfProfile("email", optimize_images=True, jpeg_quality=70, dpi=150),
+        PdfProfile("print", optimize_images=True, dpi=300),
+        PdfProfile("archive", full_fonts=True, pdf_variant="pdf/a-3b"),
+    )
+}
+
+DEFAULT_PDF_PROFILE = os.getenv("PDF_PROFILE", "standard")
+if DEFAULT_PDF_PROFILE not in PDF_PROFILES:
+    raise ValueError(f"PDF_PROFILE must be one of: {', '.join(PDF_PROFILES)}")
+
+
+def get_profile(name: Optional[str] = None) -> PdfProfile:
+    """Return the named profile (the default if name is None). Raises ValueError if unknown."""
+    try:
+        return PDF_PROFILES[name or DEFAULT_PDF_PROFILE]
+    except KeyError:
+        raise ValueError(f"profile must be one of: {', '.join(PDF_PROFILES)}")
@@ -0,0 +1,142 @@
+"""Shared on-disk store for rendered PDFs.
+
+A SQLite database under the app root that every gunicorn worker reads and
+writes, so a PDF rendered by one worker can be served by any other and
+survives worker recycles and restarts. WAL mode lets readers proceed while a
+writer commits; each write (insert plus LRU eviction) is one transaction.
+
+Entries expire PDF_CACHE_TTL_SECONDS after they were rendered, the same as
+the in-memory cache in front of the store.
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PDF_STORE_PATH = os.getenv(
+    "PDF_STORE_PATH", os.path.join(APP_ROOT, "cache", "pdf_store.sqlite3"))
+PDF_STORE_MAX_BYTES = int(os.getenv("PDF_STORE_MAX_BYTES", 256 * 1024 * 1024))
+PDF_CACHE_TTL_SECONDS = float(os.getenv("PDF_CACHE_TTL_SECONDS", 15 * 60))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pdfs (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pdfs_accessed_at ON pdfs (accessed_at);
+CREATE INDEX IF NOT EXISTS pdfs_created_at ON pdfs (created_at);
+"""
+
+# Delete least recently used rows once the running total exceeds the cap
+_EVICT = """
+DELETE FROM pdfs WHERE key IN (
+    SELECT key FROM (
+        SELECT key, SUM(size) OVER (ORDER BY accessed_at DESC, key) AS running
+        FROM pdfs
+    ) WHERE running > ?
+)
+"""
+
+
+class PDFStore:
+    """Size-bounded LRU store of PDF bytes shared across processes, with a TTL."""
+
+    def __init__(self, path: str, max_bytes: int, ttl_seconds: float):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return a connection for this process and thread (never shared across a fork)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            return conn
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        self._local.conn = conn
+        self._local.pid = os.getpid()
+        return conn
+
+    def get(self, key: str) -> Optional[tuple[bytes, float]]:
+        """
+        Return (bytes, created_at) for key, or None if missing, expired or the
+        store is unavailable. created_at is a time.time() timestamp.
+        """
+        if not self.enabled:
+            return None
+        now = time.time()
+        try:
+            conn = self._connection()
+            row = conn.execute(
+                "SELECT data, created_at FROM pdfs WHERE key = ? AND created_at > ?",
+                (key, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute(
+                "UPDATE pdfs SET accessed_at = ? WHERE key = ?", (now, key))
+        except sqlite3.Error as e:
+            logger.warning(f"PDF store read failed: {str(e)}")
+            return None
+        self.hits += 1
+        return row[0], row[1]
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store bytes under key, dropping expired entries and least recently used ones past the cap."""
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO pdfs (key, data, size, created_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, data, len(data), now, now),
+                )
+                conn.execute("DELETE FROM pdfs WHERE created_at <= ?", (now - self.ttl_seconds,))
+                conn.execute(_EVICT, (self.max_bytes,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        except sqlite3.Error as e:
+            logger.warning(f"PDF store write failed: {str(e)}")
+
+    def stats(self) -> dict:
+        """Return this worker's hit/miss counters and the store's shared occupancy."""
+        stats = {"hits": self.hits, "misses": self.misses, "max_bytes": self.max_bytes}
+        if not self.enabled:
+            return stats
+        try:
+            entries, size = self._connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM pdfs").fetchone()
+            stats.update(entries=entries, bytes=size)
+        except sqlite3.Error as e:
+            logger.warning(f"PDF store stats failed: {str(e)}")
+        return stats
+
+
+pdf_store = PDFStore(PDF_STORE_PATH, PDF_STORE_MAX_BYTES, PDF_CACHE_TTL_SECONDS)
@@ -0,0 +1,175 @@
+"""Declarative request schemas, compiled once and validated in a single pass.
+
+Each route declares a Schema of Fields. Building the Schema compiles every
+field into a small validator closure, so validating a body is one walk over
+its fields (and over list elements) that converts values and collects every
+error, instead of stopping at the first one.
+
+Bodies are decoded with orjson, which parses straight from the request bytes
+several times faster than the standard library json module.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Union
+
+import orjson
+
+EMAIL_RE = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+
+
+class ValidationError(ValueError):
+    """A request failed validation. str() is the first message; errors holds all of them."""
+
+    def __init__(self, errors: list[dict]):
+        super().__init__(errors[0]["message"])
+        self.errors = errors
+
+
+def error_body(e: ValueError) -> dict:
+    """JSON body for a 400: the first message as "error" (as before) plus every error."""
+    errors = getattr(e, "errors", None) or [{"field": "", "message": str(e)}]
+    return {"error": str(e), "errors": errors}
+
+
+def decode_json_object(raw: bytes) -> dict:
+    """Decode a request body that must be a JSON object."""
+    try:
+        data = orjson.loads(raw)
+    except ValueError:
+        raise ValidationError([{"field": "", "message": "Request body must be valid JSON"}])
+    if not isinstance(data, dict):
+        raise ValidationError([{"field": "", "message": "Request body must be a JSON object"}])
+    return data
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    One field of a request body.
+
+    kind is "any" (passed through), "number" (converted with float), "list"
+    or "object". A field is missing when it is absent or None, and also when
+    it is blank ("", 0, [], False) unless blank_is_missing is False.
+    """
+    name: str = ""
+    kind: str = "any"
+    required: Optional[str] = None          # message when missing; None means optional
+    invalid: Optional[str] = None           # message when the value has the wrong type
+    default: Any = None
+    blank_is_missing: bool = True
+    check: Optional[Callable[[Any], Any]] = None
+    check_message: Optional[str] = None
+    convert: Optional[Callable[[Any], Any]] = None  # may raise ValueError with a user-facing message
+    each: Optional[Union["Field", "Schema"]] = None  # element spec for list fields
+
+
+@dataclass(frozen=True)
+class Rule:
+    """A cross-field check, run only when the fields it reads are valid."""
+    fields: tuple[str, ...]
+    check: Callable[[dict], Any]
+    message: str
+
+
+def _to_number(value):
+    number = float(value)
+    if not math.isfinite(number):
+        raise ValueError(value)
+    return number
+
+
+def _compile_field(field: Field) -> Callable[[Any, str, list], Any]:
+    """Turn a Field into validator(value, path, errors) -> converted value."""
+    kind = field.kind
+    required = field.required
+    invalid = field.invalid or f"{field.name or 'value'} is invalid"
+    default = field.default
+    blank_is_missing = field.blank_is_missing
+    check = field.check
+    check_message = field.check_message
+    convert = field.convert
+    if isinstance(field.each, Schema):
+        each = field.each.validate_into
+    elif field.each is not None:
+        each = _compile_field(field.each)
+    else:
+        each = None
+
+    def validate(value, path, errors):
+        if value is None or (blank_is_missing and not value):
+            if required:
+                errors.append({"field": path, "message": required})
+            return default
+
+        if kind == "number":
+            try:
+                value = _to_number(value)
+            except (ValueError, TypeError, OverflowError):
+                errors.append({"field": path, "message": invalid})
+                return default
+        elif kind == "list":
+            if not isinstance(value, list):
+                errors.append({"field": path, "message": invalid})
+                return default
+            if each is not None:
+                value = [each(element, f"{path}[{i}]", errors) for i, element in enumerate(value)]
+        elif kind == "object" and not isinstance(value, dict):
+            errors.append({"field": path, "message": invalid})
+            return default
+
+        if check is not None and not check(value):
+            errors.append({"field": path, "message": check_message})
+            return default
+        if convert is not None:
+            try:
+                value = convert(value)
+            except ValueError as e:
+                errors.append({"field": path, "message": str(e)})
+                return default
+        return value
+
+    return validate
+
+
+class Schema:
+    """
+    A compiled object schema. factory, if given, builds the validated value
+    (e.g. a Line_item) from the dict of field values.
+    """
+
+    def __init__(self, *fields: Field, rules: tuple[Rule, ...] = (), factory: Optional[Callable[[dict], Any]] = None):
+        self.fields = fields
+        self.rules = rules
+        self.factory = factory
+        self._validators = tuple((f.name, _compile_field(f)) for f in fields)
+
+    def validate_into(self, data, path: str, errors: list) -> Any:
+        """Validate one object, appending any errors; returns None if data is not an object."""
+        if not isinstance(data, dict):
+            errors.append({"field": path, "message": f"{path or 'Request body'} must be an object"})
+            return None
+        prefix = f"{path}." if path else ""
+        first_error = len(errors)
+        values = {}
+        failed = set()
+        for name, validator in self._validators:
+            before = len(errors)
+            values[name] = validator(data.get(name), prefix + name, errors)
+            if len(errors) != before:
+                failed.add(name)
+        for rule in self.rules:
+            if failed.isdisjoint(rule.fields) and not rule.check(values):
+                errors.append({"field": prefix + rule.fields[0], "message": rule.message})
+        if self.factory is None or len(errors) != first_error:
+            return values
+        return self.factory(values)
+
+    def validate(self, data) -> dict:
+        """Validate a request body and return its values; raises ValidationError with every error."""
+        errors = []
+        values = self.validate_into(data, "", errors)
+        if errors:
+            raise ValidationError(errors)
+        return values
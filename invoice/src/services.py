@@ -1,104 +1,124 @@
-"""Service presets for Every Angle invoice generation."""
+"""Service presets for Every Angle invoice generation.
+
+The catalog lives in data/services.yaml so prices can change without a
+redeploy. It is loaded into an immutable Catalog (an ID index plus the flat
+list the form needs) and replaced as a whole when the file changes, so a
+request always sees one consistent version.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+import yaml
 
 from .invoice import Line_item
 
-# Service categories with preset line items
-SERVICES = {
-    "singing": [
-        {"id": "singing_waiter_duet", "name": "Singing Waiter - After Dessert (Duet)", "item": Line_item(
-            description="Singing Waiter - After Dessert (Duet)", price=650.0)},
-        {"id": "singing_waiter_trio", "name": "Singing Waiter - After Dessert (Trio)", "item": Line_item(
-            description="Singing Waiter - After Dessert (Trio)", price=975.0)},
-    ],
-    "acoustic": [
-        {"id": "acoustic_1pc", "name": "Acoustic - 1 piece - Guitar or Piano - Ceremony and Reception",
-            "item": Line_item(description="Acoustic - 1 piece - Guitar or Piano - Ceremony and Reception", price=280.0)},
-        {"id": "acoustic_duet", "name": "Acoustic - Duet - Guitar and Piano - Ceremony and Reception",
-            "item": Line_item(description="Acoustic - Duet - Guitar and Piano - Ceremony and Reception", price=400.0)},
-    ],
-    "sax": [
-        {"id": "sax_afternoon_solo", "name": "Sax Afternoon (solo + backing tracks)", "item": Line_item(
-            description="Sax Afternoon (solo + backing tracks)", price=350.0)},
-        {"id": "sax_evening_solo", "name": "Sax evening (solo + backing tracks)", "item": Line_item(
-            description="Sax evening (solo + backing tracks)", price=400.0)},
-        {"id": "sax_with_band", "name": "Sax w/ band",
-            "item": Line_item(description="Sax w/ band", price=300.0)},
-        {"id": "sax_and_dj", "name": "Sax & DJ", "item": Line_item(
-            description="Sax & DJ", price=750.0)},
-    ],
-    "bagpipes": [
-        {"id": "bagpipes_arrival_ceremony", "name": "Bagpipes - Arrival - Ceremony",
-            "item": Line_item(description="Bagpipes - Arrival - Ceremony", price=225.0)},
-        {"id": "bagpipes_arrival_speeches", "name": "Bagpipes - Arrival - Speeches",
-            "item": Line_item(description="Bagpipes - Arrival - Speeches", price=300.0)},
-        {"id": "bagpipes_evening_band", "name": "Bagpipes Evening w/ band",
-            "item": Line_item(description="Bagpipes Evening w/ band", price=250.0)},
-    ],
-    "band": [
-        {"id": "band_3pc", "name": "Band (3 piece)", "item": Line_item(
-            description="Band (3 piece)", price=900.0)},
-        {"id": "band_5pc", "name": "Band (5 piece)", "item": Line_item(
-            description="Band (5 piece)", price=1500.0)},
-        {"id": "band_7pc", "name": "Band (7 piece)", "item": Line_item(
-            description="Band (7 piece)", price=2100.0)},
-    ],
-    "film": [
-        {"id": "film_highlights", "name": "Film (Highlights)", "item": Line_item(
-            description="Film (Highlights)", price=995.0)},
-        {"id": "film_highlights_2nd", "name": "Film (Highlights) + 2nd shooter", "item": Line_item(
-            description="Film (Highlights) + 2nd shooter", price=1245.0)},
-        {"id": "film_afternoon_2nd", "name": "Film (Afternoon) + 2nd shooter", "item": Line_item(
-            description="Film (Afternoon) + 2nd shooter", price=1250.0)},
-        {"id": "film_afternoon_dance_2nd", "name": "Film (Afternoon + Dance) + 2nd shooter", "item": Line_item(
-            description="Film (Afternoon + Dance) + 2nd shooter", price=1500.0)},
-        {"id": "film_feature_2nd", "name": "Film (Feature Length) + 2nd shooter", "item": Line_item(
-            description="Film (Feature Length) + 2nd shooter", price=1750.0)},
-        {"id": "film_extended_highlights", "name": "Film (Extended Highlights)", "item": Line_item(
-            description="Film (Extended Highlights)", price=1500.0)},
-        {"id": "film_stills", "name": "Film Stills", "item": Line_item(
-            description="Film Stills", price=100.0)},
-    ],
-    "photo": [
-        {"id": "photos_aisle_speeches", "name": "Photos (aisle to speeches)", "item": Line_item(
-            description="Photos (aisle to speeches)", price=750.0)},
-        {"id": "photo_getting_ready_dancing", "name": "Photo (getting ready to dancing)", "item": Line_item(
-            description="Photo (getting ready to dancing)", price=995.0)},
-        {"id": "photo_posed_group", "name": "Photo (posed group shots)", "item": Line_item(
-            description="Photo (posed group shots)", price=0.0)},
-    ],
-    "dj": [
-        {"id": "dj_only", "name": "DJ only", "item": Line_item(
-            description="DJ only", price=450.0)},
-    ],
-    "other": [
-        {"id": "extended_ceilidh", "name": "Extended Ceilidh",
-            "item": Line_item(description="Extended Ceilidh", price=100.0)},
-        {"id": "late_finish_1am", "name": "Late Finish (1am)", "item": Line_item(
-            description="Late Finish (1am)", price=125.0)},
-        {"id": "late_finish_2am", "name": "Late Finish (2am)", "item": Line_item(
-            description="Late Finish (2am)", price=250.0)},
-    ],
-}
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICES_PATH = os.getenv("SERVICES_PATH", os.path.join(APP_ROOT, "data", "services.yaml"))
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+@dataclass(frozen=True)
+class Catalog:
+    """One loaded version of the service catalog. Never mutated after loading."""
+    version: str
+    by_id: Mapping[str, Line_item]
+    flat: tuple[dict, ...]
+
+
+def _parse_catalog(raw: bytes) -> Catalog:
+    """Build a Catalog from the YAML file contents. Raises ValueError if invalid."""
+    data = yaml.load(raw, Loader=_Loader)
+    if not isinstance(data, dict):
+        raise ValueError("services file must map categories to lists of services")
+
+    by_id = {}
+    flat = []
+    for category, services in data.items():
+        for service in services or []:
+            try:
+                service_id = str(service["id"])
+                name = str(service["name"])
+                price = float(service["price"])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Invalid service in category '{category}': {service!r}")
+            if service_id in by_id:
+                raise ValueError(f"Duplicate service ID '{service_id}'")
+            by_id[service_id] = Line_item(description=name, price=price)
+            flat.append({"id": service_id, "name": name, "category": category, "price": price})
+
+    return Catalog(
+        version=hashlib.sha256(raw).hexdigest()[:16],
+        by_id=MappingProxyType(by_id),
+        flat=tuple(flat),
+    )
+
+
+_lock = threading.Lock()
+_catalog: Optional[Catalog] = None
+_catalog_stat: Optional[tuple[int, int]] = None
+
+
+def _file_stat() -> Optional[tuple[int, int]]:
+    try:
+        st = os.stat(SERVICES_PATH)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def get_catalog() -> Catalog:
+    """
+    Return the current catalog, reloading it if the file changed on disk.
+    A file that fails to load is logged and the previous catalog kept.
+    """
+    global _catalog, _catalog_stat
+    stat = _file_stat()
+    catalog = _catalog
+    if catalog is not None and stat == _catalog_stat:
+        return catalog
+
+    with _lock:
+        if _catalog is not None and stat == _catalog_stat:
+            return _catalog
+        try:
+            with open(SERVICES_PATH, "rb") as f:
+                new_catalog = _parse_catalog(f.read())
+        except (OSError, yaml.YAMLError, ValueError) as e:
+            if _catalog is None:
+                raise
+            logger.error(f"Failed to reload service catalog, keeping version {_catalog.version}: {str(e)}")
+            _catalog_stat = stat
+            return _catalog
+        # Swap in one assignment so readers see the old or the new catalog, never a mix
+        _catalog = new_catalog
+        _catalog_stat = stat
+        logger.info(f"Loaded service catalog version {new_catalog.version} ({len(new_catalog.by_id)} services)")
+        return new_catalog
+
+
+def catalog_version() -> str:
+    """Return the version of the current catalog (changes whenever the file's contents do)."""
+    return get_catalog().version
 
 
 def get_service_by_id(service_id: str) -> Line_item:
     """Get a Line_item by service ID. Raises ValueError if not found."""
-    for category in SERVICES.values():
-        for service in category:
-            if service["id"] == service_id:
-                return service["item"]
-    raise ValueError(f"Service ID '{service_id}' not found")
-
-
-def get_all_services_flat() -> list[dict]:
-    """Return all services as a flat list with category info for frontend."""
-    result = []
-    for category, services in SERVICES.items():
-        for service in services:
-            result.append({
-                "id": service["id"],
-                "name": service["name"],
-                "category": category,
-                "price": service["item"].price,
-            })
-    return result
+    try:
+        return get_catalog().by_id[service_id]
+    except (KeyError, TypeError):  # TypeError: an unhashable id such as a list
+        raise ValueError(f"Service ID '{service_id}' not found")
+
+
+def get_all_services_flat() -> tuple[dict, ...]:
+    """Return all services as a flat list with category info for frontend (read-only)."""
+    return get_catalog().flat
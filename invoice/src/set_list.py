@@ -0,0 +1,162 @@
+"""Set list PDF rendering.
+
+Bands regenerate a set list many times while editing it, usually changing
+one section at a time, so rendering is cached at two levels:
+
+- each section's HTML fragment, keyed by a hash of that section, so only
+  edited sections go back through Jinja;
+- the finished PDF, keyed by a hash of the whole payload, in the shared PDF
+  cache, so an unchanged set list skips rendering entirely.
+
+Both keys include the template (and stylesheet) versions, so editing the
+templates invalidates them. The PDF key also includes the output profile.
+"""
+
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from .assets import STYLESHEET_PATH, asset_version
+from .pdf import write_pdf
+from .pdf_cache import cache_key, get_cached_pdf, store_pdf
+from .pdf_profiles import DEFAULT_PDF_PROFILE, get_profile
+from .templates import SET_LIST_SECTION_TEMPLATE, SET_LIST_TEMPLATE, get_template, template_version
+from .timing import stage
+
+SET_LIST_FRAGMENT_CACHE_SIZE = int(os.getenv("SET_LIST_FRAGMENT_CACHE_SIZE", 1024))
+
+
+class FragmentCache:
+    """In-memory LRU cache of rendered HTML fragments, bounded by entry count."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, str] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def put(self, key: str, html: str) -> None:
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and current occupancy."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+
+fragment_cache = FragmentCache(SET_LIST_FRAGMENT_CACHE_SIZE)
+
+
+def _canonical_json(value) -> str:
+    """Serialize a payload the same way regardless of key order."""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def _render_section(section: dict, section_version: Optional[int], use_cache: bool) -> str:
+    """Render one section's HTML, reusing the cached fragment if the section is unchanged."""
+    if not use_cache:
+        return get_template(SET_LIST_SECTION_TEMPLATE).render(section=section)
+    key = cache_key(section_version, _canonical_json(section))
+    html = fragment_cache.get(key)
+    if html is None:
+        html = get_template(SET_LIST_SECTION_TEMPLATE).render(section=section)
+        fragment_cache.put(key, html)
+    return html
+
+
+def render_set_list(
+    client_name: str,
+    event_date: str,
+    venue: str,
+    sections: list[dict],
+    use_cache: bool = True,
+    profile: Optional[str] = None,
+) -> bytes:
+    """
+    Render a set list to PDF bytes.
+
+    use_cache: If False, render without reading or populating either cache
+        (for benchmarks)
+    profile: Output profile name (see pdf_profiles.py); the default profile if None
+    """
+    pdf_profile = get_profile(profile)
+    section_version = template_version(SET_LIST_SECTION_TEMPLATE)
+
+    key = None
+    if use_cache:
+        key = cache_key(
+            "set_list",
+            _canonical_json([client_name, event_date, venue, sections]),
+            template_version(SET_LIST_TEMPLATE),
+            section_version,
+            pdf_profile,
+            asset_version(STYLESHEET_PATH),
+        )
+        with stage("cache"):
+            cached_pdf = get_cached_pdf(key)
+        if cached_pdf is not None:
+            return cached_pdf
+
+    with stage("jinja"):
+        fragments = [_render_section(section, section_version, use_cache) for section in sections]
+        html = get_template(SET_LIST_TEMPLATE).render(
+            client_name=client_name,
+            event_date=event_date,
+            venue=venue,
+            section_fragments=fragments,
+        )
+
+    pdf_bytes = write_pdf(html, profile=pdf_profile)
+    if use_cache:
+        with stage("cache"):
+            store_pdf(key, pdf_bytes)
+    return pdf_bytes
+
+
+@dataclass
+class SetListTask:
+    """A validated set list ready to render, plus the name to give the PDF."""
+    client_name: str
+    event_date: str
+    venue: str
+    sections: list[dict]
+    filename: str
+    use_cache: bool = True
+    profile: str = DEFAULT_PDF_PROFILE
+
+    def render(self) -> bytes:
+        return render_set_list(
+            self.client_name,
+            self.event_date,
+            self.venue,
+            self.sections,
+            use_cache=self.use_cache,
+            profile=self.profile,
+        )
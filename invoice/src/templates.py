@@ -0,0 +1,71 @@
+"""Process-wide Jinja template registry for PDF documents.
+
+Templates are compiled once per worker and kept in the environment's cache.
+Jinja re-checks each template's mtime on lookup (``auto_reload``), so edits on
+disk are picked up without a restart. Compiled bytecode is also written to an
+on-disk cache so freshly started workers skip the parse step.
+"""
+
+import logging
+import os
+from typing import Optional
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template
+
+logger = logging.getLogger(__name__)
+
+# App root directory (parent of src/)
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATE_DIRS = [APP_ROOT, os.path.join(APP_ROOT, "templates")]
+BYTECODE_CACHE_DIR = os.getenv(
+    "TEMPLATE_CACHE_DIR", os.path.join(APP_ROOT, "cache", "jinja"))
+
+INVOICE_TEMPLATE = "invoice_template.html"
+SET_LIST_TEMPLATE = "set_list_template.html"
+SET_LIST_SECTION_TEMPLATE = "set_list_section.html"
+
+_environment: Optional[Environment] = None
+
+
+def _build_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """Return an on-disk bytecode cache, or None if the directory is unusable."""
+    try:
+        os.makedirs(BYTECODE_CACHE_DIR, exist_ok=True)
+    except OSError as e:
+        logger.warning(
+            f"Template bytecode cache disabled ({BYTECODE_CACHE_DIR}): {str(e)}")
+        return None
+    return FileSystemBytecodeCache(BYTECODE_CACHE_DIR)
+
+
+def get_environment() -> Environment:
+    """Return the shared Jinja environment, creating it on first use."""
+    global _environment
+    if _environment is None:
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIRS),
+            bytecode_cache=_build_bytecode_cache(),
+            auto_reload=True,
+            # Match jinja2.Template defaults used by the original renderers
+            autoescape=False,
+        )
+    return _environment
+
+
+def get_template(name: str) -> Template:
+    """Return a compiled template, recompiling only if the file has changed."""
+    return get_environment().get_template(name)
+
+
+def template_version(name: str) -> Optional[int]:
+    """Return the mtime of a template's source file, so caches can be keyed on edits."""
+    try:
+        return os.stat(get_template(name).filename).st_mtime_ns
+    except OSError:
+        return None
+
+
+def warm_templates() -> None:
+    """Compile all PDF templates up front (e.g. in the gunicorn master)."""
+    for name in (INVOICE_TEMPLATE, SET_LIST_TEMPLATE, SET_LIST_SECTION_TEMPLATE):
+        get_template(name)
@@ -0,0 +1,44 @@
+"""Per-request render stage timings, reported in the Server-Timing header.
+
+app.py starts a recorder for each request; code along the render path wraps
+its work in stage("name"). Outside a request (warm-up, pool processes,
+scripts) no recorder is active and stage() only runs the wrapped block.
+"""
+
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+_timings: ContextVar[Optional[dict[str, float]]] = ContextVar("render_timings", default=None)
+
+
+def start_timing() -> None:
+    """Start recording stages for the current request."""
+    _timings.set({})
+
+
+def finish_timing() -> dict[str, float]:
+    """Stop recording and return {stage: seconds} in the order stages first ran."""
+    timings = _timings.get() or {}
+    _timings.set(None)
+    return timings
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time the wrapped block as stage name (repeated stages are summed)."""
+    timings = _timings.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+def server_timing_header(timings: dict[str, float]) -> str:
+    """Format timings as a Server-Timing header value, e.g. "jinja;dur=3.1, layout;dur=80.4"."""
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items())
@@ -0,0 +1,134 @@
+"""Invoice totals, computed without building any summary rows or documents.
+
+calculate_totals() is the reference calculation: the float arithmetic EV
+invoices have always displayed (discount and deposit rounded with
+round(x, 2), everything else summed as given). generate_ev_invoice and
+generate_receipt use it, and ledger reconciliation can call it directly for
+each booking.
+
+generic_invoice_totals() applies the same rounding to generic invoices (the
+batch CLI), which take a configurable deposit percentage and a single custom
+charge that is part of the total.
+
+to_pence() converts a displayed amount to integer pence exactly as the
+invoice template prints it ("%.2f"), for comparing against the ledger.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import ROUND_HALF_EVEN, Decimal
+from typing import TYPE_CHECKING, Optional, Sequence
+
+from .utils import calculate_amount_due
+
+if TYPE_CHECKING:
+    from .invoice_ev import EVInvoiceOptions
+
+# Deposit taken on EV invoices, as a fraction of the total before charges
+DEPOSIT_RATE = 0.2
+
+_PENNY = Decimal("0.01")
+
+
+def to_pence(amount: float) -> int:
+    """Return the integer pence an amount is displayed as (the template's "%.2f")."""
+    # Decimal(float) is the exact binary value, which is what "%.2f" rounds
+    return int(Decimal(amount).quantize(_PENNY, rounding=ROUND_HALF_EVEN).scaleb(2))
+
+
+@dataclass(frozen=True)
+class Totals:
+    """Totals for one invoice, in pounds as displayed on the invoice."""
+    subtotal: float
+    discount: float
+    travel: float
+    total: float
+    deposit: float
+    charges: float
+    payments: float
+    amount_due: float
+
+
+def _discount(subtotal: float, discount_percent: Optional[float]) -> float:
+    if discount_percent is not None and discount_percent > 0:
+        return round(subtotal * (discount_percent / 100), 2)
+    return 0.0
+
+
+def _deposit(total: float, rate: float) -> float:
+    return round(total * rate, 2)
+
+
+def calculate_totals(
+    options: EVInvoiceOptions,
+    deposit_only: bool = False,
+    amount_due_override: Optional[float] = None,
+) -> Totals:
+    """Compute totals for one invoice."""
+    subtotal = sum(item.price for item in options.line_items)
+    discount = _discount(subtotal, options.discount_percent)
+
+    travel = 0.0
+    if options.travel_cost is not None and options.travel_cost > 0:
+        travel = options.travel_cost
+
+    # Total after discount and travel (before additional charges)
+    total = subtotal - discount + travel
+    deposit = _deposit(total, DEPOSIT_RATE)
+
+    charges = 0.0
+    if options.additional_charges:
+        charges = sum(charge.price for charge in options.additional_charges)
+    payments = 0.0
+    if options.payment_made:
+        payments = sum(item.price for item in options.payment_made)
+
+    amount_due = calculate_amount_due(
+        deposit=deposit,
+        charges_total=charges,
+        payment_total=payments,
+        full_balance_total=total + charges,
+        deposit_only=deposit_only,
+        amount_due_override=amount_due_override,
+    )
+    return Totals(subtotal, discount, travel, total, deposit, charges, payments, amount_due)
+
+
+def generic_invoice_totals(
+    line_items: Sequence,
+    discount_percent: Optional[float] = None,
+    custom_charge: Optional[float] = None,
+    payment_made: Optional[Sequence] = None,
+    deposit_percentage: Optional[float] = None,
+    deposit_only: bool = False,
+    amount_due_override: Optional[float] = None,
+) -> Totals:
+    """
+    Compute a generic invoice's totals. The custom charge (in charges) is
+    included in the total the deposit is taken from, and is also owed on
+    top of the deposit when deposit_only is set. deposit is 0 when
+    deposit_percentage is None.
+    """
+    subtotal = sum(item.price for item in line_items)
+    discount = _discount(subtotal, discount_percent)
+
+    charges = 0.0
+    if custom_charge is not None and custom_charge > 0:
+        charges = custom_charge
+
+    total = subtotal - discount + charges
+    deposit = 0.0
+    if deposit_percentage is not None:
+        deposit = _deposit(total, deposit_percentage / 100)
+    payments = sum(item.price for item in payment_made) if payment_made else 0.0
+
+    amount_due = calculate_amount_due(
+        deposit=deposit,
+        charges_total=charges,
+        payment_total=payments,
+        full_balance_total=total,
+        deposit_only=deposit_only,
+        amount_due_override=amount_due_override,
+    )
+    return Totals(subtotal, discount, 0.0, total, deposit, charges, payments, amount_due)
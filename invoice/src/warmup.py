@@ -0,0 +1,48 @@
+"""Worker warm-up so the first real request is not the slow one.
+
+The first render in a fresh process pays for font discovery, stylesheet
+parsing and WeasyPrint's first layout. warm_worker() pays that cost up front
+by rendering a throwaway invoice, and records that the worker is ready.
+"""
+
+import logging
+import time
+
+from .ev_config import EV_CONFIG
+from .generic_invoice import create_generic_invoice
+from .invoice import Invoice, Line_item, Section
+
+logger = logging.getLogger(__name__)
+
+_warm = False
+
+
+def is_warm() -> bool:
+    """Return True once this worker has completed its warm-up render."""
+    return _warm
+
+
+def warm_worker() -> None:
+    """Render a throwaway invoice with EV_CONFIG to warm fonts, CSS and layout."""
+    global _warm
+    start = time.monotonic()
+    item = Line_item(description="Warm-up", price=0.0)
+    invoice = Invoice(
+        customer_name="Warm-up",
+        invoice_number="WARMUP",
+        title="Warm-up",
+        sections=[
+            Section(heading="Items", rows=(item,)),
+            Section(heading="Totals", rows=(
+                Line_item(description="Amount Due", price=0.0, bold=True),
+            )),
+        ],
+    )
+    try:
+        # Bypass the PDF cache: a cached result would skip the work we want done
+        create_generic_invoice(invoice, EV_CONFIG, return_bytes=True, use_cache=False)
+    except Exception as e:
+        # A failed warm-up only means the first request is slower; keep serving
+        logger.error(f"Worker warm-up render failed: {str(e)}", exc_info=True)
+    _warm = True
+    logger.info(f"Worker warm-up finished in {time.monotonic() - start:.2f}s")
@@ -0,0 +1,19 @@
+"""Shared test setup.
+
+Every cache, store and database path is pointed at a throwaway directory
+before any src module reads its environment variables, so tests never touch
+the real cache/ directory or each other's state.
+"""
+
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="invoice-tests-")
+for _name, _path in {
+    "TEMPLATE_CACHE_DIR": "jinja",
+    "LOGO_CACHE_DIR": "logos",
+    "PDF_STORE_PATH": "pdf_store.sqlite3",
+    "JOBS_DB_PATH": "jobs.sqlite3",
+    "METRICS_DB_PATH": "metrics.sqlite3",
+}.items():
+    os.environ[_name] = os.path.join(_TMP, _path)
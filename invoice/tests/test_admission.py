@@ -0,0 +1,191 @@
+import threading
+import time
+
+import pytest
+
+from src import admission
+from src.admission import (
+    AdmissionController,
+    Rejected,
+    finish_admission,
+    render_slot,
+    request_start_time,
+    start_admission,
+)
+
+
+def _hold_slots(controller, route, count, release):
+    """Start count threads that take a slot (or wait for one) and hold it until release is set."""
+    results = []
+
+    def run():
+        try:
+            ticket = controller.admit(route)
+        except Rejected as e:
+            results.append(e)
+            return
+        results.append(ticket)
+        release.wait(10)
+        controller.release(ticket)
+
+    threads = [threading.Thread(target=run) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_full_queue_is_rejected_with_retry_after():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, deadline_seconds=30)
+    release = threading.Event()
+    threads, results = _hold_slots(controller, "/generate", 3, release)
+    _wait_until(lambda: controller.stats()["queued"] == 2)
+
+    with pytest.raises(Rejected) as rejected:
+        controller.admit("/generate")
+    assert rejected.value.reason == "queue_full"
+    assert rejected.value.retry_after >= 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(not isinstance(result, Rejected) for result in results)
+    assert controller.stats()["running"] == 0
+
+
+def test_deadline_counts_from_arrival():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, deadline_seconds=10)
+    controller._costs["/generate"] = 2.0
+    # Arrived 9s ago: a 2s render can no longer finish within 10s
+    with pytest.raises(Rejected) as rejected:
+        controller.admit("/generate", time.time() - 9)
+    assert rejected.value.reason == "deadline"
+    ticket = controller.admit("/generate", time.time() - 5)
+    controller.release(ticket)
+
+
+def test_waiting_request_gives_up_before_its_deadline():
+    controller = AdmissionController(max_concurrent=1, max_queue=4, deadline_seconds=0.3)
+    release = threading.Event()
+    threads, _ = _hold_slots(controller, "/generate", 1, release)
+    _wait_until(lambda: controller.stats()["running"] == 1)
+    with pytest.raises(Rejected) as rejected:
+        controller.admit("/generate")
+    assert rejected.value.reason == "deadline"
+    release.set()
+    threads[0].join()
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("garbage", None),
+    ("t=999.5", 999.5),
+    ("999500", 999.5),
+    ("999500000", 999.5),
+    ("t=2000", None),  # in the future
+])
+def test_request_start_time(header, expected):
+    assert request_start_time(header, now=1000.0) == expected
+
+
+@pytest.fixture
+def app_module():
+    try:
+        # Imports the renderer, and with it WeasyPrint and its system libraries
+        import app
+    except (ImportError, OSError) as e:
+        pytest.skip(f"WeasyPrint is not usable here: {e}")
+    return app
+
+
+def test_render_slot_is_taken_only_for_admitted_requests(monkeypatch):
+    controller = AdmissionController(max_concurrent=1, max_queue=0, deadline_seconds=30)
+    monkeypatch.setattr(admission, "admission", controller)
+    with render_slot():
+        assert controller.stats()["running"] == 0
+
+    start_admission("/r", None)
+    try:
+        with render_slot():
+            assert controller.stats()["running"] == 1
+            # Nested renders (e.g. a bundle's documents) share the slot
+            with render_slot():
+                assert controller.stats()["running"] == 1
+    finally:
+        finish_admission()
+    assert controller.stats()["running"] == 0
+    assert controller.stats()["admitted"] == 1
+
+
+@pytest.fixture
+def busy_app(app_module, monkeypatch):
+    """The app with a 1-slot, 2-place controller whose renders block until release is set."""
+    from src import pdf
+
+    controller = AdmissionController(max_concurrent=1, max_queue=2, deadline_seconds=30)
+    monkeypatch.setattr(admission, "admission", controller)
+    release = threading.Event()
+    render_document = pdf.render_document
+
+    def slow_render_document(*args, **kwargs):
+        release.wait(10)
+        return render_document(*args, **kwargs)
+
+    monkeypatch.setattr(pdf, "render_document", slow_render_document)
+    client = app_module.app.test_client()
+    yield client, controller, release
+    release.set()
+
+
+def _set_list(name):
+    return {"client_name": name, "event_date": "1 May", "sections": [{"name": "Set 1", "songs": [{"title": "Song"}]}]}
+
+
+def _fill_slot_and_queue(client, controller, body):
+    responses = []
+
+    def post():
+        responses.append(client.post("/set-list", json=body))
+
+    threads = [threading.Thread(target=post) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    _wait_until(lambda: controller.stats()["running"] == 1 and controller.stats()["queued"] == 2)
+    return threads, responses
+
+
+def test_renders_beyond_slots_and_queue_get_503(busy_app):
+    """More concurrent renders than slots plus queue places: the excess is turned away."""
+    client, controller, release = busy_app
+    threads, responses = _fill_slot_and_queue(client, controller, _set_list("Busy"))
+
+    rejected = client.post("/set-list", json=_set_list("Rejected"))
+    assert rejected.status_code == 503
+    assert int(rejected.headers["Retry-After"]) >= 1
+
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert [response.status_code for response in responses] == [200, 200, 200]
+
+
+def test_invalid_requests_and_cache_hits_skip_the_slot(busy_app):
+    client, controller, release = busy_app
+    release.set()
+    assert client.post("/set-list", json=_set_list("Cached")).status_code == 200
+    release.clear()
+    threads, _ = _fill_slot_and_queue(client, controller, _set_list("Busy too"))
+
+    assert client.post("/set-list", json={"event_date": "1 May"}).status_code == 400
+    assert client.post("/set-list", json=_set_list("Cached")).status_code == 200
+    assert controller.stats()["admitted"] == 2  # the cached render and the running one
+
+    release.set()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,141 @@
+import os
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import pytest
+from PIL import Image
+
+from src import assets
+from src.pdf_profiles import get_profile
+
+
+@pytest.fixture(autouse=True)
+def fresh_assets(monkeypatch):
+    monkeypatch.setattr(assets, "_assets", OrderedDict())
+    monkeypatch.setattr(assets, "_asset_bytes", 0)
+    monkeypatch.setattr(assets, "_allowed_paths", set())
+
+
+def test_registered_asset_is_served_from_memory(tmp_path):
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"png-bytes")
+    url = assets.asset_url(str(logo))
+    assert assets.fetch_asset(url) == {"string": b"png-bytes", "mime_type": "image/png", "redirected_url": url}
+
+
+@pytest.mark.parametrize("name", [".env", "requirements.txt", os.path.join("cache", "pdf_store.sqlite3")])
+def test_unregistered_local_files_are_refused(name):
+    # Anything under the app root used to be readable, e.g. through an <img> in a line item
+    url = f"file://{os.path.join(assets.APP_ROOT, name)}"
+    with pytest.raises(ValueError, match="unregistered"):
+        assets.fetch_asset(url)
+    assert not assets._assets
+
+
+def test_stylesheet_registers_the_fonts_it_references(tmp_path):
+    (tmp_path / "fonts").mkdir()
+    font = tmp_path / "fonts" / "DejaVuSans.ttf"
+    font.write_bytes(b"font")
+    other = tmp_path / "secret.txt"
+    other.write_bytes(b"secret")
+    css = tmp_path / "style.css"
+    css.write_text('@font-face { src: url("fonts/DejaVuSans.ttf") format("truetype"), url(data:x); }')
+
+    assert assets.stylesheet_url(str(css)) == css.as_uri()
+    assert assets.fetch_asset(font.as_uri())["string"] == b"font"
+    with pytest.raises(ValueError):
+        assets.fetch_asset(other.as_uri())
+
+
+def test_cache_is_bounded_by_bytes(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "ASSET_CACHE_MAX_BYTES", 25)
+    paths = []
+    for name in "abc":
+        path = tmp_path / name
+        path.write_bytes(name.encode() * 10)
+        paths.append(str(path))
+        assets.load_asset(str(path))
+    # a was evicted first; b and c fit in 25 bytes
+    assert list(assets._assets) == paths[1:]
+    assert assets._asset_bytes == 20
+
+    # Too large to cache at all, but still returned
+    big = tmp_path / "big"
+    big.write_bytes(b"x" * 100)
+    assert assets.load_asset(str(big))[0] == b"x" * 100
+    assert str(big) not in assets._assets
+    assert assets._asset_bytes <= 25
+
+
+@pytest.fixture
+def logo_cache(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "logos"
+    monkeypatch.setattr(assets, "LOGO_CACHE_DIR", str(cache_dir))
+    monkeypatch.setattr(assets, "_logos", {})
+    return cache_dir
+
+
+def _write_image(tmp_path, name, size, mode="RGB", fmt="PNG", noise=True):
+    image = Image.new(mode, size, "white")
+    if noise:
+        # Photo-like content that compresses poorly
+        image = Image.merge(mode, [Image.effect_noise(size, 64)] * len(mode))
+    path = tmp_path / name
+    image.save(path, fmt)
+    return path
+
+
+def test_bundled_logo_is_never_made_larger(logo_cache):
+    path = os.path.join(assets.APP_ROOT, "static", "logo.png")
+    for dpi in (96, 150, 300):
+        optimized = assets.optimized_logo_path(path, dpi)
+        assert os.path.getsize(optimized) <= os.path.getsize(path)
+
+
+def test_large_logo_is_downscaled_and_stripped(tmp_path, logo_cache):
+    path = _write_image(tmp_path, "photo.png", (3000, 1500))
+    optimized = assets.optimized_logo_path(str(path), 96)
+    assert optimized.startswith(str(logo_cache))
+    assert os.path.getsize(optimized) < os.path.getsize(path)
+    with Image.open(optimized) as image:
+        assert image.size == (300, 150)
+        assert "exif" not in image.info
+
+
+def test_logo_already_at_target_size_is_used_as_is(tmp_path, logo_cache):
+    path = _write_image(tmp_path, "small.png", (200, 100))
+    assert assets.optimized_logo_path(str(path), 300) == str(path)
+    assert not logo_cache.exists()
+
+
+@pytest.mark.parametrize("mode, fmt, noise", [
+    ("RGB", "PNG", True),
+    ("RGB", "PNG", False),
+    ("RGBA", "PNG", False),
+    ("RGB", "JPEG", True),
+    ("L", "PNG", False),
+])
+def test_optimized_logo_is_never_larger_than_its_input(tmp_path, logo_cache, mode, fmt, noise):
+    path = _write_image(tmp_path, f"logo.{fmt.lower()}", (1600, 900), mode, fmt, noise)
+    for dpi in (96, 300, 600):
+        optimized = assets.optimized_logo_path(str(path), dpi)
+        assert os.path.getsize(optimized) <= os.path.getsize(path)
+
+
+def test_optimized_logo_gets_the_default_file_mode(tmp_path, logo_cache):
+    path = _write_image(tmp_path, "photo.png", (3000, 1500))
+    optimized = assets.optimized_logo_path(str(path), 96)
+    assert optimized != str(path)
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(optimized).st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_default_profile_keeps_the_logo_as_supplied(tmp_path, logo_cache):
+    path = _write_image(tmp_path, "photo.png", (3000, 1500))
+    config = SimpleNamespace(logo_path=str(path))
+    profile = get_profile()
+    assert assets.logo_url(config, profile.dpi) == assets.asset_url(str(path))
+    assert not logo_cache.exists()
+    # No image options: WeasyPrint's defaults, as before profiles existed
+    assert not profile.optimize_images and profile.jpeg_quality is None
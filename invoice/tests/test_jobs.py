@@ -0,0 +1,59 @@
+from concurrent.futures import Future
+from types import SimpleNamespace
+
+import pytest
+
+try:
+    # Imports the render pool, and with it WeasyPrint and its system libraries
+    from src import jobs
+    from src.jobs import JobStore, _record_crash, submit_job
+except (ImportError, OSError) as e:
+    pytest.skip(f"WeasyPrint is not usable here: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = JobStore(str(tmp_path / "jobs.sqlite3"), retention_seconds=60)
+    monkeypatch.setattr(jobs, "job_store", store)
+    return store
+
+
+def test_cancelled_job_is_marked_failed(store):
+    job_id = store.create("invoice", "invoice.pdf")
+    future = Future()
+    future.cancel()
+    _record_crash(job_id, future)
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert "cancelled" in job["error"]
+
+
+def test_crashed_job_is_marked_failed(store):
+    job_id = store.create("invoice", "invoice.pdf")
+    future = Future()
+    future.set_exception(RuntimeError("boom"))
+    _record_crash(job_id, future)
+    assert store.get(job_id)["error"] == "Render worker crashed: boom"
+
+
+def test_finished_job_is_left_alone(store):
+    job_id = store.create("invoice", "invoice.pdf")
+    store.complete(job_id, b"%PDF")
+    future = Future()
+    future.set_result(None)
+    _record_crash(job_id, future)
+    assert store.get(job_id)["status"] == "done"
+
+
+def test_job_whose_submit_fails_is_marked_failed(store, monkeypatch):
+    def broken_submit(*args, **kwargs):
+        raise RuntimeError("cannot schedule new futures after shutdown")
+
+    monkeypatch.setattr(jobs, "submit_task", broken_submit)
+    with pytest.raises(RuntimeError):
+        submit_job("invoice", SimpleNamespace(filename="invoice.pdf", profile="email"))
+    (job_id,), = store._connection().execute("SELECT id FROM jobs").fetchall()
+    job = store.get(job_id)
+    assert job["status"] == "failed"
+    assert "Could not start render" in job["error"]
+    assert job["profile"] == "email"
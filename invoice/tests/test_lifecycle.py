@@ -0,0 +1,65 @@
+import multiprocessing
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src import lifecycle, metrics
+from src.lifecycle import WorkerLifecycle
+
+MB = 1024 * 1024
+
+
+def test_request_limit_includes_jitter():
+    worker = WorkerLifecycle(max_requests=10, requests_jitter=5, max_rss_mb=0, rss_jitter=0)
+    reasons = [worker.recycle_reason() for _ in range(16)]
+    assert 10 <= worker.request_limit <= 15
+    first = next(i for i, reason in enumerate(reasons) if reason is not None)
+    assert first == worker.request_limit - 1
+    assert reasons[first][0] == "requests"
+
+
+def test_rss_ceiling_is_lowered_by_jitter(monkeypatch):
+    monkeypatch.setattr(lifecycle, "rss_bytes", lambda: 95 * MB)
+    monkeypatch.setattr(lifecycle, "children_rss_bytes", lambda: 0)
+    worker = WorkerLifecycle(max_requests=0, requests_jitter=0, max_rss_mb=100, rss_jitter=0.1)
+    reason = worker.recycle_reason()
+    assert 90 * MB <= worker.rss_limit <= 100 * MB
+    assert (reason is not None) == (worker.rss_limit <= 95 * MB)
+
+
+def test_render_pool_rss_counts_towards_the_ceiling(monkeypatch):
+    monkeypatch.setattr(lifecycle, "rss_bytes", lambda: 60 * MB)
+    monkeypatch.setattr(lifecycle, "children_rss_bytes", lambda: 60 * MB)
+    worker = WorkerLifecycle(max_requests=0, requests_jitter=0, max_rss_mb=100, rss_jitter=0)
+    cause, description = worker.recycle_reason()
+    assert cause == "rss"
+    assert "120 MB" in description
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"), reason="needs /proc")
+def test_children_rss_includes_pool_processes():
+    ctx = multiprocessing.get_context("spawn")
+    child = ctx.Process(target=time.sleep, args=(30,))
+    child.start()
+    try:
+        assert metrics.children_rss_bytes() > 0
+    finally:
+        child.terminate()
+        child.join()
+    assert metrics.children_rss_bytes() == 0
+
+
+def test_disabled_limits_never_recycle(monkeypatch):
+    monkeypatch.setattr(lifecycle, "rss_bytes", lambda: 10_000 * MB)
+    worker = WorkerLifecycle(max_requests=0, requests_jitter=0, max_rss_mb=0, rss_jitter=0)
+    assert all(worker.recycle_reason() is None for _ in range(100))
+
+
+@pytest.mark.parametrize("alive", [True, False])
+def test_after_request_retires_worker_once(monkeypatch, alive):
+    monkeypatch.setattr(lifecycle, "lifecycle", WorkerLifecycle(1, 0, 0, 0))
+    worker = SimpleNamespace(alive=alive)
+    lifecycle.after_request(worker)
+    assert worker.alive is False
@@ -0,0 +1,49 @@
+import pytest
+
+from src.metrics import LATENCY_BUCKETS, MetricsStore, format_labels
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"), flush_seconds=3600)
+    commits = []
+    commit = store._commit
+    monkeypatch.setattr(store, "_commit", lambda adds, sets: (commits.append((adds, sets)), commit(adds, sets)))
+    store.commits = commits
+    return store
+
+
+def test_updates_are_buffered_until_flushed(store):
+    labels = format_labels(route="/health", method="GET", status=200)
+    for _ in range(100):
+        store.inc("invoice_http_requests_total", labels)
+        store.add_gauge("invoice_http_requests_in_flight", "", 1)
+        store.add_gauge("invoice_http_requests_in_flight", "", -1)
+    assert store.commits == []
+
+    store.flush()
+    assert len(store.commits) == 1
+    store.flush()
+    assert len(store.commits) == 1  # nothing new to write
+
+    text = store.render()
+    assert f'invoice_http_requests_total{{{labels}}} 100' in text
+    assert "invoice_http_requests_in_flight 0" in text
+
+
+def test_scrape_includes_this_workers_buffered_updates(store):
+    store.observe("invoice_http_request_duration_seconds", format_labels(route="/"), 0.2, LATENCY_BUCKETS)
+    store.set_gauge("process_resident_memory_bytes", "", 1)
+    store.set_gauge("process_resident_memory_bytes", "", 2)
+    text = store.render()
+    assert 'invoice_http_request_duration_seconds_bucket{route="/",le="0.1"} 0' in text
+    assert 'invoice_http_request_duration_seconds_bucket{route="/",le="0.25"} 1' in text
+    assert 'invoice_http_request_duration_seconds_count{route="/"} 1' in text
+    assert "process_resident_memory_bytes{pid=" in text and "} 2" in text
+
+
+def test_zero_flush_interval_writes_through(tmp_path):
+    store = MetricsStore(str(tmp_path / "metrics.sqlite3"), flush_seconds=0)
+    store.inc("invoice_worker_recycles_total", format_labels(cause="rss"))
+    assert store._adds == {}
+    assert 'invoice_worker_recycles_total{cause="rss"} 1' in store.render()
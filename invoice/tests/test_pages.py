@@ -0,0 +1,29 @@
+import re
+
+import pytest
+
+try:
+    # Imports the renderer, and with it WeasyPrint and its system libraries
+    import app as app_module
+except (ImportError, OSError) as e:
+    pytest.skip(f"WeasyPrint is not usable here: {e}", allow_module_level=True)
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/", "/generic"])
+def test_form_is_served_with_an_etag(client, path):
+    response = client.get(path)
+    assert response.status_code == 200
+    etag = response.headers["ETag"].strip('"')
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_static_urls_are_hashed_and_cached_forever(client):
+    html = client.get("/").get_data(as_text=True)
+    url = re.search(r'href="(/static/logo\.png\?v=[0-9a-f]+)"', html).group(1)
+    assert client.get(url).headers["Cache-Control"] == "public, max-age=31536000, immutable"
+    assert client.get("/static/logo.png").headers["Cache-Control"] == "no-cache"
@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from src import pdf_cache as pdf_cache_module
+from src.pdf_cache import PDFCache, cache_key, get_cached_pdf, store_pdf
+from src.pdf_store import PDFStore
+
+
+class Clock:
+    """Stands in for time.time and time.monotonic."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(time, "time", clock)
+    monkeypatch.setattr(time, "monotonic", clock)
+    return clock
+
+
+@pytest.fixture
+def caches(tmp_path, monkeypatch):
+    cache = PDFCache(max_bytes=1024, ttl_seconds=60)
+    store = PDFStore(str(tmp_path / "pdf_store.sqlite3"), max_bytes=1024, ttl_seconds=60)
+    monkeypatch.setattr(pdf_cache_module, "pdf_cache", cache)
+    monkeypatch.setattr(pdf_cache_module, "pdf_store", store)
+    return cache, store
+
+
+def test_cache_key_separates_parts():
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+    assert cache_key("a", b"b", 1) == cache_key("a", b"b", 1)
+
+
+def test_lru_eviction_by_bytes():
+    cache = PDFCache(max_bytes=25, ttl_seconds=60)
+    cache.put("a", b"a" * 10)
+    cache.put("b", b"b" * 10)
+    assert cache.get("a") == b"a" * 10  # a is now the most recently used
+    cache.put("c", b"c" * 10)
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] == 20
+
+    cache.put("big", b"x" * 100)
+    assert cache.get("big") is None
+    assert cache.stats()["bytes"] == 20
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PDFCache(max_bytes=1024, ttl_seconds=60)
+    cache.put("a", b"pdf")
+    clock.now += 59
+    assert cache.get("a") == b"pdf"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_put_keeps_the_original_render_time(clock):
+    cache = PDFCache(max_bytes=1024, ttl_seconds=60)
+    cache.put("a", b"pdf", created_at=clock.now - 50)
+    clock.now += 9
+    assert cache.get("a") == b"pdf"
+    clock.now += 1
+    assert cache.get("a") is None
+
+    cache.put("b", b"pdf", created_at=clock.now - 60)
+    assert cache.get("b") is None
+
+
+def test_shared_store_entries_expire(clock, caches):
+    cache, store = caches
+    store_pdf("k", b"pdf")
+    cache.clear()
+    clock.now += 30
+    assert get_cached_pdf("k") == b"pdf"
+    # Re-read from the store 30s after rendering: still expires 60s after rendering
+    clock.now += 30
+    assert get_cached_pdf("k") is None
+    assert store.get("k") is None
+
+
+def test_expired_store_entries_are_dropped_on_write(clock, caches):
+    _, store = caches
+    store.put("old", b"pdf")
+    clock.now += 61
+    store.put("new", b"pdf")
+    assert store.stats()["entries"] == 1
@@ -0,0 +1,83 @@
+import pytest
+
+from src.invoice import Line_item
+from src.schema import Field, Rule, Schema, ValidationError, decode_json_object, error_body
+
+ITEM = Schema(
+    Field("description", required="Description is required"),
+    Field("price", kind="number", blank_is_missing=False, required="Price is required",
+          invalid="Price must be a number"),
+    factory=lambda v: Line_item(v["description"], v["price"]),
+)
+
+ORDER = Schema(
+    Field("name", required="Name is required"),
+    Field("items", kind="list", default=[], invalid="items must be a list", each=ITEM),
+    Field("discount", kind="number", invalid="Discount must be a number",
+          check=lambda d: 0 <= d <= 100, check_message="Discount must be 0-100"),
+    Field("note", default="none"),
+    rules=(Rule(("items",), lambda v: v["items"], "At least one item is required"),),
+)
+
+
+def test_valid_body_is_converted():
+    values = ORDER.validate({"name": "A", "items": [{"description": "x", "price": "2.5"}], "discount": 10})
+    assert values == {"name": "A", "items": [Line_item("x", 2.5)], "discount": 10.0, "note": "none"}
+
+
+def test_collects_every_error_with_paths():
+    with pytest.raises(ValidationError) as exc:
+        ORDER.validate({"items": [{"price": "abc"}, "oops"], "discount": 150})
+    assert exc.value.errors == [
+        {"field": "name", "message": "Name is required"},
+        {"field": "items[0].description", "message": "Description is required"},
+        {"field": "items[0].price", "message": "Price must be a number"},
+        {"field": "items[1]", "message": "items[1] must be an object"},
+        {"field": "discount", "message": "Discount must be 0-100"},
+    ]
+    # The first message stays the top-level "error" for older clients
+    assert error_body(exc.value)["error"] == "Name is required"
+
+
+def test_rules_only_run_on_valid_fields():
+    with pytest.raises(ValidationError) as exc:
+        ORDER.validate({"name": "A"})
+    assert exc.value.errors == [{"field": "items", "message": "At least one item is required"}]
+
+    with pytest.raises(ValidationError) as exc:
+        ORDER.validate({"name": "A", "items": "nope"})
+    assert [e["message"] for e in exc.value.errors] == ["items must be a list"]
+
+
+def test_zero_price_is_not_missing():
+    assert ORDER.validate({"name": "A", "items": [{"description": "x", "price": 0}]})["items"] == [Line_item("x", 0.0)]
+
+
+def test_element_check_runs_before_convert():
+    def lookup(code):
+        return {"a": 1}[code]  # would raise TypeError on a list
+
+    codes = Schema(Field("codes", kind="list", each=Field(
+        check=lambda code: isinstance(code, str), check_message="Code must be a string", convert=lookup)))
+    with pytest.raises(ValidationError) as exc:
+        codes.validate({"codes": ["a", ["x"]]})
+    assert exc.value.errors == [{"field": "codes[1]", "message": "Code must be a string"}]
+
+
+@pytest.mark.parametrize("value", ["nan", "inf", float("inf")])
+def test_non_finite_numbers_are_invalid(value):
+    with pytest.raises(ValidationError):
+        ORDER.validate({"name": "A", "items": [{"description": "x", "price": value}]})
+
+
+@pytest.mark.parametrize("raw, message", [
+    (b"{not json", "Request body must be valid JSON"),
+    (b"[1, 2]", "Request body must be a JSON object"),
+])
+def test_decode_json_object_rejects(raw, message):
+    with pytest.raises(ValidationError, match=message):
+        decode_json_object(raw)
+
+
+def test_decode_json_object():
+    assert decode_json_object(b'{"a": [1, 2.5]}') == {"a": [1, 2.5]}
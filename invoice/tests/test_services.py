@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from src import services
+
+CATALOG = b"""
+singing:
+  - id: duet
+    name: Duet
+    price: 650
+sax:
+  - id: solo
+    name: Sax solo
+    price: 350.5
+"""
+
+
+@pytest.fixture
+def catalog_file(tmp_path, monkeypatch):
+    path = tmp_path / "services.yaml"
+    path.write_bytes(CATALOG)
+    monkeypatch.setattr(services, "SERVICES_PATH", str(path))
+    monkeypatch.setattr(services, "_catalog", None)
+    monkeypatch.setattr(services, "_catalog_stat", None)
+    return path
+
+
+def _rewrite(path, content: bytes):
+    # Bump the mtime explicitly; some filesystems have coarse timestamps
+    stat = path.stat()
+    path.write_bytes(content)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_loads_index_and_flat_list(catalog_file):
+    assert services.get_service_by_id("duet").price == 650.0
+    assert services.get_all_services_flat() == (
+        {"id": "duet", "name": "Duet", "category": "singing", "price": 650.0},
+        {"id": "solo", "name": "Sax solo", "category": "sax", "price": 350.5},
+    )
+    with pytest.raises(ValueError, match="not found"):
+        services.get_service_by_id("missing")
+
+
+@pytest.mark.parametrize("service_id", [["duet"], {"id": "duet"}])
+def test_unhashable_id_is_not_found(catalog_file, service_id):
+    with pytest.raises(ValueError, match="not found"):
+        services.get_service_by_id(service_id)
+
+
+def test_reloads_when_file_changes(catalog_file):
+    version = services.catalog_version()
+    _rewrite(catalog_file, CATALOG.replace(b"650", b"700"))
+    assert services.get_service_by_id("duet").price == 700.0
+    assert services.catalog_version() != version
+
+
+def test_keeps_previous_catalog_when_reload_fails(catalog_file):
+    version = services.catalog_version()
+    _rewrite(catalog_file, b"singing:\n  - id: duet\n    name: Duet\n")  # no price
+    assert services.catalog_version() == version
+    assert services.get_service_by_id("duet").price == 650.0
+
+
+@pytest.mark.parametrize("content, message", [
+    (b"- just a list", "must map categories"),
+    (b"a:\n  - {id: x, name: X, price: 1}\nb:\n  - {id: x, name: Y, price: 2}\n", "Duplicate service ID"),
+])
+def test_rejects_invalid_catalogs(content, message):
+    with pytest.raises(ValueError, match=message):
+        services._parse_catalog(content)
@@ -0,0 +1,42 @@
+import os
+
+import pytest
+
+from src import templates
+from src.templates import INVOICE_TEMPLATE, get_template, template_version
+
+
+@pytest.fixture
+def template_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(templates, "TEMPLATE_DIRS", [str(tmp_path)])
+    monkeypatch.setattr(templates, "_environment", None)
+    return tmp_path
+
+
+def test_templates_are_compiled_once():
+    assert get_template(INVOICE_TEMPLATE) is get_template(INVOICE_TEMPLATE)
+
+
+def test_edited_template_is_recompiled(template_dir):
+    path = template_dir / "doc.html"
+    path.write_text("Hello {{ name }}")
+    assert get_template("doc.html").render(name="A") == "Hello A"
+    version = template_version("doc.html")
+
+    stat = path.stat()
+    path.write_text("Bye {{ name }}")
+    # Bump the mtime explicitly; some filesystems have coarse timestamps
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert get_template("doc.html").render(name="A") == "Bye A"
+    assert template_version("doc.html") != version
+
+
+def test_compiled_templates_are_written_to_the_bytecode_cache(template_dir):
+    (template_dir / "doc.html").write_text("{{ 1 + 1 }}")
+    get_template("doc.html")
+    assert os.listdir(templates.BYTECODE_CACHE_DIR)
+
+
+def test_autoescape_is_off_like_the_original_renderers(template_dir):
+    (template_dir / "doc.html").write_text("{{ html }}")
+    assert get_template("doc.html").render(html="<b>x</b>") == "<b>x</b>"
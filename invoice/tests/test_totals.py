@@ -0,0 +1,81 @@
+import pytest
+
+from src.invoice import Line_item
+from src.invoice_ev import EVInvoiceOptions, generate_ev_invoice
+from src.totals import Totals, calculate_totals, generic_invoice_totals, to_pence
+
+
+def _options(prices, discount_percent=None, travel_cost=None, charges=(), payments=()):
+    return EVInvoiceOptions(
+        customer_name="C", event_date="d", venue="v", invoice_number="1",
+        line_items=[Line_item("item", price) for price in prices],
+        discount_percent=discount_percent,
+        travel_cost=travel_cost,
+        additional_charges=[Line_item("charge", price) for price in charges] or None,
+        payment_made=[Line_item("payment", price) for price in payments] or None,
+    )
+
+
+def test_invoice_rows_show_the_totals():
+    options = _options([3.35, 3.35, 3.35], discount_percent=10, travel_cost=25.5, charges=[15.0], payments=[40.0])
+    totals = calculate_totals(options)
+    summary = {row.description: row.price for row in generate_ev_invoice(options).sections[1].rows}
+    assert summary == {
+        "Subtotal": totals.subtotal,
+        "Discount (10%)": -totals.discount,
+        "Travel Cost": totals.travel,
+        "Total": totals.total,
+        "Deposit (20%)": totals.deposit,
+        "charge": 15.0,
+        "payment": -40.0,
+    }
+
+
+@pytest.mark.parametrize("prices, discount, expected", [
+    # The float sum is 0.44999..., so 10% rounds down, as it always has
+    ([0.15, 0.15, 0.15], 10, {"discount": 0.04}),
+    ([10.05], 10, {"discount": 1.01, "deposit": 1.81}),
+    # Sub-penny prices are kept as given, not rounded to pence on input
+    ([2.675], None, {"subtotal": 2.675, "total": 2.675, "deposit": 0.54}),
+])
+def test_amounts_match_the_float_calculation(prices, discount, expected):
+    totals = calculate_totals(_options(prices, discount_percent=discount))
+    for name, value in expected.items():
+        assert getattr(totals, name) == value
+
+
+def test_amount_due_rules():
+    options = _options([100.0], charges=[10.0], payments=[50.0])
+    assert calculate_totals(options).amount_due == 60.0
+    assert calculate_totals(options, deposit_only=True).amount_due == 0
+    assert calculate_totals(_options([100.0], charges=[10.0]), deposit_only=True).amount_due == 30.0
+    assert calculate_totals(options, amount_due_override=12.5).amount_due == 12.5
+
+
+def test_very_large_prices():
+    totals = calculate_totals(_options([1e17, 1e300]))
+    assert totals.subtotal == 1e17 + 1e300
+
+
+@pytest.mark.parametrize("amount", [2.675, 1.005, -3.335, 0.125, 1e17, 0.0, 99.99])
+def test_to_pence_matches_display(amount):
+    displayed = "%.2f" % amount
+    assert to_pence(amount) == round(float(displayed) * 100)
+
+
+def test_generic_totals_include_the_custom_charge():
+    totals = generic_invoice_totals(
+        [Line_item("a", 100.0), Line_item("b", 33.5)],
+        discount_percent=10, custom_charge=25.0,
+        payment_made=[Line_item("p", 20.0)], deposit_percentage=25.0,
+    )
+    assert totals == Totals(133.5, 13.35, 0.0, 145.15, 36.29, 25.0, 20.0, 125.15)
+
+
+def test_generic_totals_deposit_only_adds_the_charge():
+    items = [Line_item("a", 200.0)]
+    totals = generic_invoice_totals(
+        items, custom_charge=10.0, deposit_percentage=20.0, deposit_only=True)
+    assert (totals.deposit, totals.amount_due) == (42.0, 52.0)
+    assert generic_invoice_totals(items).deposit == 0.0
+    assert generic_invoice_totals(items, amount_due_override=5.0).amount_due == 5.0